@@ -32,5 +32,5 @@ if __name__ == "__main__":
         flags = "-D"
     icon_path = "docs/public/favicon.ico"
     
-    command = f'pyinstaller --clean {flags} -w --icon {icon_path} --add-data "{icon_path};." -n {output_name} --optimize=2 --collect-all spire.presentation main.py'
+    command = f'pyinstaller --clean {flags} -w --icon {icon_path} --add-data "{icon_path};." --add-data "notebooklm2ppt/assets;notebooklm2ppt/assets" -n {output_name} --optimize=2 --collect-all spire.presentation main.py'
     os.system(command)
@@ -1,6 +1,9 @@
 """主程序：将 PDF 转换为 PNG 图片，然后逐张调用截图工具进行处理"""
 
+import multiprocessing
 from notebooklm2ppt.cli import main
 
 if __name__ == "__main__":
+    # 打包成 exe 后，多进程渲染的子进程也从这里启动，需先交给 multiprocessing 处理
+    multiprocessing.freeze_support()
     main()
@@ -12,11 +12,13 @@ from .utils.image_viewer import show_image_fullscreen
 from .utils.screenshot_automation import take_fullscreen_snip, screen_height, screen_width
 from .utils.coordinate_utils import get_effective_top_left
 from .utils.image_inpainter import INPAINT_METHODS
+from .utils.render_cache import get_default_cache
 from .i18n import get_text
 
 
 def process_pdf_to_ppt(pdf_path, png_dir, ppt_dir, delay_between_images=2, inpaint=True, dpi=150, timeout=50, display_height=None, 
-                    display_width=None, done_button_offset=None, capture_done_offset: bool = True, pages=None, update_offset_callback=None, stop_flag=None, force_regenerate=False, inpaint_method='background_smooth', top_left=(0, 0)):
+                    display_width=None, done_button_offset=None, capture_done_offset: bool = True, pages=None, update_offset_callback=None, stop_flag=None, force_regenerate=False, inpaint_method='background_smooth', top_left=(0, 0),
+                    max_render_bytes=None, extract_images=False, workers=1):
     """
     将 PDF 转换为 PNG 图片，然后对每张图片进行截图处理
     
@@ -36,8 +38,11 @@ def process_pdf_to_ppt(pdf_path, png_dir, ppt_dir, delay_between_images=2, inpai
         update_offset_callback: 偏移更新回调函数
         stop_flag: 停止标志（用于中断转换）
         force_regenerate: 是否强制重新生成所有 PPT（默认 False，复用已存在的 PPT）
-        inpaint_method: 修复方法，可选值: background_smooth, edge_mean_smooth, background, onion, griddata, skimage
+        inpaint_method: 修复方法，可选值: background_smooth, edge_mean_smooth, background, onion, griddata, plane_fit, skimage, patchmatch, auto
         top_left: 截图区域的左上角坐标 (x, y)
+        max_render_bytes: 单页渲染内存预算（字节），超出时分块渲染到磁盘；None 表示不限
+        extract_images: 整页只有一张位图的页面直接提取原图，不按 DPI 重新渲染
+        workers: 并行渲染的进程数，0 或 None 表示使用全部 CPU 核心
     """
     # 1. 将 PDF 转换为 PNG 图片
     print("=" * 60)
@@ -48,7 +53,9 @@ def process_pdf_to_ppt(pdf_path, png_dir, ppt_dir, delay_between_images=2, inpai
         print(f"错误: PDF 文件 {pdf_path} 不存在")
         return
     
-    png_names = pdf_to_png(pdf_path, png_dir, dpi=dpi, inpaint=inpaint, pages=pages, inpaint_method=inpaint_method, force_regenerate=force_regenerate)
+    png_names = pdf_to_png(pdf_path, png_dir, dpi=dpi, inpaint=inpaint, pages=pages, inpaint_method=inpaint_method, force_regenerate=force_regenerate,
+                            max_render_bytes=max_render_bytes, extract_images=extract_images, cache=get_default_cache(),
+                            workers=workers)
     
     # 创建ppt输出目录
     ppt_dir.mkdir(exist_ok=True, parents=True)
@@ -12,7 +12,10 @@ DEFAULT_TASK_SETTINGS = {
     "force_regenerate": False,
     "unify_font": True,
     "font_name": "Calibri",
-    "page_range": ""
+    "page_range": "",
+    "workers": 1,  # 并行渲染的进程数，0 表示使用全部 CPU 核心
+    "extract_images": False,  # 整页只有一张位图时直接提取原图，不按 DPI 重新渲染
+    "max_render_mb": 0  # 单页渲染内存上限（MB），超出时分块渲染到磁盘，0 为不限
 }
 
 # 自动化相关设置的出厂默认值
@@ -23,6 +26,12 @@ DEFAULT_AUTOMATION_SETTINGS = {
     "calibrate": True  # 自动校准
 }
 
+# 页面渲染缓存的默认设置
+DEFAULT_RENDER_CACHE_SETTINGS = {
+    "cache_dir": "render_cache",  # 缓存目录（相对于工作目录）
+    "max_bytes": 2 * 1024 ** 3  # 缓存总大小上限，超出后按 LRU 淘汰
+}
+
 # GUI 相关的默认值
 DEFAULT_GUI_VALUES = {
     "output_dir": "workspace",
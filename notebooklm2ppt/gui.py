@@ -12,7 +12,8 @@ from .utils.ppt_combiner import combine_ppt, create_ppt_from_images
 from .utils.screenshot_automation import screen_width, screen_height
 from .utils.ppt_refiner import refine_ppt
 from .utils.image_inpainter import get_method_names, METHOD_ID_TO_NAME, get_method_name_from_id
-from .pdf2png import pdf_to_png
+from .pdf2png import pdf_to_png, parse_page_range, resolve_pages, get_page_count
+from .utils.render_cache import get_default_cache
 import json
 import ctypes
 import webbrowser
@@ -716,31 +717,6 @@ class AppGUI:
 
             print(get_text("start_processing", file=pdf_file))
 
-            # 解析页范围
-            def parse_page_range(range_str):
-                if not range_str:
-                    return None
-                pages = set()
-                # 将中文逗号替换为英文逗号
-                range_str = range_str.replace('，', ',')
-                # 将各种中文破折号替换为英文连字符
-                range_str = range_str.replace('—', '-').replace('–', '-').replace('－', '-')
-                for part in [p.strip() for p in range_str.split(',') if p.strip()]:
-                    if '-' in part:
-                        start_end = part.split('-')
-                        if start_end[0] == '':
-                            continue
-                        start = int(start_end[0])
-                        if start_end[1] == '':
-                            pages.update(range(start, start + 10000))
-                        else:
-                            end = int(start_end[1])
-                            if end >= start:
-                                pages.update(range(start, end + 1))
-                    else:
-                        pages.add(int(part))
-                return sorted(pages)
-
             # 将页码列表转换为字符串格式
             def format_page_suffix(pages):
                 if not pages:
@@ -761,16 +737,22 @@ class AppGUI:
                 return f"_p{','.join(result)}"
 
             pages_list = None
-            try:
-                pages_list = parse_page_range(self.page_range_var.get().strip())
-            except Exception as e:
-                raise ValueError(get_text("page_range_error"))
+            # 格式错误时抛出的 ValueError 即为页范围格式提示
+            page_spans = parse_page_range(self.page_range_var.get().strip())
+            if page_spans is not None:
+                # 开放区间（如 "5-"）按真实页数解析
+                pages_list = resolve_pages(page_spans, get_page_count(pdf_file))
             
             # 根据页码范围生成文件名后缀
             page_suffix = format_page_suffix(pages_list)
             out_ppt_file = workspace_dir / f"{pdf_name}{page_suffix}.pptx"
             
             method_id = self.get_method_id_from_translated_name(self.inpaint_method_var.get())
+            # 渲染相关设置没有对应的界面控件，沿用上次的任务设置
+            render_settings = get_default_settings(user_last_settings=getattr(self, 'last_task_settings', {}))
+            max_render_bytes = int(render_settings["max_render_mb"]) * 1024 * 1024 or None
+            extract_images = render_settings["extract_images"]
+            workers = int(render_settings["workers"])
 
             
             if self.image_only_var.get():
@@ -785,7 +767,11 @@ class AppGUI:
                     inpaint=self.inpaint_var.get(),
                     pages=pages_list,
                     inpaint_method=method_id,
-                    force_regenerate=self.force_regenerate_var.get()
+                    force_regenerate=self.force_regenerate_var.get(),
+                    max_render_bytes=max_render_bytes,
+                    extract_images=extract_images,
+                    workers=workers,
+                    cache=get_default_cache()
                 )
                 
                 if self.stop_flag:
@@ -813,7 +799,10 @@ class AppGUI:
                     stop_flag=lambda: self.stop_flag,
                     force_regenerate=self.force_regenerate_var.get(),
                     inpaint_method=method_id,
-                    top_left=self.top_left
+                    top_left=self.top_left,
+                    max_render_bytes=max_render_bytes,
+                    extract_images=extract_images,
+                    workers=workers
                 )
 
                 if self.stop_flag:
@@ -2093,6 +2082,9 @@ class AppGUI:
             ("unify_font_label", "unify_font", "bool"),
             ("font_name_label", "font_name", "entry"),
             ("page_range_label", "page_range", "entry"),
+            ("workers_label", "workers", "int_entry"),
+            ("extract_images_label", "extract_images", "bool"),
+            ("max_render_mb_label", "max_render_mb", "int_entry"),
         ]
         
         # 存储可能需要隐藏的组件
@@ -2123,7 +2115,7 @@ class AppGUI:
                 # 处理方法名的显示，如果是 ID 则转换为翻译名称
                 if curr_val is not None:
                     # 如果是 method_id (如 'background_smooth')，转换为翻译名称
-                    if curr_val in ["background_smooth", "edge_mean_smooth", "background", "onion", "griddata", "skimage"]:
+                    if curr_val in METHOD_ID_TO_NAME:
                         display_val = self.get_translated_name_from_id(curr_val)
                     else:
                         display_val = str(curr_val)
@@ -2325,6 +2317,10 @@ class AppGUI:
             unify_font = settings.get("unify_font", True)
             font_name = settings.get("font_name", "Calibri")
             page_range = settings.get("page_range", "")
+            max_render_mb = settings.get("max_render_mb", DEFAULT_TASK_SETTINGS["max_render_mb"])
+            max_render_bytes = int(max_render_mb) * 1024 * 1024 if max_render_mb else None
+            extract_images = settings.get("extract_images", DEFAULT_TASK_SETTINGS["extract_images"])
+            workers = int(settings.get("workers", DEFAULT_TASK_SETTINGS["workers"]))
             
             # 全局设置（不随任务存储，始终使用界面当前值）
             delay = self.delay_var.get() if hasattr(self, 'delay_var') else 0
@@ -2352,28 +2348,6 @@ class AppGUI:
             display_width = int(max_display_width * ratio_val)
             display_height = int(max_display_height * ratio_val)
             
-            def parse_page_range(range_str):
-                if not range_str:
-                    return None
-                pages = set()
-                range_str = range_str.replace('，', ',')
-                range_str = range_str.replace('—', '-').replace('–', '-').replace('－', '-')
-                for part in [p.strip() for p in range_str.split(',') if p.strip()]:
-                    if '-' in part:
-                        start_end = part.split('-')
-                        if start_end[0] == '':
-                            continue
-                        start = int(start_end[0])
-                        if start_end[1] == '':
-                            pages.update(range(start, start + 10000))
-                        else:
-                            end = int(start_end[1])
-                            if end >= start:
-                                pages.update(range(start, end + 1))
-                    else:
-                        pages.add(int(part))
-                return sorted(pages)
-                
             def format_page_suffix(pages):
                 if not pages:
                     return ""
@@ -2394,15 +2368,17 @@ class AppGUI:
             
             pages_list = None
             try:
-                pages_list = parse_page_range(page_range)
+                page_spans = parse_page_range(page_range)
             except Exception:
-                pages_list = None
+                page_spans = None
+            if page_spans is not None:
+                pages_list = resolve_pages(page_spans, get_page_count(pdf_file))
                 
             page_suffix = format_page_suffix(pages_list)
             out_ppt_file = workspace_dir / f"{pdf_name}{page_suffix}.pptx"
             
             # 如果 inpaint_method 已经是 ID 格式，直接使用；否则转换
-            if inpaint_method in ["background_smooth", "edge_mean_smooth", "background", "onion", "griddata", "skimage"]:
+            if inpaint_method in METHOD_ID_TO_NAME:
                 method_id = inpaint_method
             else:
                 method_id = self.get_method_id_from_translated_name(inpaint_method)
@@ -2415,7 +2391,11 @@ class AppGUI:
                     inpaint=inpaint,
                     pages=pages_list,
                     inpaint_method=method_id,
-                    force_regenerate=force_regenerate
+                    force_regenerate=force_regenerate,
+                    max_render_bytes=max_render_bytes,
+                    extract_images=extract_images,
+                    workers=workers,
+                    cache=get_default_cache()
                 )
                 if self.queue_stop_flag:
                     return False, None
@@ -2438,7 +2418,10 @@ class AppGUI:
                     stop_flag=lambda: self.queue_stop_flag,
                     force_regenerate=force_regenerate,
                     inpaint_method=method_id,
-                    top_left=self.top_left
+                    top_left=self.top_left,
+                    max_render_bytes=max_render_bytes,
+                    extract_images=extract_images,
+                    workers=workers
                 )
                 if self.queue_stop_flag:
                     return False, None
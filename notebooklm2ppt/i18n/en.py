@@ -38,6 +38,9 @@ TRANSLATIONS = {
     "font_name_label": "Target Font:",
     "page_range_label": "Page Range:",
     "page_range_hint": "Empty=All, e.g., 1-3,5,7-9",
+    "workers_label": "Render Processes (0=All Cores):",
+    "max_render_mb_label": "Page Render Memory Limit (MB, 0=Unlimited):",
+    "extract_images_label": "Extract Full-Page Images As-Is (Skip DPI Rendering)",
     "button_offset_label": "Btn Offset (px):",
     "calibrate_label": "Calibrate Button Position",
     "core_param_warning": "⚠️ Core: The program simulates mouse clicks on 'Convert to PPT' button.",
@@ -123,8 +126,14 @@ TRANSLATIONS = {
     "method_onion_desc": "Repairs layer by layer from outside in, suitable for thin scratches or lines",
     "method_griddata_name": "Gradient Interpolation",
     "method_griddata_desc": "Calculates smooth surface transitions, suitable for backgrounds with gradients",
+    "method_plane_fit_name": "Gradient Surface Fit",
+    "method_plane_fit_desc": "Fits a plane or quadratic surface to surrounding pixels, suitable for linear or radial gradients, fast and deterministic",
     "method_skimage_name": "Biharmonic Repair",
     "method_skimage_desc": "Computationally intensive and slow, but better at maintaining lighting continuity",
+    "method_patchmatch_name": "Texture Synthesis",
+    "method_patchmatch_desc": "Copies similar texture patches from the surroundings, suitable for photo or patterned backgrounds, slower",
+    "method_auto_name": "Automatic",
+    "method_auto_desc": "Classifies each page's background and uses the fastest adequate method: solid fill, surface fit for gradients, biharmonic for smooth backgrounds, texture synthesis for textures",
     "calibration_dialog_title": "Tip",
     "calibration_dialog_msg": (
         "Button position calibration in progress. A confirmation is required. Please read this carefully.\n\n"
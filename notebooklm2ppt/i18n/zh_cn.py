@@ -38,6 +38,9 @@ TRANSLATIONS = {
     "font_name_label": "目标字体:",
     "page_range_label": "页码范围:",
     "page_range_hint": "留空=全部，示例: 1-3,5,7-9",
+    "workers_label": "渲染进程数 (0=全部核心):",
+    "max_render_mb_label": "单页渲染内存上限 (MB，0=不限):",
+    "extract_images_label": "整页位图直接提取原图（不按 DPI 渲染）",
     "button_offset_label": "按钮偏移 (像素):",
     "calibrate_label": "校准按钮位置",
     "core_param_warning": "⚠️ 核心参数：程序通过模拟鼠标点击'转换为PPT'按钮实现转换",
@@ -123,8 +126,14 @@ TRANSLATIONS = {
     "method_onion_desc": "由外向内逐层修补，适合细长划痕或线条修复",
     "method_griddata_name": "渐变过渡插值",
     "method_griddata_desc": "计算平滑的曲面过渡，适合带有渐变的背景",
+    "method_plane_fit_name": "渐变曲面拟合",
+    "method_plane_fit_desc": "用周围像素拟合平面或二次曲面，适合线性、径向渐变背景，速度快且结果稳定",
     "method_skimage_name": "双调和光影修补",
     "method_skimage_desc": "计算量大，速度较慢，但能更好保持光影连续性",
+    "method_patchmatch_name": "纹理合成修补",
+    "method_patchmatch_desc": "从周围复制相似的纹理块，适合照片、花纹等有纹理的背景，速度较慢",
+    "method_auto_name": "自动选择",
+    "method_auto_desc": "逐页判断背景类型，选用能达到效果的最快方法：纯色直接填充、渐变曲面拟合、平滑背景双调和、纹理背景纹理合成",
     "calibration_dialog_title": "提示",
     "calibration_dialog_msg": (
         "正在进行按钮位置校准，需要您的一次交互确认，请仔细阅读此说明\n\n"
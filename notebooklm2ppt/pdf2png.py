@@ -1,10 +1,389 @@
 import fitz  # PyMuPDF
 import os
+import math
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from .utils.image_inpainter import inpaint_image, INPAINT_METHODS
+from .i18n import get_text
+from .utils.image_inpainter import inpaint_arrays, get_method_id, INPAINT_METHODS
+from .utils.watermark_detector import WatermarkDetector
+from .utils.image_pdf_writer import ImagePdfWriter
+from .utils.tiled_render import get_render_size, render_page_tiled, write_png_strips
 from PIL import Image
+import numpy as np
 
-def pdf_to_png(pdf_path, output_dir=None, dpi=150, inpaint=False, pages=None, inpaint_method='background_smooth', force_regenerate=False, make_wide_screen=False):
+
+# 需要修复时，每凑满这么多页就合并做一次批量修复（内存中同时保留这些页的像素）
+INPAINT_BATCH_SIZE = 8
+
+# 内存中的渲染结果：image 为 (H, W, 3) uint8 数组，直接引用 pixmap 的像素内存
+PageImage = namedtuple('PageImage', ['page_num', 'dpi', 'image', 'pixmap'])
+
+
+def parse_page_range(range_str):
+    """
+    解析页码范围字符串，如 "1-3,5,8-"
+    
+    结果是区间列表 [(start, end), ...]，end 为 None 表示直到最后一页。
+    开放区间不会在这里展开，而是在知道真实页数后由 resolve_pages 解析。
+    格式错误时抛出 ValueError，消息即界面上显示的页范围格式提示。
+    
+    返回:
+        list 或 None（空字符串表示全部页）
+    """
+    if not range_str:
+        return None
+    spans = []
+    # 将中文逗号替换为英文逗号
+    range_str = range_str.replace('，', ',')
+    # 将各种中文破折号替换为英文连字符
+    range_str = range_str.replace('—', '-').replace('–', '-').replace('－', '-')
+    try:
+        for part in [p.strip() for p in range_str.split(',') if p.strip()]:
+            if '-' in part:
+                start_end = part.split('-')
+                if start_end[0] == '':
+                    continue
+                start = int(start_end[0])
+                if start_end[1] == '':
+                    spans.append((start, None))
+                else:
+                    end = int(start_end[1])
+                    if end >= start:
+                        spans.append((start, end))
+            else:
+                page = int(part)
+                spans.append((page, page))
+    except ValueError:
+        raise ValueError(get_text("page_range_error")) from None
+    return spans
+
+
+def resolve_pages(pages, page_count):
+    """
+    将页码范围解析为 [1, page_count] 内的有序页码列表
+    
+    参数:
+        pages: None（全部页）、页码范围字符串、parse_page_range 的区间列表或页码可迭代对象
+        page_count: 文档真实页数
+    """
+    if isinstance(pages, str):
+        pages = parse_page_range(pages)
+    if pages is None:
+        return list(range(1, page_count + 1))
+    pages = list(pages)
+    if pages and isinstance(pages[0], tuple):
+        page_set = set()
+        for start, end in pages:
+            end = page_count if end is None else min(end, page_count)
+            page_set.update(range(max(start, 1), end + 1))
+        return sorted(page_set)
+    return sorted(n for n in set(pages) if 1 <= n <= page_count)
+
+
+def resolve_workers(workers, task_count):
+    """
+    解析并行进程数
+
+    参数:
+        workers: 进程数；None 或 0 表示使用全部 CPU 核心
+        task_count: 待处理的页数，进程数不会超过它
+
+    返回:
+        int: 实际使用的进程数，不大于 1 时调用方应串行处理
+    """
+    if not workers:
+        workers = os.cpu_count() or 1
+    return min(workers, task_count)
+
+
+def run_page_chunks(worker_func, pdf_path, page_nums, workers, *args):
+    """
+    用进程池按小批次并行处理页码
+
+    worker_func(pdf_path, chunk, *args) 在子进程中执行，须为模块级函数：
+    自行打开 fitz 文档（文档对象不能跨进程传递），返回该批页码的结果列表。
+    每个进程分到若干小批次，兼顾负载均衡与文档打开开销。
+
+    参数:
+        worker_func: 工作函数
+        pdf_path: PDF 文件路径
+        page_nums: 页码列表
+        workers: 进程数，由 resolve_workers 得到
+        *args: 传给 worker_func 的其余参数
+
+    返回:
+        list: 按 page_nums 顺序拼接的各批结果
+    """
+    chunk_size = max(1, math.ceil(len(page_nums) / (workers * 4)))
+    chunks = [page_nums[i:i + chunk_size] for i in range(0, len(page_nums), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(worker_func, str(pdf_path), chunk, *args) for chunk in chunks]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+def get_page_count(pdf_path):
+    """读取 PDF 页数（不加载任何页面）"""
+    with fitz.open(pdf_path) as pdf_doc:
+        return len(pdf_doc)
+
+
+def pixmap_to_array(pix):
+    """
+    将 fitz.Pixmap 零拷贝转换为 NumPy 数组 (H, W, n)
+    
+    返回的数组与 pixmap 共享内存，使用期间必须保持 pixmap 存活。
+    """
+    buf = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)
+    return buf[:, :pix.width * pix.n].reshape(pix.height, pix.width, pix.n)
+
+
+def iter_pdf_pages(pdf_path, dpi=150, pages=None):
+    """
+    逐页渲染 PDF，以 NumPy 数组的形式产出，不经过 PNG 编解码
+    
+    参数:
+        pdf_path: PDF 文件路径
+        dpi: 分辨率，默认 150
+        pages: 要处理的页码范围（从 1 开始），格式见 resolve_pages，None 表示全部
+        
+    产出:
+        PageImage(page_num, dpi, image, pixmap)，image 为 RGB uint8 数组。
+        image 引用 pixmap 的内存，如需跨页保留请自行 copy()。
+    """
+    pdf_doc = fitz.open(pdf_path)
+    try:
+        zoom = dpi / 72
+        mat = fitz.Matrix(zoom, zoom)
+        for page_num in resolve_pages(pages, len(pdf_doc)):
+            pix = pdf_doc.load_page(page_num - 1).get_pixmap(matrix=mat, alpha=False)
+            yield PageImage(page_num, dpi, pixmap_to_array(pix), pix)
+    finally:
+        pdf_doc.close()
+
+
+def make_wide_screen_array(image):
+    """
+    将图片数组调整为 16:9 宽屏（左右补白或居中裁剪）
+    
+    参数:
+        image: (H, W, 3) uint8 数组
+        
+    返回:
+        tuple: (调整后的数组, 调整动作 'pad' / 'crop' / None)
+    """
+    height, width = image.shape[:2]
+    target_width = round(height * 16 / 9)
+    if target_width > width:
+        # 需要扩展宽度
+        new_image = np.full((height, target_width, image.shape[2]), 255, dtype=np.uint8)
+        left = (target_width - width) // 2
+        new_image[:, left:left + width] = image
+        return new_image, 'pad'
+    elif target_width < width:
+        # 需要裁剪宽度
+        left = (width - target_width) // 2
+        return image[:, left:left + target_width], 'crop'
+    return image, None
+
+
+def is_opaque_smask(pdf_doc, smask_xref):
+    """
+    判断图片的透明蒙版是否完全不透明（没有蒙版也算）
+    
+    参数:
+        pdf_doc: fitz.Document
+        smask_xref: 蒙版的 xref，0 表示没有蒙版
+        
+    返回:
+        bool: 蒙版不存在或所有像素都为 255 时返回 True
+    """
+    if smask_xref == 0:
+        return True
+    mask = fitz.Pixmap(pdf_doc, smask_xref)
+    if mask.n != 1:
+        return False
+    return np.frombuffer(mask.samples_mv, dtype=np.uint8).min() == 255
+
+
+def get_full_page_image_xref(page, tolerance=0.01):
+    """
+    判断页面是否只由一张铺满整页的位图构成
+    
+    参数:
+        page: fitz.Page
+        tolerance: 图片边界与页面边界允许的相对误差
+        
+    返回:
+        int 或 None: 满足条件时返回图片的 xref
+    """
+    images = page.get_images(full=True)
+    if len(images) != 1:
+        return None
+    if page.rotation or page.get_text("text").strip() or page.get_drawings():
+        return None
+    infos = page.get_image_info(xrefs=True)
+    if len(infos) != 1 or not infos[0]["xref"]:
+        return None
+    info = infos[0]
+    # 排除旋转、翻转的放置方式
+    a, b, c, d, _, _ = info["transform"]
+    if b != 0 or c != 0 or a <= 0 or d <= 0:
+        return None
+    bbox, rect = fitz.Rect(info["bbox"]), page.rect
+    tol_x, tol_y = rect.width * tolerance, rect.height * tolerance
+    if (abs(bbox.x0 - rect.x0) > tol_x or abs(bbox.x1 - rect.x1) > tol_x or
+            abs(bbox.y0 - rect.y0) > tol_y or abs(bbox.y1 - rect.y1) > tol_y):
+        return None
+    # NotebookLM 导出的页面都带一张全不透明的 SMask，这种蒙版不影响像素，放在最后解码
+    if not is_opaque_smask(page.parent, images[0][1]):
+        return None
+    return info["xref"]
+
+
+def extract_image_pixmap(pdf_doc, xref):
+    """按 xref 取出嵌入位图的原始像素，并统一为不带 alpha 的 RGB Pixmap"""
+    pix = fitz.Pixmap(pdf_doc, xref)
+    if pix.alpha or pix.colorspace is None or pix.colorspace.n != 3:
+        pix = fitz.Pixmap(fitz.csRGB, pix, 0)
+    return pix
+
+
+def _render_page_tiled(page, output_path, mat, inpaint, inpaint_method, make_wide_screen, max_render_bytes, detector=None):
+    """超出内存预算的页面：分块渲染到磁盘 memmap，修复只读写 ROI，再分条带写出 PNG"""
+    image = render_page_tiled(page, mat, max_render_bytes, tmp_dir=output_path.parent)
+    tmp_path = image.filename
+    try:
+        height, width = image.shape[:2]
+        print(f"✓ 已分块渲染 ({width}x{height}): {output_path}")
+        if inpaint:
+            if inpaint_arrays([image], inpaint_method=inpaint_method, detector=detector)[0] is None:
+                print(f"未检测到水印，跳过修复: {output_path}")
+            else:
+                print(f"✓ 已修复: {output_path}")
+        target_width = round(height * 16 / 9) if make_wide_screen else None
+        write_png_strips(image, output_path, target_width=target_width, max_bytes=max_render_bytes)
+        print(f"✓ 已保存: {output_path}")
+    finally:
+        del image
+        os.remove(tmp_path)
+    return output_path.name
+
+
+def _prepare_page(pdf_doc, page_num, output_dir, mat, inpaint, inpaint_method, make_wide_screen, extract_images=False, max_render_bytes=None, detector=None):
+    """
+    渲染或提取单页像素；不需要在内存中继续处理的页面在这里直接写盘
+    
+    返回:
+        tuple: (输出路径, 图片数组, pixmap)，图片数组为 None 表示该页已写出；
+               图片数组引用 pixmap 的内存，写出前须保持 pixmap 存活
+    """
+    output_path = output_dir / f"page_{page_num:04d}.png"
+
+    page = pdf_doc.load_page(page_num - 1)
+    xref = get_full_page_image_xref(page) if extract_images else None
+    if xref is None:
+        width, height = get_render_size(page, mat)
+        if max_render_bytes and width * height * 3 > max_render_bytes:
+            _render_page_tiled(page, output_path, mat, inpaint, inpaint_method, make_wide_screen, max_render_bytes, detector)
+            return output_path, None, None
+        # 渲染页面为图片
+        pix = page.get_pixmap(matrix=mat, alpha=False)
+    else:
+        if not inpaint and not make_wide_screen:
+            # 无需任何变换时，原图若本就是 RGB PNG，直接写出原始字节，连编码都省掉
+            info = pdf_doc.extract_image(xref)
+            if info["ext"] == "png" and info["colorspace"] == 3:
+                with open(output_path, 'wb') as f:
+                    f.write(info["image"])
+                print(f"✓ 整页位图，已直接写出原图: {output_path}")
+                return output_path, None, None
+        pix = extract_image_pixmap(pdf_doc, xref)
+        print(f"✓ 整页位图，直接提取原图 ({pix.width}x{pix.height}): {output_path}")
+    if not inpaint and not make_wide_screen:
+        pix.save(output_path)
+        print(f"✓ 已保存: {output_path}")
+        return output_path, None, None
+    return output_path, pixmap_to_array(pix), pix
+
+
+def _save_page_image(image, output_path, inpainted, make_wide_screen):
+    """对已在内存中（修复过）的页面做宽屏调整，最后只编码写盘一次"""
+    # 旧流程中每个变换都要先解码上一步的 PNG，再重新编码一次
+    skipped_encodes = skipped_decodes = 0
+    if inpainted:
+        skipped_encodes += 1
+        skipped_decodes += 1
+
+    if make_wide_screen:
+        # 变为16:9宽屏图片
+        image, action = make_wide_screen_array(image)
+        if action == 'pad':
+            print(f"✓ 已调整为宽屏: {output_path}")
+        elif action == 'crop':
+            print(f"✓ 已裁剪为宽屏: {output_path}")
+        else:
+            print(f"✓ 已是宽屏，无需调整: {output_path}")
+        skipped_decodes += 1
+        if action is not None:
+            skipped_encodes += 1
+
+    start = time.perf_counter()
+    Image.fromarray(image).save(output_path)
+    encode_time = time.perf_counter() - start
+    # 以本次编码耗时估算省下的时间（未计入解码，属于保守估计）
+    print(f"✓ 已保存: {output_path}（省去 {skipped_encodes} 次编码、{skipped_decodes} 次解码，约 {encode_time * skipped_encodes:.2f}s）")
+
+
+def _render_pages(pdf_doc, page_nums, output_dir, mat, inpaint, inpaint_method, make_wide_screen, extract_images=False, max_render_bytes=None):
+    """
+    渲染一组页面；需要修复时每 INPAINT_BATCH_SIZE 页合并做一次批量修复
+    
+    同一组页面共用一个 WatermarkDetector，水印位置只需完整搜索一次。
+    
+    返回:
+        list: 输出文件名
+    """
+    batch_size = INPAINT_BATCH_SIZE if inpaint else 1
+    detector = WatermarkDetector() if inpaint else None
+    names = []
+    for i in range(0, len(page_nums), batch_size):
+        prepared = [
+            _prepare_page(pdf_doc, page_num, output_dir, mat, inpaint, inpaint_method, make_wide_screen, extract_images, max_render_bytes, detector)
+            for page_num in page_nums[i:i + batch_size]
+        ]
+        pending = [(output_path, image) for output_path, image, _ in prepared if image is not None]
+        inpainted = [False] * len(pending)
+        if inpaint and pending:
+            rects = inpaint_arrays([image for _, image in pending], inpaint_method=inpaint_method, detector=detector)
+            for j, ((output_path, _), rect) in enumerate(zip(pending, rects)):
+                inpainted[j] = rect is not None
+                if rect is None:
+                    print(f"未检测到水印，跳过修复: {output_path}")
+                else:
+                    print(f"✓ 已修复: {output_path}")
+        for (output_path, image), page_inpainted in zip(pending, inpainted):
+            _save_page_image(image, output_path, page_inpainted, make_wide_screen)
+        names.extend(output_path.name for output_path, _, _ in prepared)
+    return names
+
+
+def _render_page_chunk(pdf_path, page_nums, output_dir, dpi, inpaint, inpaint_method, make_wide_screen, extract_images, max_render_bytes):
+    """run_page_chunks 的工作函数：渲染一批页码，返回输出文件名"""
+    pdf_doc = fitz.open(pdf_path)
+    zoom = dpi / 72
+    mat = fitz.Matrix(zoom, zoom)
+    try:
+        return _render_pages(pdf_doc, page_nums, output_dir, mat, inpaint, inpaint_method, make_wide_screen, extract_images, max_render_bytes)
+    finally:
+        pdf_doc.close()
+
+
+def pdf_to_png(pdf_path, output_dir=None, dpi=150, inpaint=False, pages=None, inpaint_method='background_smooth', force_regenerate=False, make_wide_screen=False, workers=1, cache=None, extract_images=False, max_render_bytes=None):
     """
     将 PDF 文件转换为多个 PNG 图片
     
@@ -13,10 +392,16 @@ def pdf_to_png(pdf_path, output_dir=None, dpi=150, inpaint=False, pages=None, in
         output_dir: 输出目录，默认为 PDF 同目录的 pdf_name_pngs 文件夹
         dpi: 分辨率，默认 150
         inpaint: 是否进行图像修复
-        pages: 要处理的页码范围
-        inpaint_method: 修复方法，可选值: background_smooth, edge_mean_smooth, background, onion, griddata, skimage
+        pages: 要处理的页码范围，格式见 resolve_pages；只会加载这些页面
+        inpaint_method: 修复方法，可选值: background_smooth, edge_mean_smooth, background, onion, griddata, plane_fit, skimage, patchmatch, auto
         force_regenerate: 是否强制重新生成所有 PNG（默认 False，复用已存在的 PNG）
         make_wide_screen: 是否变为宽屏图片，适应16:9 PPT页面
+        workers: 并行渲染的进程数，默认 1（串行）；None 或 0 表示使用全部 CPU 核心
+        cache: RenderCache 实例。提供时按 (PDF 内容, 页码, DPI, 修复方法, 宽屏, 提取整页位图, 分块预算) 复用缓存，
+               不再仅凭文件名是否存在来跳过；force_regenerate 时忽略命中但仍写入缓存
+        extract_images: 对只由一张整页位图构成的页面，直接提取原图（原始分辨率，忽略 dpi）而不重新渲染
+        max_render_bytes: 单页像素内存预算（字节）。整页超出时改为分块渲染到磁盘，
+                          修复与写出也按块进行，峰值内存与页面大小无关；None 表示不限制
     """
     # 打开 PDF 文件
     pdf_doc = fitz.open(pdf_path)
@@ -31,61 +416,55 @@ def pdf_to_png(pdf_path, output_dir=None, dpi=150, inpaint=False, pages=None, in
     # 创建输出目录
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    # 转换因子：DPI / 72（默认屏幕 DPI）
-    zoom = dpi / 72
-    mat = fitz.Matrix(zoom, zoom)
-    
-    # 遍历每一页
     page_count = len(pdf_doc)  # 在关闭文档前获取页数
-    # 规范 pages 参数为集合，方便判断
-    pages_set = None
-    if pages is not None:
-        pages_set = set(pages)
-
-    png_names = []
-    for page_num, page in enumerate(pdf_doc, 1):
-        # 如果指定了 pages，则跳过不在范围内的页码
-        if pages_set is not None and page_num not in pages_set:
-            continue
-        # 渲染页面为图片
-        pix = page.get_pixmap(matrix=mat, alpha=False)
-        
-        # 保存为 PNG
-        output_path = output_dir / f"page_{page_num:04d}.png"
-        
-        png_names.append(output_path.name)
+    # 按真实页数解析页码范围，之后只通过 load_page 访问这些页
+    page_nums = resolve_pages(pages, page_count)
 
-        if not force_regenerate and os.path.exists(output_path):
-            print(f"跳过已存在的文件: {output_path}")
-            continue
-        pix.save(output_path)
-        print(f"✓ 已保存: {output_path}")
-        if inpaint:
-            inpaint_image(str(output_path), str(output_path), inpaint_method=inpaint_method)
-            print(f"✓ 已修复: {output_path}")
-
-        if make_wide_screen:
-            # 变为16:9宽屏图片
-            img = Image.open(output_path)
-            width, height = img.size
-            target_width = round(height * 16 / 9)
-            if target_width > width:
-                # 需要扩展宽度
-                new_img = Image.new("RGB", (target_width, height), (255, 255, 255))
-                new_img.paste(img, ((target_width - width) // 2, 0))
-                new_img.save(output_path)
-                print(f"✓ 已调整为宽屏: {output_path}")
-            elif target_width < width:
-                # 需要裁剪宽度
-                left = (width - target_width) // 2
-                right = left + target_width
-                cropped_img = img.crop((left, 0, right, height))
-                cropped_img.save(output_path)
-                print(f"✓ 已裁剪为宽屏: {output_path}")
+    png_names = [f"page_{page_num:04d}.png" for page_num in page_nums]
+
+    cache_keys = {}
+    if cache is not None:
+        pdf_digest = cache.pdf_digest(pdf_path)
+        method_id = get_method_id(inpaint_method) if inpaint else None
+        for page_num in page_nums:
+            cache_keys[page_num] = cache.make_key(pdf_digest, page_num, dpi, method_id, make_wide_screen, extract_images,
+                                                  max_render_bytes)
+
+    # 先处理可复用的页面，只把需要渲染的页码交给渲染流程
+    todo_pages = []
+    for page_num in page_nums:
+        output_path = output_dir / f"page_{page_num:04d}.png"
+        if force_regenerate:
+            todo_pages.append(page_num)
+        elif cache is not None:
+            if cache.get(cache_keys[page_num], output_path):
+                print(f"✓ 命中缓存: {output_path}")
             else:
-                print(f"✓ 已是宽屏，无需调整: {output_path}")
+                todo_pages.append(page_num)
+        elif os.path.exists(output_path):
+            print(f"跳过已存在的文件: {output_path}")
+        else:
+            todo_pages.append(page_num)
+
+    workers = resolve_workers(workers, len(todo_pages))
+    if workers <= 1:
+        # 转换因子：DPI / 72（默认屏幕 DPI）
+        zoom = dpi / 72
+        mat = fitz.Matrix(zoom, zoom)
+        _render_pages(pdf_doc, todo_pages, output_dir, mat, inpaint, inpaint_method, make_wide_screen, extract_images, max_render_bytes)
+        pdf_doc.close()
+    else:
+        pdf_doc.close()
+        print(f"使用 {workers} 个进程并行渲染 {len(todo_pages)} 页")
+        run_page_chunks(_render_page_chunk, pdf_path, todo_pages, workers,
+                        output_dir, dpi, inpaint, inpaint_method, make_wide_screen, extract_images, max_render_bytes)
+
+    # 缓存只在主进程中读写，避免多进程并发修改清单
+    if cache is not None:
+        for page_num in todo_pages:
+            cache.put(cache_keys[page_num], output_dir / f"page_{page_num:04d}.png")
+        cache.save()
 
-    pdf_doc.close()
     print(f"\n完成! 共转换 {page_count} 页，输出目录: {output_dir}")
     return png_names
 
@@ -93,6 +472,9 @@ def pngs2pdf(png_files, output_pdf):
     """
     将多个 PNG 图片合并为一个 PDF 文件
     
+    逐页写入，PNG/JPEG 的压缩数据直接写入 PDF 而不解码，
+    峰值内存只与单页大小有关，与总页数无关。
+    
     参数:
         png_files: PNG 文件路径列表
         output_pdf: 输出 PDF 文件路径
@@ -101,15 +483,9 @@ def pngs2pdf(png_files, output_pdf):
         print("没有提供 PNG 文件列表，无法生成 PDF。")
         return
 
-    image_list = []
-    for png_file in png_files:
-        img = Image.open(png_file).convert("RGB")
-        image_list.append(img)
-
-    # 保存为 PDF
-    first_image = image_list[0]
-    rest_images = image_list[1:]
-    first_image.save(output_pdf, save_all=True, append_images=rest_images)
+    with ImagePdfWriter(output_pdf) as writer:
+        for png_file in png_files:
+            writer.add_image_page(png_file)
     print(f"✓ 已生成 PDF: {output_pdf}")
 
 if __name__ == "__main__":
@@ -1,12 +1,13 @@
 """工具函数模块"""
 
 from .image_viewer import show_image_fullscreen
-from .image_inpainter import inpaint_image
+from .image_inpainter import inpaint_image, inpaint_images
 from .screenshot_automation import take_fullscreen_snip, screen_height, screen_width
 
 __all__ = [
     'show_image_fullscreen',
     'inpaint_image',
+    'inpaint_images',
     'take_fullscreen_snip',
     'screen_height',
     'screen_width',
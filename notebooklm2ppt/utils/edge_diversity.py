@@ -1,83 +1,320 @@
 import numpy as np
 
+# 边框像素的多项式拟合残差（均方根）低于该值时，认为背景是渐变，可用拟合结果填充
+GRADIENT_MAX_RESIDUAL = 6
+
+# bincount 的桶数（矩形数 × 每个矩形的颜色桶数）超过像素数的该倍数、且超过 MIN_BINCOUNT_BINS 时，
+# 直方图过于稀疏（容差很小），改用一维 np.unique 只统计出现过的键
+BINCOUNT_SPARSITY = 16
+MIN_BINCOUNT_BINS = 1 << 16
+
+
+def border_pixels(boxes, valid=None):
+    """
+    矩形四条边上的像素坐标：上、下两行各 width 个，左、右两列各 height 个（角点计两次）
+
+    参数:
+        boxes: (K, 4) 已裁剪到图片范围内的整数矩形 (left, top, right, bottom)
+        valid: (K,) 布尔数组，只取这些矩形的边；默认取宽、高都至少 1 像素的矩形
+
+    返回:
+        (box_id, ys, xs): 每个像素所属矩形的序号及其坐标
+    """
+    left, top, right, bottom = np.asarray(boxes).T
+    width, height = right - left, bottom - top
+    if valid is None:
+        valid = (width > 0) & (height > 0)
+    counts = np.where(valid, 2 * (width + height), 0)
+    box_id = np.repeat(np.arange(len(width)), counts)
+    pos = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    w, h = width[box_id], height[box_id]
+    l, t, r, b = left[box_id], top[box_id], right[box_id], bottom[box_id]
+    segment = (pos >= w).astype(int) + (pos >= 2 * w) + (pos >= 2 * w + h)
+    ys = np.choose(segment, [t, b - 1, t + pos - 2 * w, t + pos - 2 * w - h])
+    xs = np.choose(segment, [l + pos, l + pos - w, l, r - 1])
+    return box_id, ys, xs
+
+
+def _clip_boxes(boxes, width, height):
+    """四舍五入并裁剪到图片范围内，返回 (K, 4) 整数数组"""
+    boxes = np.asarray(np.round(np.asarray(boxes, dtype=np.float64).reshape(-1, 4)), dtype=int)
+    return np.clip(boxes, 0, [width, height, width, height])
+
+
+def _dominant_colors(points, box_id, k, tolerance):
+    """
+    按矩形分组统计量化颜色直方图，返回每组的 (多样性, 主色)
+
+    量化后的 RGB 打包成一个整数键（R 为最高位，与按行字典序排序的次序一致），
+    再与组号合成一维键，用 bincount 一次统计所有组；出现次数相同的桶取键最小者。
+
+    参数:
+        points: (n, 3) 像素颜色
+        box_id: (n,) 每个像素所属的组
+        k: 组数
+        tolerance: 颜色量化的容差
+
+    返回:
+        list: 每组的 (1 - 主色占比, 主色)；没有像素的组为 (1.0, 白色)
+    """
+    levels = 255 // tolerance + 1
+    nbins = levels ** 3
+    quantized = points.astype(np.int64) // tolerance
+    local = (quantized[:, 0] * levels + quantized[:, 1]) * levels + quantized[:, 2]
+    keys = box_id * nbins + local
+
+    if k * nbins <= max(MIN_BINCOUNT_BINS, BINCOUNT_SPARSITY * len(keys)):
+        counts = np.bincount(keys, minlength=k * nbins).reshape(k, nbins)
+        dominant = counts.argmax(axis=1)
+        max_count = counts[np.arange(k), dominant]
+    else:
+        # 颜色桶太多（容差很小）时，只统计出现过的键
+        unique_keys, counts = np.unique(keys, return_counts=True)
+        owner = unique_keys // nbins
+        order = np.lexsort((unique_keys, -counts, owner))
+        first = order[np.r_[True, owner[order][1:] != owner[order][:-1]]] if len(order) else order
+        dominant = np.zeros(k, dtype=np.int64)
+        max_count = np.zeros(k, dtype=np.int64)
+        dominant[owner[first]] = unique_keys[first] % nbins
+        max_count[owner[first]] = counts[first]
+
+    total = np.bincount(box_id, minlength=k)
+    # 主色取属于主桶的所有原始像素的平均值
+    in_main = local == dominant[box_id]
+    sums = np.stack([np.bincount(box_id[in_main], points[in_main, c], minlength=k)
+                     for c in range(points.shape[1])], axis=1)
+    means = (sums / np.maximum(max_count, 1)[:, None]).astype(np.uint8)
+
+    results = []
+    for i in range(k):
+        if total[i] == 0:
+            results.append((1.0, [255, 255, 255]))  # 默认返回高多样性（不填充），白色
+        else:
+            results.append((1 - max_count[i] / total[i], means[i].tolist()))
+    return results
+
+
+def compute_edge_diversity_batch(image_cv, boxes, tolerance=15):
+    """
+    一次计算同一张图片上多个矩形的边缘颜色一致性
+
+    所有矩形的边框像素一次取出，量化颜色直方图用 bincount 一次统计，
+    代价与边框像素总数成正比，不再逐个矩形调用 np.unique。
+
+    参数:
+        image_cv: (H, W, 3) 图片
+        boxes: (K, 4) 矩形 (left, top, right, bottom)，越界部分会被裁剪
+        tolerance: 容差，类似于 DBSCAN 的 eps。值越大，越忽略颜色微小差异。
+
+    返回:
+        list: K 个 (diversity, main_color)；裁剪后宽或高为 0（含完全在图外）的矩形
+            没有边框像素，返回 (1.0, 白色)，不会去读矩形外相邻的行、列
+    """
+    h, w = image_cv.shape[:2]
+    boxes = _clip_boxes(boxes, w, h)
+    box_id, ys, xs = border_pixels(boxes)
+    return _dominant_colors(image_cv[ys, xs, :3], box_id, len(boxes), tolerance)
+
+
+def compute_edge_diversity_pages(images, left, top, right, bottom, tolerance=15):
+    """
+    compute_edge_diversity_batch 的另一种批量形式：(N, H, W, 3) 的多页图片、同一个矩形
+
+    返回:
+        list: 每页的 (diversity, main_color)
+    """
+    n, h, w = images.shape[:3]
+    box_id, ys, xs = border_pixels(_clip_boxes([left, top, right, bottom], w, h))
+    points = images[:, ys, xs, :3].reshape(-1, 3)
+    return _dominant_colors(points, np.repeat(np.arange(n), len(ys)), n, tolerance)
+
+
 def compute_edge_diversity_numpy(image_cv, left, top, right, bottom, tolerance=15):
     """
     使用 Numpy 替代 DBSCAN 计算边缘颜色一致性。
     tolerance: 容差，类似于 DBSCAN 的 eps。值越大，越忽略颜色微小差异。
+    多个矩形请用 compute_edge_diversity_batch。
+    """
+    return compute_edge_diversity_batch(image_cv, [[left, top, right, bottom]], tolerance)[0]
+
+class BorderSums:
+    """
+    一页图片上矩形边框像素的 O(1) 统计：按行、按列的前缀和
+
+    把矩形上、下边所在的行段按 x 方向，左、右边所在的列段按 y 方向首尾相接排成一维序列，
+    对像素值、坐标·像素值、像素值平方各求一次整数前缀和（同一行、列上的多条边合并为一段）。
+    预计算的代价与边框像素数相当，之后这些矩形、以及四条边都落在这些行段、列段上的任意矩形，
+    其边框像素（与 border_pixels 相同，角点计两次）的颜色和、平方和与一阶矩都只需几次查表。
     """
-    left, top, right, bottom = round(left), round(top), round(right), round(bottom)
-    
-    # 边界检查，防止切片越界
-    h, w, _ = image_cv.shape
-    left = max(0, left); top = max(0, top)
-    right = min(w, right); bottom = min(h, bottom)
-
-    # 提取边缘像素
-    top_edge = image_cv[top:top+1, left:right]      # 注意：top-1 可能越界，改为 top
-    bottom_edge = image_cv[bottom-1:bottom, left:right] 
-    left_edge = image_cv[top:bottom, left:left+1]
-    right_edge = image_cv[top:bottom, right-1:right]
-    
-    edges = [top_edge, bottom_edge, left_edge, right_edge]
-    
-    # 过滤掉空切片 (防止 coordinates 重合导致 crash)
-    valid_edges = [e.reshape(-1, 3) for e in edges if e.size > 0]
-    if not valid_edges:
-        return 1.0, np.array([255, 255, 255]) # 默认返回高多样性（不填充），白色
-
-    flatten_points = np.concatenate(valid_edges, axis=0)
-
-    if flatten_points.shape[0] == 0:
-         return 1.0, np.array([255, 255, 255])
-
-    # --- 核心逻辑替代 DBSCAN ---
-    
-    # 1. 颜色量化 (整除 tolerance)，相当于把相近颜色归桶
-    quantized_points = flatten_points // tolerance
-    
-    # 2. 统计唯一颜色和数量
-    unique_colors, counts = np.unique(quantized_points, axis=0, return_counts=True)
-    
-    # 3. 找到占比最大的颜色
-    max_count_index = np.argmax(counts)
-    max_count = counts[max_count_index]
-    total_count = np.sum(counts)
-    
-    main_ratio = max_count / total_count
-    
-    # 4. 获取该“桶”内的平均颜色 (或者直接还原量化前的颜色)
-    # 为了准确，我们可以取属于该桶的所有原始像素的平均值
-    dominant_quantized_color = unique_colors[max_count_index]
-    # 创建掩码找出原始像素
-    mask = np.all((flatten_points // tolerance) == dominant_quantized_color, axis=1)
-    main_color = np.mean(flatten_points[mask], axis=0)
-    main_color = main_color.astype(np.uint8).tolist()
-
-    return 1 - main_ratio, main_color
+
+    def __init__(self, image_cv, boxes):
+        """
+        参数:
+            image_cv: (H, W, C) 图片
+            boxes: (K, 4) 矩形 (left, top, right, bottom)，越界部分会被裁剪
+        """
+        h, w = image_cv.shape[:2]
+        self.shape = (h, w)
+        left, top, right, bottom = _clip_boxes(boxes, w, h).T
+        nonempty = (right > left) & (bottom > top)
+        # 没有非空矩形时仍保留一段长度为 0 的行、列，供空矩形查表
+        left, top = np.r_[0, left[nonempty]], np.r_[0, top[nonempty]]
+        right, bottom = np.r_[0, right[nonempty]], np.r_[1, bottom[nonempty]]
+
+        rows = self._spans(np.r_[top, bottom - 1], np.r_[left, left], np.r_[right, right])
+        ys, xs = self._span_pixels(*rows)
+        self._rows = self._prefix(image_cv[ys, xs], xs, *rows)
+        cols = self._spans(np.r_[left, np.maximum(right - 1, 0)], np.r_[top, top], np.r_[bottom, bottom])
+        xs, ys = self._span_pixels(*cols)
+        self._cols = self._prefix(image_cv[ys, xs], ys, *cols)
+
+    @staticmethod
+    def _spans(lines, starts, ends):
+        """同一行（列）上的多条线段合并为覆盖它们的一段，返回 (lines, starts, ends)"""
+        lines, inverse = np.unique(lines, return_inverse=True)
+        span_starts = np.full(len(lines), np.iinfo(np.int64).max)
+        span_ends = np.zeros(len(lines), dtype=np.int64)
+        np.minimum.at(span_starts, inverse, starts)
+        np.maximum.at(span_ends, inverse, ends)
+        return lines, span_starts, span_ends
+
+    @staticmethod
+    def _span_pixels(lines, starts, ends):
+        """各线段首尾相接后每个像素的 (线号, 线内坐标)"""
+        lengths = ends - starts
+        pos = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths - starts, lengths)
+        return np.repeat(lines, lengths), pos
+
+    @staticmethod
+    def _prefix(values, pos, lines, starts, ends):
+        """一维序列上 v、坐标·v、v² 的前缀和 (n+1, 3, C)，连同线段在序列中的位置一起返回"""
+        values = values.astype(np.int64)
+        table = np.zeros((len(values) + 1, 3, values.shape[1]), dtype=np.int64)
+        np.cumsum(values, axis=0, out=table[1:, 0])
+        np.cumsum(values * pos[:, None], axis=0, out=table[1:, 1])
+        np.cumsum(values * values, axis=0, out=table[1:, 2])
+        lengths = ends - starts
+        return lines, np.cumsum(lengths) - lengths - starts, table
+
+    @staticmethod
+    def _segment(index, line, start, end):
+        """第 line 行（列）上 [start, end) 段的 (Σv, Σ坐标·v, Σv²)，返回 (3, K, C)"""
+        lines, bases, table = index
+        base = bases[np.searchsorted(lines, line)]
+        return (table[base + end] - table[base + start]).swapaxes(0, 1).astype(np.float64)
+
+    def moments(self, boxes):
+        """
+        每个矩形边框像素的统计量，坐标相对矩形中心
+
+        参数:
+            boxes: (K, 4) 矩形 (left, top, right, bottom)，越界部分会被裁剪；
+                四条边须落在建表时的行段、列段上（通常就是建表用的 boxes）
+
+        返回:
+            dict: boxes（裁剪后的矩形）、n (K,) 像素数、sum / sum_sq / sum_x / sum_y (K, C)
+                分别为 Σv、Σv²、Σ(x-cx)·v、Σ(y-cy)·v，以及 center_x / center_y (K,)
+        """
+        h, w = self.shape
+        boxes = _clip_boxes(boxes, w, h)
+        nonempty = (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])
+        # 空矩形改查建表时保留的 (0, 0, 0, 1)，四条边都是长度为 0 的段，结果最后清零
+        left, top, right, bottom = np.where(nonempty[:, None], boxes, [0, 0, 0, 1]).T
+        center_x, center_y = (left + right - 1) / 2, (top + bottom - 1) / 2
+
+        top_edge = self._segment(self._rows, top, left, right)
+        bottom_edge = self._segment(self._rows, bottom - 1, left, right)
+        left_edge = self._segment(self._cols, left, top, bottom)
+        right_edge = self._segment(self._cols, np.maximum(right - 1, 0), top, bottom)
+        edges = top_edge + bottom_edge + left_edge + right_edge
+
+        cx, cy = center_x[:, None], center_y[:, None]
+        sum_x = (top_edge[1] + bottom_edge[1] - cx * (top_edge[0] + bottom_edge[0])
+                 + (left[:, None] - cx) * left_edge[0] + (right[:, None] - 1 - cx) * right_edge[0])
+        sum_y = ((top[:, None] - cy) * top_edge[0] + (bottom[:, None] - 1 - cy) * bottom_edge[0]
+                 + left_edge[1] + right_edge[1] - cy * (left_edge[0] + right_edge[0]))
+
+        keep = nonempty[:, None]
+        return {
+            'boxes': boxes,
+            'n': np.where(nonempty, 2 * (right - left + bottom - top), 0),
+            'sum': np.where(keep, edges[0], 0),
+            'sum_sq': np.where(keep, edges[2], 0),
+            'sum_x': np.where(keep, sum_x, 0),
+            'sum_y': np.where(keep, sum_y, 0),
+            'center_x': center_x,
+            'center_y': center_y,
+        }
+
+    def mean(self, boxes):
+        """(K, C) 边框平均色；空矩形为 nan"""
+        m = self.moments(boxes)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return m['sum'] / m['n'][:, None]
+
+    def variance(self, boxes):
+        """(K, C) 边框颜色的方差；空矩形为 nan"""
+        m = self.moments(boxes)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = m['sum'] / m['n'][:, None]
+            return np.maximum(m['sum_sq'] / m['n'][:, None] - mean * mean, 0)
+
+    def plane_fit(self, boxes):
+        """
+        对每个矩形的边框像素按通道最小二乘拟合平面（与 polynomial_terms(degree=1) 上的 lstsq 结果相同）
+
+        坐标取相对矩形中心时，边框上 Σx、Σy、Σxy 都为 0，法方程是对角的，
+        系数与残差平方和都可以直接由 moments 的结果写出。
+
+        返回:
+            (coef, residual, center_y, center_x, scale): coef 为 (K, 3, C)，对应 1、(x-cx)/scale、(y-cy)/scale；
+            residual 为 (K,) 拟合残差的均方根；宽或高不足 2 像素的矩形残差为 inf
+        """
+        m = self.moments(boxes)
+        left, top, right, bottom = m['boxes'].T
+        width, height = right - left, bottom - top
+        scale = np.maximum(np.maximum(width, height), 1) / 2
+        valid = (width >= 2) & (height >= 2)
+
+        n = np.maximum(m['n'], 1).astype(np.float64)
+        # 边框上 Σ(x-cx)² 与 Σ(y-cy)²：两条横边各 width 个、两条竖边各 height 个
+        sum_xx = width * (width ** 2 - 1) / 6 + height * (width - 1) ** 2 / 2
+        sum_yy = height * (height ** 2 - 1) / 6 + width * (height - 1) ** 2 / 2
+        sum_xx, sum_yy = np.maximum(sum_xx, 1)[:, None], np.maximum(sum_yy, 1)[:, None]
+
+        coef = np.stack([m['sum'] / n[:, None],
+                         m['sum_x'] / sum_xx * scale[:, None],
+                         m['sum_y'] / sum_yy * scale[:, None]], axis=1)
+        sse = (m['sum_sq'] - m['sum'] ** 2 / n[:, None]
+               - m['sum_x'] ** 2 / sum_xx - m['sum_y'] ** 2 / sum_yy).sum(axis=1)
+        residual = np.sqrt(np.maximum(sse, 0) / (n * coef.shape[2]))
+        coef[~valid] = 0
+        residual[~valid] = np.inf
+        return coef, residual, m['center_y'], m['center_x'], scale
+
 
 def compute_edge_average_color(image_cv, left, top, right, bottom):
     """
     计算边缘的平均颜色。
+    裁剪后宽或高为 0 的矩形没有边框像素，返回白色。
+    多个矩形请用 BorderSums(image_cv, boxes).mean(boxes)。
     """
-    left, top, right, bottom = round(left), round(top), round(right), round(bottom)
-    
-    h, w, _ = image_cv.shape
-    left = max(0, left); top = max(0, top)
-    right = min(w, right); bottom = min(h, bottom)
-
-    top_edge = image_cv[top:top+1, left:right]
-    bottom_edge = image_cv[bottom-1:bottom, left:right]
-    left_edge = image_cv[top:bottom, left:left+1]
-    right_edge = image_cv[top:bottom, right-1:right]
-    
-    edges = [top_edge, bottom_edge, left_edge, right_edge]
-    valid_edges = [e.reshape(-1, 3) for e in edges if e.size > 0]
-    
-    if not valid_edges:
+    box = [[left, top, right, bottom]]
+    mean = BorderSums(image_cv, box).mean(box)[0]
+    if np.isnan(mean).any():
         return np.array([255, 255, 255])
+    return mean.astype(np.uint8).tolist()
 
-    flatten_points = np.concatenate(valid_edges, axis=0)
-    average_color = np.mean(flatten_points, axis=0)
-    average_color = average_color.astype(np.uint8).tolist()
 
-    return average_color
+def polynomial_terms(rows, cols, degree=1):
+    """
+    二元多项式的设计矩阵，每行为 1, x, y（degree=2 时再加 x², xy, y²）。
+    rows、cols 应先归一化到 [-1, 1] 附近，避免高次项数值过大。
+    """
+    rows = np.asarray(rows, dtype=np.float64)
+    cols = np.asarray(cols, dtype=np.float64)
+    terms = [np.ones_like(rows), cols, rows]
+    if degree >= 2:
+        terms += [cols * cols, cols * rows, rows * rows]
+    return np.stack(terms, axis=-1)
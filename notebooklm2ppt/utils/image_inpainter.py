@@ -1,10 +1,9 @@
 # from pyinpaint import Inpaint
 import numpy as np
-from skimage.restoration import inpaint
 from PIL import Image
-from .edge_diversity import compute_edge_diversity_numpy, compute_edge_average_color
-import math
-from .inpaint_methods import inpaint_manual, inpaint_numpy_onion, inpaint_scipy_griddata
+from .edge_diversity import compute_edge_diversity_pages, compute_edge_average_color, GRADIENT_MAX_RESIDUAL
+from .inpaint_plan import get_inpaint_plan
+from .watermark_detector import WatermarkDetector
 
 
 INPAINT_METHODS = [
@@ -33,13 +32,41 @@ INPAINT_METHODS = [
         'name': '渐变过渡插值', # 解释“网格插值”的效果
         'description': '计算平滑的曲面过渡，适合带有渐变的背景'
     },
+    {
+        'id': 'plane_fit',
+        'name': '渐变曲面拟合',
+        'description': '用周围像素拟合平面或二次曲面，适合线性、径向渐变背景，速度快且结果稳定'
+    },
     {
         'id': 'skimage',
         'name': '双调和光影修补', # 给 Biharmonic 一个听起来高级的名字
-        'description': '计算量大，速度较慢，但能更好保持光影连续性'
+        'description': '能更好保持光影连续性，首页需预计算，之后各页速度较快'
+    },
+    {
+        'id': 'patchmatch',
+        'name': '纹理合成修补',
+        'description': '从周围复制相似的纹理块，适合照片、花纹等有纹理的背景，速度较慢'
+    },
+    {
+        'id': 'auto',
+        'name': '自动选择',
+        'description': '逐页判断背景类型，选用能达到效果的最快方法：纯色直接填充、渐变曲面拟合、平滑背景双调和、纹理背景纹理合成'
     },
 ]
 
+# auto 方法：背景类型 -> 修复方法（纯色在 _resolve_methods 中改为直接填充）
+AUTO_METHODS = {
+    'gradient': 'plane_fit',
+    'smooth': 'skimage',
+    'textured': 'patchmatch',
+}
+# 相邻像素差的均方根低于该值：背景平滑变化，没有需要复制的纹理
+AUTO_SMOOTH_ROUGHNESS = 6
+# 相邻像素差与拟合残差之比高于该值：起伏以白噪声为主，纹理合成也复制不出什么，按渐变处理
+AUTO_NOISE_RATIO = 1.2
+# auto 上一页的背景类型：只在选择变化时打印，长文档不会每页刷屏
+_last_auto_kind = None
+
 METHOD_ID_TO_NAME = {m['id']: m['name'] for m in INPAINT_METHODS}
 METHOD_NAME_TO_ID = {m['name']: m['id'] for m in INPAINT_METHODS}
 
@@ -62,56 +89,223 @@ def get_method_name_from_id(method_id):
 
 
 def inpaint_image(image_path, output_path, inpaint_method='skimage'):
-    inpaint_method = get_method_id(inpaint_method)
+    """修复单张图片文件：解码后只保留一份可写的像素数组，原地修复，再直接从它编码保存"""
+    with Image.open(image_path) as image:
+        image_array = np.array(image)
+    inpaint_array(image_array, inpaint_method=inpaint_method)
+    Image.fromarray(image_array).save(output_path)
+
+
+# 修复时裁剪的 ROI 在水印矩形外额外保留的像素，需大于各方法内部使用的邻域
+ROI_PAD = 8
+# PatchMatch 要在水印外一圈（band 加图块半径）里取源图块
+PATCHMATCH_ROI_PAD = 40
+
+
+def inpaint_array(image_defect, inpaint_method='skimage', detector=None):
+    """
+    在内存中修复水印，输入输出均为 (H, W, 3) uint8 数组
+    
+    只裁剪水印周围的 ROI 参与计算，结果写回传入的数组（原地修改），
+    因此传入 np.memmap 等大图时，内存开销也只与水印区域大小有关。
+    未检测到水印时原样返回。
+    """
+    inpaint_arrays([image_defect], inpaint_method=inpaint_method, detector=detector)
+    return image_defect
+
+
+def inpaint_arrays(images, inpaint_method='skimage', detector=None, glyph_mask=True):
+    """
+    批量修复多页图片的水印，每页为 (H, W, 3) uint8 数组，结果原地写回
     
-    image = Image.open(image_path)
-    image_defect = np.array(image)
+    水印位置由 WatermarkDetector 逐页检测，未检测到水印的页面跳过。
+    尺寸与水印位置都相同的页面，把 ROI 叠成 (N, h, w, 3) 一起修复，
+    修复计划只查找一次，矩阵运算也只调用一次，省去逐页的大量小数组操作。
+    只有一页时直接在该页的 ROI 视图上原地修复，不复制任何整页或 ROI 数据；
+    各方法的浮点临时数组也只有 ROI 大小。
     
+    参数:
+        images: 图片数组列表
+        inpaint_method: 修复方法
+        detector: WatermarkDetector 实例；同一文档应复用同一个实例，以便缓存水印位置与遮罩
+        glyph_mask: 只修复水印笔画覆盖的像素（默认）；False 时修复整个水印矩形
     
-    # [{\"width\":240,\"top\":1530,\"height\":65,\"left\":2620}]
-    r1,r2,c1,c2 = 1536,1598,2627,2863
+    返回:
+        list: 每页的水印矩形 (r1, r2, c1, c2)，未检测到水印的页面为 None
+    """
+    inpaint_method = get_method_id(inpaint_method)
+    if detector is None:
+        detector = WatermarkDetector()
+
+    rects = []
+    groups = {}
+    for image in images:
+        rect = detector.locate(image)
+        rects.append(rect)
+        if rect is not None:
+            groups.setdefault((image.shape[:2], rect), []).append(image)
 
-    old_width, old_height = 2867,1600
+    for (image_shape, rect), group in groups.items():
+        # 先在最小的 ROI 上逐页确定方法（是否直接填充、auto 的选择），再按各方法需要的边距裁剪
+        rois, mask, window, local_rect = _crop_rois(group, image_shape, rect, ROI_PAD, detector, glyph_mask)
+        methods, fill_colors = _resolve_methods(rois, mask, *local_rect, inpaint_method)
+        by_pad = {}
+        for i, method in enumerate(methods):
+            by_pad.setdefault(PATCHMATCH_ROI_PAD if method == 'patchmatch' else ROI_PAD, []).append(i)
+        for pad, pages in by_pad.items():
+            if pad != ROI_PAD or len(pages) != len(group):
+                rois, mask, window, local_rect = _crop_rois([group[i] for i in pages], image_shape, rect,
+                                                            pad, detector, glyph_mask)
+            _inpaint_rois(rois, mask, *local_rect, [methods[i] for i in pages], [fill_colors[i] for i in pages])
+            if len(pages) > 1:
+                y1, y2, x1, x2 = window
+                for i, roi in zip(pages, rois):
+                    group[i][y1:y2, x1:x2] = roi
+    return rects
 
-    image_width, image_height = image_defect.shape[1], image_defect.shape[0]
-    ratio = image_width / old_width
 
-    assert abs(ratio - (image_height / old_height)) < 0.01, "图片比例不对，无法修复"
+def _crop_rois(group, image_shape, rect, pad, detector, glyph_mask):
+    """
+    按边距裁剪一组页面的水印 ROI
 
-    r1 = math.floor(r1 * ratio)
-    r2 = math.ceil(r2 * ratio)
-    c1 = math.floor(c1 * ratio)
-    c2 = math.ceil(c2 * ratio)
-    if inpaint_method =='skimage':
-        dtype = bool
-        fill_val = True
+    返回:
+        (rois, mask, window, local_rect): rois 为 (N, h, w, 3)，只有一页时是原图的视图，
+        多页时是副本，需按 window (y1, y2, x1, x2) 写回；local_rect 为水印矩形在 ROI 内的坐标
+    """
+    image_height, image_width = image_shape
+    r1, r2, c1, c2 = rect
+    y1, y2 = max(0, r1 - pad), min(image_height, r2 + pad)
+    x1, x2 = max(0, c1 - pad), min(image_width, c2 + pad)
+    if len(group) == 1:
+        rois = group[0][None, y1:y2, x1:x2]
     else:
-        dtype = np.uint8
-        fill_val = 255
+        rois = np.stack([image[y1:y2, x1:x2] for image in group])
+    mask = np.zeros(rois.shape[1:3], dtype=bool)
+    if glyph_mask:
+        mask[r1 - y1:r2 - y1, c1 - x1:c2 - x1] = detector.glyph_mask(rect)
+    else:
+        mask[r1 - y1:r2 - y1, c1 - x1:c2 - x1] = True
+    return rois, mask, (y1, y2, x1, x2), (r1 - y1, r2 - y1, c1 - x1, c2 - x1)
+
 
-    mask = np.zeros(image_defect.shape[:-1], dtype=dtype)
-    mask[r1:r2, c1:c2] = fill_val
+def inpaint_images(image_paths, output_paths, inpaint_method='skimage'):
+    """批量版 inpaint_image：一次读入全部图片，合并修复后逐一保存"""
+    images = [np.array(Image.open(image_path)) for image_path in image_paths]
+    inpaint_arrays(images, inpaint_method=inpaint_method)
+    for image, output_path in zip(images, output_paths):
+        Image.fromarray(image).save(output_path)
 
-    edge_diversity, fill_color = compute_edge_diversity_numpy(image_defect, c1, r1, c2, r2)
 
-    if edge_diversity < 0.1 or inpaint_method == 'background': # 直接填充完事，速度最快
-        print("直接填充",edge_diversity, fill_color)
-        image_defect[r1:r2, c1:c2] = fill_color
-        image_result = image_defect
-    elif inpaint_method == 'skimage': # 速度最慢, 效果也一般
-        image_result = inpaint.inpaint_biharmonic(image_defect, mask, channel_axis=-1)
-        image_result = (image_result*255).astype("uint8")
+def classify_backgrounds(rois, mask):
+    """
+    按遮罩外一圈已知像素的统计量，判断每个 ROI 的背景类型（供 auto 方法使用）
+
+    - 多项式拟合残差小：线性/径向渐变，或纯色加轻微噪声 -> 'gradient'
+    - 残差大但相邻像素差小：大尺度的平滑起伏 -> 'smooth'
+    - 相邻像素差大：有纹理 -> 'textured'；若相邻差明显大于残差，说明只是白噪声 -> 'gradient'
+
+    阈值是在合成背景（带噪纯色、线性/径向渐变、不同周期的正弦、条纹、棋盘格、强噪声）上
+    比较各方法误差后定的，每一类都对应误差最小或与最小值相当、且最快的方法。
+
+    参数:
+        rois: (N, h, w, 3) 图片数组
+        mask: (h, w) 布尔遮罩
+
+    返回:
+        list: 每个 ROI 的背景类型
+    """
+    residual, roughness = get_inpaint_plan('plane_fit', mask).ring_statistics(rois)
+    kinds = []
+    for page_residual, page_roughness in zip(residual, roughness):
+        if page_residual < GRADIENT_MAX_RESIDUAL:
+            kinds.append('gradient')
+        elif page_roughness < AUTO_SMOOTH_ROUGHNESS:
+            kinds.append('smooth')
+        elif page_roughness > AUTO_NOISE_RATIO * page_residual:
+            kinds.append('gradient')
+        else:
+            kinds.append('textured')
+    return kinds
+
+
+def _resolve_methods(rois, mask, r1, r2, c1, c2, inpaint_method):
+    """
+    逐页确定一批 ROI (N, h, w, 3) 实际使用的修复方法
+
+    [r1:r2, c1:c2] 为水印矩形，用它的边缘统计背景颜色；边缘颜色足够一致的页面直接填充（'background'）。
+    inpaint_method 为 'auto' 时，其余页面按背景类型选择方法。
+
+    返回:
+        (methods, fill_colors): 每页的方法 ID 与边缘主色
+    """
+    methods = []
+    fill_colors = []
+    stats = compute_edge_diversity_pages(rois, c1, r1, c2, r2)
+    for edge_diversity, fill_color in stats:
+        if edge_diversity < 0.1 or inpaint_method == 'background': # 直接填充完事，速度最快
+            print("直接填充",edge_diversity, fill_color)
+            methods.append('background')
+        else:
+            methods.append(inpaint_method)
+        fill_colors.append(fill_color)
+
+    if inpaint_method == 'auto':
+        batch = [i for i, method in enumerate(methods) if method == 'auto']
+        if batch:
+            for i, kind in zip(batch, classify_backgrounds(rois[batch], mask)):
+                _report_auto_choice(kind)
+                methods[i] = AUTO_METHODS[kind]
+    return methods, fill_colors
+
+
+def _report_auto_choice(kind):
+    """auto 的选择与上一页不同时才打印"""
+    global _last_auto_kind
+    if kind != _last_auto_kind:
+        print("自动选择", kind, AUTO_METHODS[kind])
+        _last_auto_kind = kind
+
+
+def _inpaint_rois(rois, mask, r1, r2, c1, c2, methods, fill_colors):
+    """
+    按 _resolve_methods 选定的方法修复一批 ROI (N, h, w, 3) 中 mask 标出的像素，结果原地写回 rois
+
+    选中同一方法的页面一起批量修复。
+    """
+    groups = {}
+    for i, (method, fill_color) in enumerate(zip(methods, fill_colors)):
+        if method == 'background':
+            rois[i][mask] = fill_color
+        else:
+            groups.setdefault(method, ([], []))
+            groups[method][0].append(i)
+            groups[method][1].append(fill_color)
+
+    for method, (batch, batch_colors) in groups.items():
+        # 整批都要修复时直接在 rois 上原地修复；否则取出子批，修完再写回
+        batch_rois = rois if len(batch) == len(rois) else rois[batch]
+        _apply_method(batch_rois, mask, r1, r2, c1, c2, method, batch_colors)
+        if batch_rois is not rois:
+            rois[batch] = batch_rois
+    return rois
+
+
+def _apply_method(batch_rois, mask, r1, r2, c1, c2, inpaint_method, fill_colors):
+    """用指定方法原地修复一批 ROI，fill_colors 为各页边缘的主色"""
+    if inpaint_method == 'skimage': # 渐变最自然；矩阵分解按遮罩缓存后，速度与平滑类方法相当
+        get_inpaint_plan('biharmonic', mask).apply(batch_rois, out=batch_rois)
     elif inpaint_method == 'onion':  # 效果一般，效果还行
-        image_result = inpaint_numpy_onion(image_defect, mask)
+        get_inpaint_plan('onion', mask).apply(batch_rois, out=batch_rois)
     elif inpaint_method == 'griddata': # 跟onion差不多
-        image_result = inpaint_scipy_griddata(image_defect, mask)
+        get_inpaint_plan('griddata', mask).apply(batch_rois, out=batch_rois)
+    elif inpaint_method == 'plane_fit': # 渐变背景首选，比 griddata 快且结果确定
+        get_inpaint_plan('plane_fit', mask).apply(batch_rois, out=batch_rois)
+    elif inpaint_method == 'patchmatch': # 纹理背景效果最好，逐页搜索，最慢
+        get_inpaint_plan('patchmatch', mask).apply(batch_rois, out=batch_rois)
     elif inpaint_method == 'background_smooth': # 速度第二快，也平滑
-        image_result = inpaint_manual(image_defect, mask, fill_color, max_iter=100)
+        get_inpaint_plan('pyramid_smooth', mask, max_iter=100).apply(batch_rois, np.array(fill_colors), out=batch_rois)
     elif inpaint_method == 'edge_mean_smooth':
-        fill_color = compute_edge_average_color(image_defect, c1, r1, c2, r2)
-        image_result = inpaint_manual(image_defect, mask, fill_color, max_iter=100)
+        fill_colors = [compute_edge_average_color(roi, c1, r1, c2, r2) for roi in batch_rois]
+        get_inpaint_plan('pyramid_smooth', mask, max_iter=100).apply(batch_rois, np.array(fill_colors), out=batch_rois)
     else:
         raise ValueError(f"Unknown inpaint method: {inpaint_method}")
-
-
-    Image.fromarray(image_result).save(output_path)
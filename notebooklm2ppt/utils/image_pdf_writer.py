@@ -0,0 +1,150 @@
+"""逐页写出的图片 PDF 生成器：常驻内存只有一页的压缩数据"""
+
+import struct
+import zlib
+from PIL import Image
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def read_png_passthrough(path):
+    """
+    读取可直接嵌入 PDF 的 PNG 压缩数据（不解码像素）
+
+    PNG 的 IDAT 数据本身就是带行过滤器的 zlib 流，
+    与 PDF 的 FlateDecode + /Predictor 15 完全兼容，可原样写入。
+    仅支持 8 位、非隔行的灰度或 RGB 图片。
+
+    参数：
+        path: PNG 文件路径
+
+    返回：
+        tuple 或 None: (width, height, colors, idat_bytes)，不支持时为 None
+    """
+    with open(path, 'rb') as f:
+        if f.read(8) != PNG_SIGNATURE:
+            return None
+        idat = []
+        header = None
+        while True:
+            chunk_head = f.read(8)
+            if len(chunk_head) < 8:
+                return None
+            length, chunk_type = struct.unpack('>I4s', chunk_head)
+            data = f.read(length)
+            f.read(4)  # CRC
+            if chunk_type == b'IHDR':
+                header = struct.unpack('>IIBBBBB', data)
+                width, height, bit_depth, color_type, _, _, interlace = header
+                if bit_depth != 8 or interlace != 0 or color_type not in (0, 2):
+                    return None
+            elif chunk_type == b'IDAT':
+                idat.append(data)
+            elif chunk_type == b'IEND':
+                break
+    if header is None or not idat:
+        return None
+    colors = 1 if header[3] == 0 else 3
+    return header[0], header[1], colors, b''.join(idat)
+
+
+class ImagePdfWriter:
+    """
+    逐页追加图片并直接写入文件的最小 PDF 写出器
+
+    PNG（8 位灰度/RGB）与 JPEG 的压缩数据原样写入，其余格式解码后重新压缩。
+    每页写完即落盘，只在内存中保留各对象的偏移量。
+    """
+
+    def __init__(self, output_pdf):
+        self.file = open(output_pdf, 'wb')
+        self.offsets = {}
+        self.page_ids = []
+        # 1 号对象为 Catalog，2 号对象为 Pages，最后写出
+        self.next_id = 3
+        self.file.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def _write_object(self, obj_id, body, stream=None):
+        self.offsets[obj_id] = self.file.tell()
+        self.file.write(f'{obj_id} 0 obj\n'.encode('ascii'))
+        self.file.write(body)
+        if stream is not None:
+            self.file.write(b'\nstream\n')
+            self.file.write(stream)
+            self.file.write(b'\nendstream')
+        self.file.write(b'\nendobj\n')
+
+    def _alloc(self):
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def _image_object(self, image_path):
+        """返回 (width, height, 图片字典, 压缩数据)"""
+        passthrough = read_png_passthrough(image_path)
+        if passthrough is not None:
+            width, height, colors, data = passthrough
+            colorspace = '/DeviceGray' if colors == 1 else '/DeviceRGB'
+            params = (f'/Filter /FlateDecode /DecodeParms << /Predictor 15 /Colors {colors} '
+                      f'/BitsPerComponent 8 /Columns {width} >>')
+            return width, height, colorspace, params, data
+
+        with Image.open(image_path) as img:
+            if img.format == 'JPEG' and img.mode in ('RGB', 'L'):
+                width, height = img.size
+                colorspace = '/DeviceGray' if img.mode == 'L' else '/DeviceRGB'
+                with open(image_path, 'rb') as f:
+                    data = f.read()
+                return width, height, colorspace, '/Filter /DCTDecode', data
+
+            # 其他格式：解码为 RGB 后重新压缩
+            img = img.convert('RGB')
+            width, height = img.size
+            data = zlib.compress(img.tobytes())
+        return width, height, '/DeviceRGB', '/Filter /FlateDecode', data
+
+    def add_image_page(self, image_path):
+        """追加一页，页面尺寸等于图片像素尺寸（72 DPI）"""
+        width, height, colorspace, params, data = self._image_object(image_path)
+
+        image_id = self._alloc()
+        self._write_object(image_id, (
+            f'<< /Type /XObject /Subtype /Image /Width {width} /Height {height} '
+            f'/ColorSpace {colorspace} /BitsPerComponent 8 {params} /Length {len(data)} >>'
+        ).encode('ascii'), data)
+
+        content = f'q {width} 0 0 {height} 0 0 cm /Im0 Do Q'.encode('ascii')
+        content_id = self._alloc()
+        self._write_object(content_id, f'<< /Length {len(content)} >>'.encode('ascii'), content)
+
+        page_id = self._alloc()
+        self._write_object(page_id, (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width} {height}] '
+            f'/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>'
+        ).encode('ascii'))
+        self.page_ids.append(page_id)
+
+    def close(self):
+        """写出页面树、交叉引用表并关闭文件"""
+        kids = ' '.join(f'{page_id} 0 R' for page_id in self.page_ids)
+        self._write_object(2, f'<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>'.encode('ascii'))
+        self._write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+
+        xref_offset = self.file.tell()
+        size = self.next_id
+        lines = [f'xref\n0 {size}\n', '0000000000 65535 f \n']
+        for obj_id in range(1, size):
+            lines.append(f'{self.offsets[obj_id]:010d} 00000 n \n')
+        self.file.write(''.join(lines).encode('ascii'))
+        self.file.write(f'trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n'.encode('ascii'))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
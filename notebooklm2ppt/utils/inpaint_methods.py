@@ -1,9 +1,13 @@
 import numpy as np
 from scipy.interpolate import griddata
+from .inpaint_plan import OnionPlan
 
 def inpaint_manual(img, mask, fill_color=(255, 255, 255), max_iter=20):
     """
     手动指定颜色的去水印函数
+
+    只把遮罩周围的 ROI 转成浮点数计算，结果原地写回 img 并返回 img，
+    不再为整页分配浮点副本。
     
     参数:
         img: 图片数据 (H, W, 3)
@@ -14,8 +18,6 @@ def inpaint_manual(img, mask, fill_color=(255, 255, 255), max_iter=20):
         max_iter: 边缘平滑次数。0 表示直接填充不平滑；建议 10-20 用于消除锯齿。
     """
     # 1. 格式预处理
-    img_float = img.astype(np.float32)
-    
     # 确保 Mask 是二维
     if mask.ndim == 3: mask = mask[:, :, 0]
     mask = mask > 100 # 二值化
@@ -33,7 +35,7 @@ def inpaint_manual(img, mask, fill_color=(255, 255, 255), max_iter=20):
     y1, y2 = max(0, rows.min()-pad), min(img.shape[0], rows.max()+pad+1)
     x1, x2 = max(0, cols.min()-pad), min(img.shape[1], cols.max()+pad+1)
     
-    img_crop = img_float[y1:y2, x1:x2]
+    img_crop = img[y1:y2, x1:x2].astype(np.float32)
     mask_crop = mask_dilated[y1:y2, x1:x2]
     
     # --- 【步骤 B】暴力填充指定颜色 ---
@@ -65,9 +67,9 @@ def inpaint_manual(img, mask, fill_color=(255, 255, 255), max_iter=20):
             np.copyto(center_view, avg, where=roi_mask)
 
     # 3. 放回原图
-    img_float[y1:y2, x1:x2] = img_crop
+    img[y1:y2, x1:x2] = np.clip(img_crop, 0, 255)
     
-    return np.clip(img_float, 0, 255).astype(np.uint8)
+    return img
 
 
 def inpaint_numpy_onion(img, mask):
@@ -76,184 +78,23 @@ def inpaint_numpy_onion(img, mask):
     核心原理：每次只修复 Mask 最边缘的一圈像素，参考其周围已知的像素，
     修完一圈后，这一圈变回已知像素，继续修下一圈。
     这样能把背景的线条和渐变“长”进去，而不是糊成一团。
+
+    每个像素属于第几圈等于它到最近已知像素的曼哈顿距离，
+    用一次距离变换即可排好全部顺序，具体实现见 OnionPlan。
+    只在遮罩外扩一圈的 ROI 上计算，结果原地写回 img 并返回 img。
     """
-    # 1. 预处理
-    # 转为 float 方便计算
-    img = img.astype(np.float32)
-    
-    # 确保 mask 是 0/1 的二维矩阵 (0=背景, 1=水印)
+    # 确保 mask 是二维布尔矩阵 (False=背景, True=水印)
     if mask.ndim == 3: mask = mask[:, :, 0]
-    mask = (mask > 100).astype(np.uint8)
-    
-    # 提取 ROI (只处理水印周围，加速运算)
+    mask = mask > 100
     rows, cols = np.where(mask)
-    if len(rows) == 0: return img.astype(np.uint8)
-    
-    pad = 2
-    y1, y2 = max(0, rows.min()-pad), min(img.shape[0], rows.max()+pad+1)
-    x1, x2 = max(0, cols.min()-pad), min(img.shape[1], cols.max()+pad+1)
-    
-    img_crop = img[y1:y2, x1:x2]
-    mask_crop = mask[y1:y2, x1:x2]
-    
-    # remaining_mask 记录还需要修的区域，一开始等于 mask_crop
-    remaining_mask = mask_crop.copy()
-    
-    # 2. 核心循环：只要还有没修完的地方，就一直剥洋葱
-    # 为了防止死循环（孤岛像素），设置最大步数
-    max_steps = max(img_crop.shape) 
-    
-    # 定义 3x3 邻域的切片偏移量
-    offsets = [
-        (-1, -1), (-1, 0), (-1, 1),
-        ( 0, -1),          ( 0, 1),
-        ( 1, -1), ( 1, 0), ( 1, 1)
-    ]
-    
-    for step in range(max_steps):
-        # 如果全都修完了，退出
-        if np.sum(remaining_mask) == 0:
-            break
-            
-        # --- A. 寻找当前的“边缘层” ---
-        # 逻辑：像素本身是需要修的(1)，但它上下左右至少有一个像素是已知的(0)
-        # 这一步可以用形态学腐蚀来实现：边缘 = Mask - 腐蚀后的Mask
-        
-        # 简单的 numpy 实现腐蚀 (Erosion)
-        # 只有当周围全是 1 时，中心才是 1；只要有一个邻居是 0，中心变 0
-        # 这样最外圈的 1 就会变成 0，剩下的 core 就是内层
-        
-        # 利用切片快速判断邻域是否全为 1
-        eroded = remaining_mask.copy()
-        # 只要有一个方向是0，就腐蚀掉
-        # 也就是：up & down & left & right
-        up    = remaining_mask[1:]
-        down  = remaining_mask[:-1]
-        left  = remaining_mask[:, 1:]
-        right = remaining_mask[:, :-1]
-        
-        # 为了形状匹配，需要 pad 回去或者切片操作
-        # 这里用更简单的逻辑：
-        # 构造一个 sum_neighbors，计算每个像素周围有几个 1
-        # 如果周围 1 的数量 < 8 (对于3x3)，说明它挨着 0，它就是边缘
-        
-        # 稍微麻烦一点但纯 numpy 的方法：
-        is_border = np.zeros_like(remaining_mask, dtype=bool)
-        
-        # 计算 Mask 区域内，每一个像素周围 "已知像素(0)" 的数量
-        # 我们利用 convolution 的思想
-        # known_mask: 0=待修, 1=已知 (注意这里反转一下逻辑方便求和)
-        known_mask = 1 - remaining_mask
-        
-        # 或者是更直接的方法：
-        # 边缘 = Mask AND (NOT 腐蚀Mask)
-        # 我们手动实现一次腐蚀
-        m_pad = np.pad(remaining_mask, 1, mode='constant', constant_values=1)
-        # 检查上下左右，如果全是1，则保持1（核心），否则是边缘
-        sub_up    = m_pad[:-2, 1:-1]
-        sub_down  = m_pad[2:,  1:-1]
-        sub_left  = m_pad[1:-1, :-2]
-        sub_right = m_pad[1:-1, 2:]
-        
-        core = remaining_mask & sub_up & sub_down & sub_left & sub_right
-        border_mask = remaining_mask & (~core)
-        
-        # 如果这一轮找不到边缘（比如全是孤岛），强制结束防止死循环
-        if np.sum(border_mask) == 0:
-            # 最后的兜底：剩下的直接全填均值
-            pass_mask = remaining_mask.astype(bool)
-            if np.sum(pass_mask) > 0:
-                # 找全局已知像素的均值
-                valid_pixels = img_crop[~remaining_mask.astype(bool)]
-                if len(valid_pixels) > 0:
-                    fill_val = np.mean(valid_pixels, axis=0)
-                else:
-                    fill_val = np.array([255, 255, 255])
-                img_crop[pass_mask] = fill_val
-            break
-            
-        # --- B. 修复边缘层 ---
-        # 对于 border_mask 中的每一个像素，计算它周围 "已知像素" 的加权平均
-        
-        # 获取边缘像素坐标
-        border_y, border_x = np.where(border_mask)
-        
-        # 为了加速，我们不搞复杂的加权，直接算周围已知像素的均值
-        # 这一步必须向量化，否则慢死
-        
-        # 累加器
-        sum_color = np.zeros((len(border_y), 3), dtype=np.float32)
-        count_valid = np.zeros((len(border_y), 1), dtype=np.float32)
-        
-        for dy, dx in offsets:
-            ny, nx = border_y + dy, border_x + dx
-            
-            # 越界检查
-            valid_idx = (ny >= 0) & (ny < img_crop.shape[0]) & \
-                        (nx >= 0) & (nx < img_crop.shape[1])
-            
-            # 只取 valid_idx 为 True 的部分进行后续判断
-            # 且该邻居必须是 "已知像素" (remaining_mask[ny, nx] == 0)
-            
-            # 这里的 numpy 索引比较绕，我们换个思路：
-            # 直接全图卷积计算 Sum(Color * Known) / Sum(Known)
-            pass
-        
-        # === 简易向量化替代方案 ===
-        # 上面的 loop 比较难写，我们用全图移位操作
-        # 1. 准备 Known Mask
-        known = (1 - remaining_mask).astype(np.float32)
-        known_3d = known[:, :, np.newaxis]
-        
-        # 2. 准备 Image * Known
-        img_known = img_crop * known_3d
-        
-        # 3. 计算邻域总和 (Color) 和 邻域计数 (Weight)
-        # 手动实现 3x3 卷积 (Sum)
-        total_color = np.zeros_like(img_crop)
-        total_weight = np.zeros_like(known_3d)
-        
-        for dy, dx in offsets:
-            # 移位切片
-            # src: [1:-1] based logic
-            # 我们用 pad 方式更简单
-            img_pad = np.pad(img_known, ((1,1),(1,1),(0,0)), 'constant')
-            w_pad   = np.pad(known_3d,  ((1,1),(1,1),(0,0)), 'constant')
-            
-            # 比如 dy=-1, dx=-1，相当于取右下方的像素填到左上
-            # 对应的切片是 [0:-2, 0:-2]
-            # 为了通用性，我们直接 slice
-            
-            sy_start, sy_end = 1+dy, img_pad.shape[0]-1+dy
-            sx_start, sx_end = 1+dx, img_pad.shape[1]-1+dx
-            
-            shifted_img = img_pad[sy_start:sy_end, sx_start:sx_end]
-            shifted_w   = w_pad[sy_start:sy_end, sx_start:sx_end]
-            
-            total_color += shifted_img
-            total_weight += shifted_w
-            
-        # 4. 计算平均值
-        # 避免除以0
-        total_weight[total_weight == 0] = 1.0 
-        avg_color = total_color / total_weight
-        
-        # 5. 只更新 border_mask 区域
-        # 注意：这里我们只把计算出来的 avg_color 填入 border_mask
-        border_bool = border_mask.astype(bool)
-        img_crop[border_bool] = avg_color[border_bool]
-        
-        # --- C. 更新 Mask (剥掉一层) ---
-        # 这一圈修好了，它们变成了下一圈的“已知参考”
-        remaining_mask[border_bool] = 0
-
-    # 3. 放回原图
-    # 记得转回 uint8
-    img[y1:y2, x1:x2] = img_crop
-    
-    return np.clip(img, 0, 255).astype(np.uint8)
-
+    if len(rows) == 0: return img
 
+    # 外扩一圈即可：最近的已知像素一定落在这一圈里，结果与整页计算相同
+    y1, y2 = max(0, rows.min() - 1), min(img.shape[0], rows.max() + 2)
+    x1, x2 = max(0, cols.min() - 1), min(img.shape[1], cols.max() + 2)
+    roi = img[y1:y2, x1:x2]
+    OnionPlan(mask[y1:y2, x1:x2]).apply(roi, out=roi)
+    return img
 
 
 def inpaint_scipy_griddata(img, mask):
@@ -266,16 +107,10 @@ def inpaint_scipy_griddata(img, mask):
     if mask.ndim == 3: mask = mask[:,:,0]
     mask = mask > 0
     
-    # 坐标网格
     h, w = img.shape[:2]
-    y, x = np.mgrid[0:h, 0:w]
-    
-    # 1. 找到所有 "已知像素" (背景) 的坐标和颜色
-    # 为了速度，我们只取 mask 边缘一圈的背景，不用全图背景
-    # 这里为了代码简单，取反 mask
-    known_mask = ~mask
     
-    # 优化：只取 ROI，不然全图计算太慢
+    # 1. 找到 "已知像素" (背景) 的坐标和颜色
+    # 优化：只取 ROI，不然全图计算太慢；坐标也只在 ROI 内生成，不分配整页数组
     rows, cols = np.where(mask)
     if len(rows) == 0: return img
     pad = 5
@@ -0,0 +1,668 @@
+"""
+可复用的修复计划（inpaint plan）
+
+同一文档的每一页尺寸相同、水印位置相同，因此遮罩也相同。
+与遮罩相关的全部预计算（线性算子、三角剖分、重心坐标权重、稀疏矩阵分解）只做一次，
+之后每页只需一次矩阵运算或一次回代求解。
+
+各计划的 apply 既接受单张 (H, W, C) 图片，也接受 (N, H, W, C) 的一批图片：
+整批图片按“像素为行、各页各通道为列”排成矩阵，一次运算即可处理完。
+PatchMatchPlan 的匹配结果取决于页面内容，只能逐页求解。
+"""
+
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import scipy.sparse as sp
+from scipy.fft import dstn
+from scipy.ndimage import distance_transform_cdt, maximum_filter
+from scipy.sparse.linalg import splu
+from scipy.spatial import Delaunay
+from skimage.restoration import inpaint
+from .edge_diversity import polynomial_terms
+
+
+def _to_columns(images, dtype):
+    """(..., H, W, C) -> (H*W, B*C)，每一列是某一页的某个通道"""
+    h, w, c = images.shape[-3:]
+    cols = np.moveaxis(images.reshape(-1, h * w, c), 1, 0).astype(dtype, order='C')
+    return cols.reshape(h * w, -1)
+
+
+def _from_columns(cols, shape):
+    """_to_columns 的逆变换"""
+    h, w, c = shape[-3:]
+    return np.moveaxis(cols.reshape(h * w, -1, c), 0, 1).reshape(shape)
+
+
+def _write_rows(result, idx, values):
+    """把 (len(idx), B*C) 的列格式结果写回 result 中下标为 idx 的像素（result 可以是不连续的视图）"""
+    h, w, c = result.shape[-3:]
+    rows, cols = np.divmod(idx, w)
+    result[..., rows, cols, :] = np.moveaxis(values.reshape(len(idx), -1, c), 0, 1).reshape(
+        result.shape[:-3] + (len(idx), c))
+
+
+def _output(img, out):
+    """
+    apply 的输出数组：out 为 None 时复制一份 img；否则直接写入 out。
+    out 可以就是 img（例如整页上的 ROI 视图），此时原地修复、不再分配整块结果。
+    调用时机须在读完 img 之后。
+    """
+    if out is None:
+        return img.copy()
+    if out is not img:
+        out[...] = img
+    return out
+
+
+class SmoothPlan:
+    """
+    inpaint_manual 的预计算版本：先填充指定颜色，再做 max_iter 次拉普拉斯（Jacobi）平滑
+
+    每次平滑都是线性的，max_iter 次迭代可合并为 x = A^K·x0 + Σ A^t·c。
+    - 遮罩为完整矩形时，A 在 DST-I 基下是对角阵，整段迭代化为一次正变换加一次反变换；
+    - 其他形状的遮罩退化为预先构建的稀疏算子，逐次迭代。
+    """
+
+    def __init__(self, mask, max_iter=100):
+        """
+        参数:
+            mask: 二维布尔遮罩 (H, W)
+            max_iter: 平滑次数，与 inpaint_manual 相同
+        """
+        self.shape = mask.shape
+        self.mask = mask
+        self.max_iter = max_iter
+        h, w = mask.shape
+
+        # 与 inpaint_manual 一致：贴着图片边界的遮罩像素只填色、不参与平滑
+        inner = mask.copy()
+        inner[[0, -1], :] = False
+        inner[:, [0, -1]] = False
+        self.update_idx = np.flatnonzero(inner)
+
+        rows, cols = np.nonzero(mask)
+        self.spectral = False
+        if len(rows) and inner.sum() == mask.sum():
+            r1, r2, c1, c2 = rows.min(), rows.max() + 1, cols.min(), cols.max() + 1
+            self.spectral = (r2 - r1) * (c2 - c1) == len(rows)
+        if self.spectral:
+            self.rect = (r1, r2, c1, c2)
+            m, k = r2 - r1, c2 - c1
+            lam = (np.cos(np.pi * np.arange(1, m + 1) / (m + 1))[:, None] +
+                   np.cos(np.pi * np.arange(1, k + 1) / (k + 1))[None, :]) / 2
+            self.decay = lam ** max_iter
+            # 初值为常数颜色时，其谱系数可预先算好
+            self.init_coef = self.decay * dstn(np.ones((m, k)), type=1, norm='ortho')
+            self.gain = (1 - self.decay) / (1 - lam)
+        else:
+            idx = self.update_idx
+            neighbors = np.stack([idx - w, idx + w, idx - 1, idx + 1], axis=1)
+            self.operator = sp.csr_matrix(
+                (np.full(neighbors.size, 0.25, dtype=np.float32),
+                 (np.repeat(np.arange(len(idx)), 4), neighbors.ravel())),
+                shape=(len(idx), h * w))
+
+    def solve(self, img, init):
+        """
+        平滑求解，返回浮点结果 (..., H, W, C)，遮罩外的像素保持不变
+
+        参数:
+            img: 图片数据 (H, W, C) 或 (N, H, W, C)
+            init: 遮罩内的初值：颜色 (C,) / (N, C)，或与 img 同形状的数组（只取遮罩内的值）
+        """
+        lead = img.shape[:-3]
+        channels = img.shape[-1]
+        init = np.asarray(init, dtype=np.float64)
+        per_pixel = init.ndim == img.ndim
+        if not per_pixel:
+            init = np.broadcast_to(init, lead + (channels,))
+
+        if self.spectral:
+            r1, r2, c1, c2 = self.rect
+            result = img.astype(np.float64)
+            # 遮罩外一圈已知像素对边缘的贡献
+            c = np.zeros(lead + (r2 - r1, c2 - c1, channels))
+            c[..., 0, :, :] += result[..., r1 - 1, c1:c2, :]
+            c[..., -1, :, :] += result[..., r2, c1:c2, :]
+            c[..., :, 0, :] += result[..., r1:r2, c1 - 1, :]
+            c[..., :, -1, :] += result[..., r1:r2, c2, :]
+            c /= 4.0
+            if per_pixel:
+                coef = self.decay[..., None] * dstn(init[..., r1:r2, c1:c2, :], type=1, axes=(-3, -2), norm='ortho')
+            else:
+                coef = self.init_coef[..., None] * init[..., None, None, :]
+            coef += self.gain[..., None] * dstn(c, type=1, axes=(-3, -2), norm='ortho')
+            result[..., r1:r2, c1:c2, :] = dstn(coef, type=1, axes=(-3, -2), norm='ortho')
+            return result
+
+        mask_flat = self.mask.ravel()
+        x = _to_columns(img, np.float32)
+        x[mask_flat] = _to_columns(init, np.float32)[mask_flat] if per_pixel else init.ravel()
+        for _ in range(self.max_iter):
+            x[self.update_idx] = self.operator @ x
+        return _from_columns(x, img.shape)
+
+    def apply(self, img, fill_color, out=None):
+        """
+        修复一张 (H, W, C) 或一批 (N, H, W, C) 图片，返回 uint8 结果
+
+        参数:
+            img: 图片数据，尺寸需与构建计划时的遮罩一致
+            fill_color: 填充颜色 (R, G, B)；批量时可为每页一个颜色 (N, 3)
+            out: 结果写入的数组，可以就是 img（原地修复）；默认返回新数组
+        """
+        filled = self.solve(img, fill_color)
+        result = _output(img, out)
+        result[..., self.mask, :] = np.clip(filled[..., self.mask, :], 0, 255).astype(np.uint8)
+        return result
+
+
+def _downsample(images):
+    """(..., H, W, C) 按 2x2 取均值缩小一半，奇数边先复制边缘补齐"""
+    h, w = images.shape[-3:-1]
+    pad = [(0, 0)] * (images.ndim - 3) + [(0, h % 2), (0, w % 2), (0, 0)]
+    images = np.pad(images, pad, mode='edge')
+    h, w = images.shape[-3:-1]
+    return images.reshape(images.shape[:-3] + (h // 2, 2, w // 2, 2, images.shape[-1])).mean(axis=(-4, -2))
+
+
+class PyramidSmoothPlan:
+    """
+    多分辨率版 SmoothPlan，用于高 DPI 下成倍放大的遮罩
+
+    Jacobi 平滑把颜色传播到距离 d 处需要 O(d²) 次迭代，遮罩放大后固定的 max_iter 就不够了。
+    这里把图片与遮罩按 2x2 逐级缩小，直到遮罩高度不超过 base_size（约为 150 DPI 下水印的高度），
+    在最粗一层按 max_iter 求解；再逐级放大作为下一层的初值，每层只做 refine_iter 次迭代消除块状痕迹。
+    总代价与 ROI 像素数成正比，不同 DPI 下的效果也保持一致。
+    遮罩本身不超过 base_size 时，结果与 SmoothPlan 完全相同。
+    """
+
+    def __init__(self, mask, max_iter=100, refine_iter=20, base_size=64):
+        """
+        参数:
+            mask: 二维布尔遮罩 (H, W)
+            max_iter: 最粗一层的平滑次数
+            refine_iter: 其余各层的平滑次数
+            base_size: 最粗一层遮罩高度的上限（像素）
+        """
+        self.shape = mask.shape
+        self.mask = mask
+        rows = np.flatnonzero(mask.any(axis=1))
+        height = rows[-1] - rows[0] + 1 if len(rows) else 0
+
+        masks = [mask]
+        while height > base_size:
+            m = masks[-1]
+            m = np.pad(m, ((0, m.shape[0] % 2), (0, m.shape[1] % 2)), mode='edge')
+            masks.append(m.reshape(m.shape[0] // 2, 2, m.shape[1] // 2, 2).any(axis=(1, 3)))
+            height = (height + 1) // 2
+        self.plans = [SmoothPlan(m, refine_iter) for m in masks[:-1]] + [SmoothPlan(masks[-1], max_iter)]
+
+    def apply(self, img, fill_color, out=None):
+        """参数与返回值同 SmoothPlan.apply"""
+        images = [img.astype(np.float32)]
+        for _ in self.plans[1:]:
+            images.append(_downsample(images[-1]))
+
+        filled = self.plans[-1].solve(images[-1], fill_color)
+        for plan, image in zip(self.plans[-2::-1], images[-2::-1]):
+            h, w = image.shape[-3:-1]
+            init = np.repeat(np.repeat(filled, 2, axis=-3), 2, axis=-2)[..., :h, :w, :]
+            filled = plan.solve(image, init)
+
+        result = _output(img, out)
+        result[..., self.mask, :] = np.clip(filled[..., self.mask, :], 0, 255).astype(np.uint8)
+        return result
+
+
+class GriddataPlan:
+    """
+    inpaint_scipy_griddata 的预计算版本
+
+    已知像素的采样、Delaunay 三角剖分以及每个待修像素的重心坐标权重只计算一次，
+    组成稀疏插值矩阵；每页只需一次稀疏矩阵乘法。
+    """
+
+    def __init__(self, mask, pad=5, max_points=2000, seed=0):
+        """
+        参数:
+            mask: 二维布尔遮罩 (H, W)
+            pad: 遮罩外参与插值的已知像素范围
+            max_points: 已知像素超过该数量时随机采样（固定种子，结果可复现）
+            seed: 采样使用的随机种子
+        """
+        self.shape = mask.shape
+        h, w = mask.shape
+        rows, cols = np.nonzero(mask)
+        if len(rows) == 0:
+            self.target_idx = np.zeros(0, dtype=np.intp)
+            return
+        y_min, y_max = max(0, rows.min() - pad), min(h, rows.max() + pad)
+        x_min, x_max = max(0, cols.min() - pad), min(w, cols.max() + pad)
+        mask_roi = mask[y_min:y_max, x_min:x_max]
+
+        known_y, known_x = np.nonzero(~mask_roi)
+        if len(known_y) > max_points:
+            idx = np.random.default_rng(seed).choice(len(known_y), max_points, replace=False)
+            known_y, known_x = known_y[idx], known_x[idx]
+        target_y, target_x = np.nonzero(mask_roi)
+
+        points = np.column_stack((known_y, known_x)).astype(np.float64)
+        xi = np.column_stack((target_y, target_x)).astype(np.float64)
+        tri = Delaunay(points)
+        simplex = tri.find_simplex(xi)
+        # 凸包外的像素无法线性插值，保持原样
+        inside = simplex >= 0
+        xi, simplex = xi[inside], simplex[inside]
+        transform = tri.transform[simplex]
+        bary = np.einsum('nij,nj->ni', transform[:, :2], xi - transform[:, 2])
+        weights = np.column_stack((bary, 1 - bary.sum(axis=1)))
+        vertices = tri.simplices[simplex]
+
+        self.source_idx = (known_y + y_min) * w + (known_x + x_min)
+        self.target_idx = (target_y[inside] + y_min) * w + (target_x[inside] + x_min)
+        self.operator = sp.csr_matrix(
+            (weights.ravel(), (np.repeat(np.arange(len(xi)), 3), vertices.ravel())),
+            shape=(len(xi), len(points)))
+
+    def apply(self, img, out=None):
+        """修复一张 (H, W, C) 或一批 (N, H, W, C) 图片；out 的含义同 SmoothPlan.apply"""
+        if len(self.target_idx) == 0:
+            return _output(img, out)
+        h, w, c = img.shape[-3:]
+        values = np.moveaxis(img.reshape(-1, h * w, c)[:, self.source_idx], 0, 1).astype(np.float64)
+        filled = self.operator @ values.reshape(len(self.source_idx), -1)
+        result = _output(img, out)
+        _write_rows(result, self.target_idx, filled)
+        return result
+
+
+class PlaneFitPlan:
+    """
+    多项式拟合修复：对遮罩外一圈已知像素按通道做最小二乘拟合，在遮罩内按闭式求值
+
+    适合线性、径向渐变背景。最小二乘的伪逆与遮罩内的求值矩阵只与遮罩有关，预先算好；
+    每页只需两次小矩阵乘法，结果确定，不像 griddata 那样依赖随机采样和三角剖分。
+    """
+
+    def __init__(self, mask, degree=2, ring=4):
+        """
+        参数:
+            mask: 二维布尔遮罩 (H, W)
+            degree: 多项式次数，1 为平面，2 为二次曲面
+            ring: 参与拟合的已知像素到遮罩的最大曼哈顿距离
+        """
+        self.shape = mask.shape
+        self.mask = mask
+        h, w = mask.shape
+        dist = distance_transform_cdt(~mask, metric='taxicab')
+        self.ring_idx = np.flatnonzero((dist > 0) & (dist <= ring))
+        self.mask_idx = np.flatnonzero(mask)
+
+        center_y, center_x, scale = (h - 1) / 2, (w - 1) / 2, max(h, w) / 2
+        ring_y, ring_x = np.divmod(self.ring_idx, w)
+        mask_y, mask_x = np.divmod(self.mask_idx, w)
+        self.ring_terms = polynomial_terms((ring_y - center_y) / scale, (ring_x - center_x) / scale, degree)
+        self.solver = np.linalg.pinv(self.ring_terms)
+        self.evaluator = polynomial_terms((mask_y - center_y) / scale, (mask_x - center_x) / scale, degree)
+
+        # 环上横向、纵向相邻的像素对，用来估计背景的纹理强度
+        ring_pos = np.full(h * w + w + 1, -1)
+        ring_pos[self.ring_idx] = np.arange(len(self.ring_idx))
+        right = np.where(ring_x < w - 1, ring_pos[self.ring_idx + 1], -1)
+        down = ring_pos[self.ring_idx + w]
+        self.ring_pairs = (np.concatenate([np.flatnonzero(right >= 0), np.flatnonzero(down >= 0)]),
+                           np.concatenate([right[right >= 0], down[down >= 0]]))
+
+    def ring_statistics(self, img):
+        """
+        遮罩外一圈已知像素的统计量，供自动选择修复方法使用
+
+        参数:
+            img: 图片数据 (H, W, C) 或 (N, H, W, C)
+
+        返回:
+            (residual, roughness): 多项式拟合残差的均方根、相邻像素差的均方根，形状为 img 的批量维度
+        """
+        lead, channels = img.shape[:-3], img.shape[-1]
+        if not len(self.ring_idx):
+            return np.zeros(lead), np.zeros(lead)
+        values = _to_columns(img, np.float64)[self.ring_idx]
+        residual = values - self.ring_terms @ (self.solver @ values)
+        first, second = self.ring_pairs
+        difference = values[first] - values[second]
+
+        def rms(a):
+            return np.sqrt((a * a).reshape(len(a), -1, channels).mean(axis=(0, 2))).reshape(lead)
+
+        return rms(residual), rms(difference) if len(first) else np.zeros(lead)
+
+    def apply(self, img, out=None):
+        """修复一张 (H, W, C) 或一批 (N, H, W, C) 图片，返回 uint8 结果；out 的含义同 SmoothPlan.apply"""
+        if not len(self.ring_idx) or not len(self.mask_idx):
+            return _output(img, out)
+        coef = self.solver @ _to_columns(img, np.float64)[self.ring_idx]
+        result = _output(img, out)
+        _write_rows(result, self.mask_idx, np.clip(np.rint(self.evaluator @ coef), 0, 255).astype(np.uint8))
+        return result
+
+
+class BiharmonicPlan:
+    """
+    skimage.restoration.inpaint_biharmonic 的预计算版本
+
+    双调和方程的系数矩阵只取决于遮罩形状，与像素值无关：
+    构建一次稀疏矩阵并做 LU 分解，之后每页、每个通道只需一次回代。
+    """
+
+    # laplace(laplace(δ)) 的 13 点模板：(dy, dx, 系数)
+    STENCIL = [(0, 0, 20.0)] + \
+        [(dy, dx, -8.0) for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1))] + \
+        [(dy, dx, 2.0) for dy, dx in ((-1, -1), (-1, 1), (1, -1), (1, 1))] + \
+        [(dy, dx, 1.0) for dy, dx in ((-2, 0), (2, 0), (0, -2), (0, 2))]
+    RADIUS = 2
+
+    def __init__(self, mask):
+        """
+        参数:
+            mask: 二维布尔遮罩 (H, W)
+        """
+        self.shape = mask.shape
+        self.mask = mask
+        h, w = mask.shape
+        rows, cols = np.nonzero(mask)
+        r = self.RADIUS
+        # 遮罩贴近图片边界时 skimage 会截断模板，这种少见情况直接交给 skimage 处理
+        self.fallback = len(rows) == 0 or rows.min() < r or cols.min() < r or \
+            rows.max() >= h - r or cols.max() >= w - r
+        if self.fallback:
+            return
+
+        n = len(rows)
+        self.mask_idx = rows * w + cols
+        # 全图像素编号 -> 未知量编号，已知像素为 -1
+        unknown_id = np.full(h * w, -1, dtype=np.intp)
+        unknown_id[self.mask_idx] = np.arange(n)
+
+        a_rows, a_cols, a_vals = [], [], []
+        k_rows, k_cols, k_vals = [], [], []
+        for dy, dx, coef in self.STENCIL:
+            neighbor = self.mask_idx + dy * w + dx
+            neighbor_id = unknown_id[neighbor]
+            is_unknown = neighbor_id >= 0
+            a_rows.append(np.flatnonzero(is_unknown))
+            a_cols.append(neighbor_id[is_unknown])
+            a_vals.append(np.full(is_unknown.sum(), coef))
+            # 已知邻居移到右侧：rhs = -Σ coef · 已知像素值
+            k_rows.append(np.flatnonzero(~is_unknown))
+            k_cols.append(neighbor[~is_unknown])
+            k_vals.append(np.full((~is_unknown).sum(), -coef))
+
+        matrix = sp.csc_matrix((np.concatenate(a_vals), (np.concatenate(a_rows), np.concatenate(a_cols))),
+                               shape=(n, n))
+        self.lu = splu(matrix, permc_spec='MMD_ATA')
+        self.rhs_operator = sp.csr_matrix((np.concatenate(k_vals), (np.concatenate(k_rows), np.concatenate(k_cols))),
+                                          shape=(n, h * w))
+
+    def apply(self, img, out=None):
+        """修复一张 (H, W, C) 或一批 (N, H, W, C) uint8 图片，返回 uint8 结果；out 的含义同 SmoothPlan.apply"""
+        if self.fallback:
+            result = img.copy() if out is None else out
+            if img.ndim > 3:
+                for page, page_out in zip(img, result):
+                    self.apply(page, out=page_out)
+                return result
+            result[...] = np.rint(inpaint.inpaint_biharmonic(img, self.mask, channel_axis=-1) * 255)
+            return result
+
+        flat = _to_columns(img, np.float64) / 255.0
+        solution = self.lu.solve(self.rhs_operator @ flat)
+        # 与 skimage 相同：按通道限制在已知像素的取值范围内
+        known = np.delete(flat, self.mask_idx, axis=0)
+        np.clip(solution, known.min(axis=0), known.max(axis=0), out=solution)
+
+        result = _output(img, out)
+        # 四舍五入而不是截断：解算顺序不同带来的 1e-12 级误差会让整数值落到 147.9999，截断后差一级
+        _write_rows(result, self.mask_idx, np.rint(solution * 255).astype(np.uint8))
+        return result
+
+
+class OnionPlan:
+    """
+    inpaint_numpy_onion 的预计算版本：按距离顺序由外向内逐层修复
+
+    每个遮罩像素所在的层号就是它到最近已知像素的曼哈顿距离，
+    因此用一次距离变换即可得到全部层；每层像素的 8 邻域下标与“邻居是否已知”的权重也预先算好。
+    每页只需逐层做几次下标取值，不再反复腐蚀遮罩、填充整块数组。
+    """
+
+    OFFSETS = [
+        (-1, -1), (-1, 0), (-1, 1),
+        ( 0, -1),          ( 0, 1),
+        ( 1, -1), ( 1, 0), ( 1, 1)
+    ]
+
+    def __init__(self, mask):
+        """
+        参数:
+            mask: 二维布尔遮罩 (H, W)
+        """
+        self.shape = mask.shape
+        self.mask = mask
+        h, w = mask.shape
+        dist = distance_transform_cdt(mask, metric='taxicab')
+        # 没有任何已知像素可参考的孤岛（距离为 -1），最后统一填均值
+        self.orphan_idx = np.flatnonzero(dist < 0)
+
+        # 在四周补一圈的坐标系中取邻居，越界的邻居落在补边上、权重为 0
+        pw = w + 2
+        dist_pad = np.full((h + 2, pw), np.iinfo(dist.dtype).max, dtype=dist.dtype)
+        dist_pad[1:-1, 1:-1] = np.where(dist < 0, np.iinfo(dist.dtype).max, dist)
+        dist_pad = dist_pad.ravel()
+
+        rows, cols = np.nonzero(dist > 0)
+        order = np.argsort(dist[rows, cols], kind='stable')
+        rows, cols = rows[order], cols[order]
+        ring = dist[rows, cols]
+        self.ring_bounds = np.flatnonzero(np.diff(ring, prepend=-1, append=ring.max(initial=0) + 1))
+        self.target_idx = (rows + 1) * pw + (cols + 1)
+        grid_y, grid_x = np.mgrid[1:h + 1, 1:w + 1]
+        self.inner_idx = (grid_y * pw + grid_x).ravel()
+        self.neighbor_idx = np.stack([self.target_idx + dy * pw + dx for dy, dx in self.OFFSETS], axis=1)
+        self.neighbor_weight = (dist_pad[self.neighbor_idx] < ring[:, None]).astype(np.float32)
+        self.count = self.neighbor_weight.sum(axis=1, keepdims=True)
+
+    def apply(self, img, out=None):
+        """修复一张 (H, W, C) 或一批 (N, H, W, C) 图片，返回 uint8 结果；out 的含义同 SmoothPlan.apply"""
+        h, w = self.shape
+        cols = _to_columns(img, np.float32)
+        x = np.zeros(((h + 2) * (w + 2), cols.shape[1]), dtype=np.float32)
+        x[self.inner_idx] = cols
+
+        for start, end in zip(self.ring_bounds[:-1], self.ring_bounds[1:]):
+            neighbors = self.neighbor_idx[start:end]
+            weights = self.neighbor_weight[start:end]
+            total = np.zeros((end - start, cols.shape[1]), dtype=np.float32)
+            for j in range(len(self.OFFSETS)):
+                total += x[neighbors[:, j]] * weights[:, j:j + 1]
+            x[self.target_idx[start:end]] = total / self.count[start:end]
+
+        filled = x[self.inner_idx]
+        if len(self.orphan_idx):
+            known = ~self.mask.ravel()
+            filled[self.orphan_idx] = filled[known].mean(axis=0) if known.any() else 255
+
+        mask_idx = np.flatnonzero(self.mask)
+        result = _output(img, out)
+        _write_rows(result, mask_idx, np.clip(filled[mask_idx], 0, 255).astype(np.uint8))
+        return result
+
+
+class PatchMatchPlan:
+    """
+    PatchMatch 纹理合成：为每个遮罩像素在附近已知区域中找最相似的图块，再由重叠图块投票重建
+
+    源图块中心只取遮罩外 band 像素以内、整块都已知的位置，代价只与遮罩面积有关，与页面大小无关。
+    最近邻场（NNF）对全部目标像素同时做跳跃传播与随机搜索；初值取 OnionPlan 的结果，
+    使第一轮的图块距离就有参考意义。随机数种子固定，同一页面的结果可复现。
+    """
+
+    JUMPS = (8, 4, 2, 1)
+
+    def __init__(self, mask, patch_size=9, band=32, iterations=5, seed=0):
+        """
+        参数:
+            mask: 二维布尔遮罩 (H, W)
+            patch_size: 图块边长（奇数）
+            band: 源图块中心到遮罩的最大曼哈顿距离，也是随机搜索的初始半径
+            iterations: 传播 + 随机搜索 + 投票的轮数
+            seed: 随机数种子
+        """
+        self.shape = mask.shape
+        self.mask = mask
+        self.band = band
+        self.iterations = iterations
+        self.seed = seed
+        self.onion = OnionPlan(mask)
+        h, w = mask.shape
+        r = patch_size // 2
+
+        # 在四周各补 r 像素的坐标系中工作，目标图块不会越界
+        self.padded_shape = (h + 2 * r, w + 2 * r)
+        pw = w + 2 * r
+        dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+        self.offsets = (dy * pw + dx).ravel()
+        self.inner_idx = ((np.arange(h)[:, None] + r) * pw + np.arange(w) + r).ravel()
+
+        rows, cols = np.nonzero(mask)
+        self.target_rows, self.target_cols = rows + r, cols + r
+        self.target_idx = self.target_rows * pw + self.target_cols
+        self.target_of = np.full(self.padded_shape, -1)
+        self.target_of[self.target_rows, self.target_cols] = np.arange(len(rows))
+
+        # 源图块：距遮罩不超过 band，且整块都在 ROI 内、不含遮罩像素
+        near = distance_transform_cdt(~mask, metric='taxicab') <= band
+        clean = maximum_filter(mask.astype(np.uint8), size=patch_size, mode='constant', cval=1) == 0
+        rows, cols = np.nonzero(near & clean)
+        self.source_rows, self.source_cols = rows + r, cols + r
+        self.source_idx = self.source_rows * pw + self.source_cols
+        self.source_of = np.full(self.padded_shape, -1)
+        self.source_of[self.source_rows, self.source_cols] = np.arange(len(rows))
+
+        # 投票：目标像素 t 取邻居 q = t - o 所匹配图块中的对应像素；只有以目标像素为中心的图块参与
+        target_of = self.target_of.ravel()
+        self.voters = target_of[self.target_idx[:, None] - self.offsets]
+
+    def _lookup(self, table, rows, cols):
+        """按坐标查表，越界处为 -1"""
+        inside = (rows >= 0) & (rows < table.shape[0]) & (cols >= 0) & (cols < table.shape[1])
+        found = np.full(len(rows), -1)
+        found[inside] = table[rows[inside], cols[inside]]
+        return found
+
+    def _improve(self, nnf, cost, which, candidate, target_patches, source_patches):
+        """用候选源图块替换更差的匹配（原地修改 nnf 与 cost）"""
+        ok = candidate >= 0
+        which, candidate = which[ok], candidate[ok]
+        new_cost = ((target_patches[which] - source_patches[candidate]) ** 2).sum(axis=(1, 2))
+        better = new_cost < cost[which]
+        nnf[which[better]] = candidate[better]
+        cost[which[better]] = new_cost[better]
+
+    def _synthesize(self, page):
+        """修复单页 (H, W, C)，page 的遮罩区域已有初值"""
+        rng = np.random.default_rng(self.seed)
+        (ph, _), channels = self.padded_shape, page.shape[-1]
+        r = (ph - page.shape[0]) // 2
+        x = np.pad(page, ((r, r), (r, r), (0, 0)), mode='edge').astype(np.float32).reshape(-1, channels)
+        source_patches = x[self.source_idx[:, None] + self.offsets]
+        everyone = np.arange(len(self.target_idx))
+        nnf = rng.integers(len(self.source_idx), size=len(everyone))
+
+        for _ in range(self.iterations):
+            target_patches = x[self.target_idx[:, None] + self.offsets]
+            cost = ((target_patches - source_patches[nnf]) ** 2).sum(axis=(1, 2))
+
+            # 跳跃传播：邻居的匹配平移回来作为候选
+            for step in self.JUMPS:
+                for dy, dx in ((0, step), (step, 0), (0, -step), (-step, 0)):
+                    neighbor = self._lookup(self.target_of, self.target_rows + dy, self.target_cols + dx)
+                    which = everyone[neighbor >= 0]
+                    matched = nnf[neighbor[which]]
+                    candidate = self._lookup(self.source_of, self.source_rows[matched] - dy, self.source_cols[matched] - dx)
+                    self._improve(nnf, cost, which, candidate, target_patches, source_patches)
+
+            # 随机搜索：在当前匹配附近按指数递减的半径采样
+            radius = self.band
+            while radius >= 1:
+                candidate = self._lookup(
+                    self.source_of,
+                    self.source_rows[nnf] + rng.integers(-radius, radius + 1, size=len(nnf)),
+                    self.source_cols[nnf] + rng.integers(-radius, radius + 1, size=len(nnf)))
+                self._improve(nnf, cost, everyone, candidate, target_patches, source_patches)
+                radius //= 2
+
+            # 投票重建：覆盖该像素的所有目标图块取平均
+            valid = self.voters >= 0
+            votes = self.source_idx[nnf[np.where(valid, self.voters, 0)]] + self.offsets
+            values = x[np.where(valid, votes, 0)] * valid[..., None]
+            x[self.target_idx] = values.sum(axis=1) / valid.sum(axis=1, keepdims=True)
+
+        return np.clip(x[self.inner_idx], 0, 255).astype(np.uint8).reshape(page.shape)
+
+    def apply(self, img, out=None):
+        """修复一张 (H, W, C) 或一批 (N, H, W, C) 图片，返回 uint8 结果；out 的含义同 SmoothPlan.apply"""
+        result = self.onion.apply(img, out=out)
+        if not len(self.source_idx):
+            return result
+        pages = result if result.ndim == 4 else result[None]
+        for i, page in enumerate(pages):
+            pages[i] = self._synthesize(page)
+        return result
+
+
+_PLAN_CLASSES = {
+    'smooth': SmoothPlan,
+    'pyramid_smooth': PyramidSmoothPlan,
+    'griddata': GriddataPlan,
+    'plane_fit': PlaneFitPlan,
+    'biharmonic': BiharmonicPlan,
+    'onion': OnionPlan,
+    'patchmatch': PatchMatchPlan,
+}
+
+# 同时处理的文档一般只有一个，少量缓存即可
+MAX_CACHED_PLANS = 16
+_plan_cache = OrderedDict()
+
+
+def get_inpaint_plan(kind, mask, **params):
+    """
+    按 (类型, 遮罩, 参数) 获取修复计划，命中缓存时直接复用
+
+    参数:
+        kind: 'smooth'、'pyramid_smooth'、'griddata'、'plane_fit'、'biharmonic'、'onion' 或 'patchmatch'
+        mask: 二维遮罩，非零即为待修复像素
+        **params: 传给计划构造函数的参数
+
+    返回:
+        对应类型的修复计划对象
+    """
+    mask = np.asarray(mask)
+    if mask.ndim == 3:
+        mask = mask[:, :, 0]
+    mask = mask > 0
+    digest = hashlib.sha1(np.packbits(mask).tobytes()).hexdigest()
+    key = (kind, mask.shape, digest, tuple(sorted(params.items())))
+
+    plan = _plan_cache.get(key)
+    if plan is None:
+        plan = _PLAN_CLASSES[kind](mask, **params)
+        _plan_cache[key] = plan
+        if len(_plan_cache) > MAX_CACHED_PLANS:
+            _plan_cache.popitem(last=False)
+    else:
+        _plan_cache.move_to_end(key)
+    return plan
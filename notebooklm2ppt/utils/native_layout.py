@@ -0,0 +1,167 @@
+"""从 PDF 自带文本层直接生成 PaddleOCR 兼容的布局 JSON（无需联网 OCR）"""
+
+import json
+import fitz  # PyMuPDF
+import numpy as np
+from notebooklm2ppt.pdf2png import resolve_pages, resolve_workers, run_page_chunks
+
+
+def has_text_layer(pdf_path, min_chars=20, sample_pages=5):
+    """
+    粗略判断 PDF 是否带有可用的文本层
+
+    Args:
+        pdf_path: PDF 文件路径
+        min_chars: 抽样页面中至少包含的非空白字符数
+        sample_pages: 抽样的页数（从第一页开始）
+
+    Returns:
+        bool: 是否有文本层
+    """
+    with fitz.open(pdf_path) as pdf_doc:
+        chars = 0
+        for page_idx in range(min(sample_pages, len(pdf_doc))):
+            text = pdf_doc.load_page(page_idx).get_text("text")
+            chars += sum(1 for ch in text if not ch.isspace())
+            if chars >= min_chars:
+                return True
+    return False
+
+
+def classify_text_block(bbox, font_size, body_font_size, page_rect):
+    """
+    根据位置与字号为文本块打上 PaddleOCR 风格的标签
+
+    Args:
+        bbox: 文本块边界框（PDF 坐标）
+        font_size: 块内最大字号
+        body_font_size: 页面正文字号（中位数）
+        page_rect: 页面矩形
+
+    Returns:
+        str: 'paragraph_title' / 'footer' / 'header' / 'text'
+    """
+    x0, y0, x1, y1 = bbox
+    if body_font_size and font_size >= body_font_size * 1.3:
+        return 'paragraph_title'
+    if y0 >= page_rect.y0 + page_rect.height * 0.92:
+        return 'footer'
+    if y1 <= page_rect.y0 + page_rect.height * 0.06:
+        return 'header'
+    return 'text'
+
+
+def extract_page_layout(page, scale=1.0, max_image_area_ratio=0.9):
+    """
+    从单页文本层提取布局块与行框
+
+    Args:
+        page: fitz.Page
+        scale: 坐标缩放比例（dpi / 72）
+        max_image_area_ratio: 面积超过页面该比例的图片视为背景，不作为前景图片块
+
+    Returns:
+        tuple: (layout prunedResult, ocr prunedResult)
+    """
+    # 不让 get_text 解码图片内容，图片位置单独通过 get_image_info 获取
+    text_dict = page.get_text("dict", flags=fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES)
+    page_rect = page.rect
+    page_area = page_rect.width * page_rect.height
+
+    def to_px(bbox):
+        return [round((bbox[0] - page_rect.x0) * scale), round((bbox[1] - page_rect.y0) * scale),
+                round((bbox[2] - page_rect.x0) * scale), round((bbox[3] - page_rect.y0) * scale)]
+
+    text_blocks = [b for b in text_dict['blocks'] if b['type'] == 0]
+    sizes = [span['size'] for b in text_blocks for line in b['lines'] for span in line['spans']
+             if span['text'].strip()]
+    body_font_size = float(np.median(sizes)) if sizes else 0
+
+    parsing_res_list = []
+    rec_boxes = []
+    rec_texts = []
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info['bbox']
+        if (x1 - x0) * (y1 - y0) > page_area * max_image_area_ratio:
+            continue
+        parsing_res_list.append({
+            'block_label': 'image',
+            'block_content': '',
+            'block_bbox': to_px(info['bbox']),
+        })
+
+    for block in text_blocks:
+        lines = []
+        font_size = 0
+        for line in block['lines']:
+            text = ''.join(span['text'] for span in line['spans'])
+            if not text.strip():
+                continue
+            lines.append(text)
+            font_size = max(font_size, max(span['size'] for span in line['spans']))
+            rec_boxes.append(to_px(line['bbox']))
+            rec_texts.append(text)
+        if not lines:
+            continue
+
+        parsing_res_list.append({
+            'block_label': classify_text_block(block['bbox'], font_size, body_font_size, page_rect),
+            'block_content': '\n'.join(lines),
+            'block_bbox': to_px(block['bbox']),
+        })
+
+    width = round(page_rect.width * scale)
+    height = round(page_rect.height * scale)
+    layout = {'width': width, 'height': height, 'parsing_res_list': parsing_res_list}
+    ocr = {'rec_boxes': rec_boxes, 'rec_texts': rec_texts}
+    return layout, ocr
+
+
+def _extract_layout_chunk(pdf_path, page_nums, scale):
+    """run_page_chunks 的工作函数：提取一批页码的布局"""
+    with fitz.open(pdf_path) as pdf_doc:
+        return [extract_page_layout(pdf_doc.load_page(page_num - 1), scale) for page_num in page_nums]
+
+
+def extract_layout_json(pdf_path, output_path=None, dpi=72, pages=None, workers=1):
+    """
+    从 PDF 文本层生成与 create_ppt_from_paddle_json 兼容的数据
+
+    Args:
+        pdf_path: PDF 文件路径
+        output_path: 若提供，则把结果写入该 JSON 文件
+        dpi: 坐标所用的分辨率，默认 72（即 PDF 点）
+        pages: 要处理的页码范围，格式见 resolve_pages
+        workers: 并行处理的进程数，默认 1；None 或 0 表示使用全部 CPU 核心
+
+    Returns:
+        dict: 含 layoutParsingResults / ocrResults / dataInfo 的数据
+    """
+    scale = dpi / 72
+    with fitz.open(pdf_path) as pdf_doc:
+        page_nums = resolve_pages(pages, len(pdf_doc))
+        workers = resolve_workers(workers, len(page_nums))
+        if workers <= 1:
+            results = [extract_page_layout(pdf_doc.load_page(page_num - 1), scale) for page_num in page_nums]
+
+    if workers > 1:
+        results = run_page_chunks(_extract_layout_chunk, pdf_path, page_nums, workers, scale)
+
+    data = {
+        'layoutParsingResults': [{'prunedResult': layout} for layout, _ in results],
+        'ocrResults': [{'prunedResult': ocr} for _, ocr in results],
+        'dataInfo': {
+            'type': 'pdf',
+            'numPages': len(results),
+            'pages': [{'width': layout['width'], 'height': layout['height']} for layout, _ in results],
+        },
+    }
+    if results:
+        data['dataInfo']['width'] = results[0][0]['width']
+        data['dataInfo']['height'] = results[0][0]['height']
+
+    if output_path is not None:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        print(f"✓ 已从 PDF 文本层生成布局 JSON: {output_path}")
+    return data
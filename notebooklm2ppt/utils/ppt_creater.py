@@ -5,11 +5,14 @@ import json
 import argparse
 import copy
 from pathlib import Path
+import fitz  # PyMuPDF
 import numpy as np
 from PIL import Image
 from notebooklm2ppt.pdf2png import pdf_to_png
 from notebooklm2ppt.utils.ppt_combiner import clean_ppt
-from notebooklm2ppt.utils.edge_diversity import compute_edge_diversity_numpy
+from notebooklm2ppt.utils.render_cache import get_default_cache
+from notebooklm2ppt.utils.native_layout import extract_layout_json, has_text_layer
+from notebooklm2ppt.utils.region_eraser import erase_regions
 from spire.presentation import *
 from spire.presentation.common import *
 
@@ -46,6 +49,58 @@ def calculate_font_size(height,
     return font_size
 
 
+def _count_lines(y_centers, heights):
+    """
+    按 y 中心点已排序的 OCR 框聚类行数
+
+    阈值：如果垂直间距超过行高的 60%，判定为新行。每一行只做一次向量比较，
+    直接找到下一个开启新行的框，而不是逐框比较。
+    """
+    line_count = 0
+    start = 0
+    while start < len(y_centers):
+        line_count += 1
+        rest = slice(start + 1, None)
+        new_line = np.abs(y_centers[rest] - y_centers[start]) > np.maximum(heights[start], heights[rest]) * 0.6
+        if not new_line.any():
+            break
+        start += 1 + int(np.argmax(new_line))
+    return line_count
+
+
+def get_line_counts(block_bboxes, ocr_boxes):
+    """
+    一次计算一页上多个文本块内的实际行数
+
+    OCR 框只在这里整理一次：按 y 中心点排序，每个文本块先用二分查找取出 y 中心落在块内的一段，
+    再对这一段向量化判断 x 中心，复杂度与文本块数 × log(OCR 框数) 加上命中的框数成正比，
+    而不是文本块数 × OCR 框数。
+
+    Args:
+        block_bboxes: 文本块边界框列表，每个为 [x1, y1, x2, y2]
+        ocr_boxes: OCR识别的所有文本框列表
+
+    Returns:
+        list: 每个文本块内的行数
+    """
+    boxes = np.asarray(ocr_boxes, dtype=np.float64).reshape(-1, 4)
+    x_centers = (boxes[:, 0] + boxes[:, 2]) / 2
+    y_centers = (boxes[:, 1] + boxes[:, 3]) / 2
+    heights = boxes[:, 3] - boxes[:, 1]
+    # 稳定排序，y 中心相同的框保持原顺序
+    order = np.argsort(y_centers, kind='stable')
+    x_centers, y_centers, heights = x_centers[order], y_centers[order], heights[order]
+
+    line_counts = []
+    for bx1, by1, bx2, by2 in block_bboxes:
+        # 筛选出该 block 范围内的 OCR 框 (使用中心点判定)
+        lo = np.searchsorted(y_centers, by1, side='left')
+        hi = np.searchsorted(y_centers, by2, side='right')
+        inside = (x_centers[lo:hi] >= bx1) & (x_centers[lo:hi] <= bx2)
+        line_counts.append(_count_lines(y_centers[lo:hi][inside], heights[lo:hi][inside]))
+    return line_counts
+
+
 def get_line_count(block_bbox, ocr_boxes):
     """
     计算文本块内的实际行数
@@ -57,39 +112,7 @@ def get_line_count(block_bbox, ocr_boxes):
     Returns:
         int: 文本块内的行数
     """
-    bx1, by1, bx2, by2 = block_bbox
-
-    # 筛选出该 block 范围内的 OCR 框 (使用中心点判定)
-    contained_boxes = []
-    for obox in ocr_boxes:
-        ox1, oy1, ox2, oy2 = obox
-        cx = (ox1 + ox2) / 2
-        cy = (oy1 + oy2) / 2
-
-        if bx1 <= cx <= bx2 and by1 <= cy <= by2:
-            contained_boxes.append(obox)
-
-    if not contained_boxes:
-        return 0
-
-    # 按 y 中心点排序并进行简单的聚类分析行数
-    contained_boxes.sort(key=lambda b: (b[1] + b[3]) / 2)
-
-    line_count = 1
-    last_y_center = (contained_boxes[0][1] + contained_boxes[0][3]) / 2
-    last_h = contained_boxes[0][3] - contained_boxes[0][1]
-
-    for j in range(1, len(contained_boxes)):
-        curr_y_center = (contained_boxes[j][1] + contained_boxes[j][3]) / 2
-        curr_h = contained_boxes[j][3] - contained_boxes[j][1]
-
-        # 阈值：如果垂直间距超过行高的 60%，判定为新行
-        if abs(curr_y_center - last_y_center) > max(last_h, curr_h) * 0.6:
-            line_count += 1
-            last_y_center = curr_y_center
-            last_h = curr_h
-
-    return line_count
+    return get_line_counts([block_bbox], ocr_boxes)[0]
 
 
 # ============================================================================
@@ -277,6 +300,7 @@ def process_text_blocks(slide,
         ppt_height: PPT高度
         font_name: 字体名称
     """
+    text_items = []
     for item in parsing_res_list:
         label = item.get('block_label', 'unknown')
         content = item.get('block_content', '')
@@ -288,9 +312,13 @@ def process_text_blocks(slide,
         # 判断是否跳过该文本块
         if should_skip_text_block(label, content):
             continue
+        text_items.append((label, content, bbox))
+
+    # 整页的行数一次算出
+    line_counts = get_line_counts([bbox for _, _, bbox in text_items], ocr_boxes)
 
-        # 计算行数和字体大小
-        line_count = get_line_count(bbox, ocr_boxes)
+    for (label, content, bbox), line_count in zip(text_items, line_counts):
+        # 计算字体大小
         is_multiline = line_count > 1
 
         bx1, by1, bx2, by2 = bbox
@@ -352,11 +380,160 @@ def scale_bbox(bbox, s, make_int=True):
         return [coord * s for coord in bbox]
 
 
+def is_clipped(bbox, clips, tol=0.5):
+    """
+    判断图片是否可能被裁剪路径裁掉一部分
+
+    无法得知每条裁剪路径作用于哪张图片，只要有裁剪范围与图片相交但不完整包含图片，
+    就保守地认为图片被裁剪。
+    
+    Args:
+        bbox: 图片在页面上的位置 fitz.Rect
+        clips: 裁剪范围（scissor）列表
+        tol: 包含判断的容差（点）
+        
+    Returns:
+        bool: 是否可能被裁剪
+    """
+    for clip in clips:
+        overlap = fitz.Rect(bbox) & clip
+        if overlap.is_empty:
+            continue
+        if (clip.x0 > bbox.x0 + tol or clip.y0 > bbox.y0 + tol or
+                clip.x1 < bbox.x1 - tol or clip.y1 < bbox.y1 - tol):
+            return True
+    return False
+
+
+def collect_embedded_images(pdf_doc, page_idx, layout_size, offset_x,
+                            resize_scale, max_image_area_ratio=0.9):
+    """
+    收集页面中嵌入图片的 xref 及其在布局坐标系下的位置
+    
+    整页背景、旋转放置以及被裁剪路径裁掉一部分的图片不参与匹配，这些区域改从页面图片中裁剪。
+    
+    Args:
+        pdf_doc: fitz 文档
+        page_idx: 页面索引
+        layout_size: 原始 JSON 中的页面尺寸 (宽, 高)
+        offset_x: 宽屏调整带来的横向偏移
+        resize_scale: resize_data 使用的缩放比例
+        max_image_area_ratio: 面积超过页面该比例的图片视为整页背景，不参与匹配
+        
+    Returns:
+        list: [{'xref': int, 'bbox': [x1, y1, x2, y2]}, ...]
+    """
+    if page_idx >= len(pdf_doc):
+        return []
+    page = pdf_doc.load_page(page_idx)
+    rect = page.rect
+    page_area = rect.width * rect.height
+    sx = layout_size[0] / rect.width
+    sy = layout_size[1] / rect.height
+
+    # 裁剪路径的范围：被裁掉一部分的图片，原图与页面上显示的内容不同
+    clips = None
+    images = []
+    for info in page.get_image_info(xrefs=True):
+        if not info['xref']:
+            continue
+        # 旋转、翻转放置的图片无法直接复用原始字节
+        a, b, c, d, _, _ = info['transform']
+        if b != 0 or c != 0 or a <= 0 or d <= 0:
+            continue
+        x0, y0, x1, y1 = info['bbox']
+        # 整页背景位图（如 NotebookLM 导出的整页图）包含了全部内容，不能当作块图片复用
+        if (x1 - x0) * (y1 - y0) > page_area * max_image_area_ratio:
+            continue
+        if clips is None:
+            clips = [d['scissor'] for d in page.get_drawings(extended=True) if d['type'] == 'clip']
+        if is_clipped(fitz.Rect(info['bbox']), clips):
+            continue
+        images.append({
+            'xref': info['xref'],
+            'bbox': [((x0 - rect.x0) * sx + offset_x) * resize_scale,
+                     (y0 - rect.y0) * sy * resize_scale,
+                     ((x1 - rect.x0) * sx + offset_x) * resize_scale,
+                     (y1 - rect.y0) * sy * resize_scale],
+        })
+    return images
+
+
+def match_embedded_image(bbox, embedded_images, min_iou=0.8):
+    """
+    找到与 bbox 重叠度最高的嵌入图片
+    
+    Args:
+        bbox: 布局块边界框 [x1, y1, x2, y2]
+        embedded_images: collect_embedded_images 的结果
+        min_iou: 最低 IoU 阈值
+        
+    Returns:
+        dict 或 None: 匹配到的嵌入图片
+    """
+    if not embedded_images:
+        return None
+    boxes = np.array([img['bbox'] for img in embedded_images], dtype=np.float64)
+    bx1, by1, bx2, by2 = bbox
+    inter_w = np.clip(np.minimum(boxes[:, 2], bx2) - np.maximum(boxes[:, 0], bx1), 0, None)
+    inter_h = np.clip(np.minimum(boxes[:, 3], by2) - np.maximum(boxes[:, 1], by1), 0, None)
+    inter = inter_w * inter_h
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    union = areas + (bx2 - bx1) * (by2 - by1) - inter
+    ious = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+    best = int(np.argmax(ious))
+    if ious[best] < min_iou:
+        return None
+    return embedded_images[best]
+
+
+def save_embedded_image(pdf_doc, xref, out_stem):
+    """
+    把嵌入图片写到磁盘
+    
+    RGB/灰度的 PNG/JPEG 且没有 /Decode、/Mask、SMask 时直接写出原始字节，不重新编码；
+    否则原始字节与 PDF 中显示的像素不同（如 Adobe CMYK JPEG 的反相 /Decode、
+    遮罩），经 fitz.Pixmap 解码并应用这些设置后转为 PNG。
+    
+    Args:
+        pdf_doc: fitz 文档
+        xref: 图片 xref
+        out_stem: 输出路径（不含扩展名）
+        
+    Returns:
+        Path: 写出的文件路径
+    """
+    info = pdf_doc.extract_image(xref)
+    raw_ok = (info['ext'] in ('png', 'jpeg', 'jpg') and not info.get('smask')
+              and info['colorspace'] in (1, 3)
+              and pdf_doc.xref_get_key(xref, 'Decode')[0] == 'null'
+              and pdf_doc.xref_get_key(xref, 'Mask')[0] == 'null')
+    if raw_ok:
+        out_path = out_stem.with_suffix('.' + info['ext'])
+        with open(out_path, 'wb') as f:
+            f.write(info['image'])
+        return out_path
+
+    # 带遮罩、/Decode、非 RGB/灰度或 PPT 不支持的格式，转为 PNG；
+    # Pixmap 会应用 /Decode 与颜色键遮罩，SMask 与模板遮罩（extract_image 都报告为 smask）在这里合成为透明通道
+    pix = fitz.Pixmap(pdf_doc, xref)
+    if info.get('smask'):
+        pix = fitz.Pixmap(pix, fitz.Pixmap(pdf_doc, info['smask']))
+    if pix.colorspace is not None and pix.colorspace.n not in (1, 3):
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    out_path = out_stem.with_suffix('.png')
+    pix.save(out_path)
+    return out_path
+
+
 def extract_foreground_element(slide, item, index, image_cv, img_scale, scale,
-                               pdf_size, png_dir, page_idx):
+                               pdf_size, png_dir, page_idx, pdf_doc=None,
+                               embedded_images=None):
     """
     提取前景元素(图片、表格、图表)并添加到幻灯片
     
+    优先使用 PDF 中与该区域重叠的原始嵌入图片，找不到时再从页面图片中裁剪。
+    
     Args:
         slide: 幻灯片对象
         item: 元素信息
@@ -366,6 +543,8 @@ def extract_foreground_element(slide, item, index, image_cv, img_scale, scale,
         scale: PPT缩放比例
         png_dir: PNG输出目录
         page_idx: 页面索引
+        pdf_doc: fitz 文档（可选）
+        embedded_images: 本页嵌入图片列表（可选）
         
     Returns:
         bool: 是否成功提取
@@ -378,6 +557,21 @@ def extract_foreground_element(slide, item, index, image_cv, img_scale, scale,
 
     expanded_bbox = expand_bbox(bbox, expand_px=2, size=pdf_size)
 
+    matched = None
+    if pdf_doc is not None:
+        matched = match_embedded_image(bbox, embedded_images)
+    if matched is not None:
+        image_path = save_embedded_image(
+            pdf_doc, matched['xref'],
+            png_dir / f"page_{page_idx+1}_{label}_{index}")
+        l_ppt, t_ppt, r_ppt, b_ppt = scale_bbox(matched['bbox'], scale, make_int=False)
+        rect_item = RectangleF.FromLTRB(l_ppt, t_ppt, r_ppt, b_ppt)
+        img_shape = slide.Shapes.AppendEmbedImageByPath(ShapeType.Rectangle,
+                                                        str(image_path), rect_item)
+        img_shape.Line.FillType = FillFormatType.none
+        img_shape.ZOrderPosition = 0  # 设为底层形状
+        return True
+
     # 原始图上的坐标用于裁剪 (对齐偏移量)
     l_img, t_img, r_img, b_img = scale_bbox(expanded_bbox, img_scale)
 
@@ -403,40 +597,52 @@ def extract_foreground_element(slide, item, index, image_cv, img_scale, scale,
     return True
 
 
-def erase_region(image_cv, bbox, img_scale, pdf_size):
+def get_erase_box(bbox, img_scale, pdf_size):
     """
-    擦除图片中的指定区域
+    计算擦除区域在图片上的像素坐标
     
     Args:
-        image_cv: 图片数组
         bbox: 边界框
         img_scale: 缩放比例
         pdf_size: PDF尺寸 (宽, 高)
         
     Returns:
-        bool: 是否成功擦除
+        list: (left, top, right, bottom)，区域无效时为 None
     """
     expanded_bbox = expand_bbox(bbox, expand_px=2, size=pdf_size)
     l, t, r, b = scale_bbox(expanded_bbox, img_scale, make_int=True)
 
     if r <= l or b <= t:
         print("擦除区域无效，跳过")
-        return False
+        return None
+    return [l, t, r, b]
 
-    # 计算填充颜色并擦除
-    _, fill_color = compute_edge_diversity_numpy(image_cv,
-                                                 l,
-                                                 t,
-                                                 r,
-                                                 b,
-                                                 tolerance=20)
-    image_cv[t:b, l:r] = fill_color
 
+def erase_region(image_cv, bbox, img_scale, pdf_size):
+    """
+    擦除图片中的指定区域（多个区域请用 erase_regions 一次擦除）
+    
+    Args:
+        image_cv: 图片数组
+        bbox: 边界框
+        img_scale: 缩放比例
+        pdf_size: PDF尺寸 (宽, 高)
+        
+    Returns:
+        bool: 是否成功擦除
+    """
+    box = get_erase_box(bbox, img_scale, pdf_size)
+    if box is None:
+        return False
+
+    # 计算填充颜色并擦除：纯色边缘填主色，渐变边缘填拟合的渐变
+    erase_regions(image_cv, [box])
     return True
 
 
 def process_slide_background(slide, presentation, parsing_res_list, png_file,
-                             pdf_size, scale, png_dir, page_idx):
+                             pdf_size, scale, png_dir, page_idx, pdf_doc=None,
+                             embedded_images=None):
     """
     处理幻灯片背景（提取前景元素、擦除已处理区域、设置背景）
     
@@ -449,6 +655,8 @@ def process_slide_background(slide, presentation, parsing_res_list, png_file,
         scale: 缩放比例
         png_dir: PNG输出目录
         page_idx: 页面索引
+        pdf_doc: fitz 文档（可选，用于直接复用嵌入图片）
+        embedded_images: 本页嵌入图片列表（可选）
     """
     if not png_file.exists():
         return
@@ -467,7 +675,8 @@ def process_slide_background(slide, presentation, parsing_res_list, png_file,
         label = item.get('block_label')
         if label in ['image', 'table', 'chart']:
             extract_foreground_element(slide, item, i, image_cv, img_scale,
-                                       scale, pdf_size, png_dir, page_idx)
+                                       scale, pdf_size, png_dir, page_idx,
+                                       pdf_doc, embedded_images)
 
     # 2. 擦除已转换为文本框或独立图片的区域
     erasable_labels = [
@@ -475,13 +684,18 @@ def process_slide_background(slide, presentation, parsing_res_list, png_file,
         'image', 'table', 'algorithm', 'chart'
     ]
 
+    # 所有区域的填充颜色都在擦除前的原图上统计，一次写回，结果与区域顺序无关
+    erase_boxes = []
     for item in parsing_res_list:
         label = item.get('block_label')
         if label in erasable_labels:
             bbox = item.get('block_bbox')
             if bbox:
-                erase_region(image_cv, bbox, img_scale, pdf_size)
-                
+                box = get_erase_box(bbox, img_scale, pdf_size)
+                if box is not None:
+                    erase_boxes.append(box)
+    erase_regions(image_cv, erase_boxes)
+
 
     # 3. 保存处理后的图片
     processed_png = png_dir / f"page_{page_idx+1}_paddle_processed.png"
@@ -554,6 +768,23 @@ def update_data_size(data, width, height=None):
     
     return data
 
+def get_wide_screen_offset(pdf_w, pdf_h):
+    """
+    计算调整为16:9宽屏时横坐标的偏移量
+    
+    Args:
+        pdf_w: 原始宽度
+        pdf_h: 原始高度
+        
+    Returns:
+        int: 扩展时为正（右移），裁剪时为负（左移）
+    """
+    target_width = round(pdf_h * 16 / 9)
+    if target_width > pdf_w:
+        return (target_width - pdf_w) // 2
+    return -((pdf_w - target_width) // 2)
+
+
 def make_data_wide_screen(data):
     """
     将数据调整为16:9宽屏比例
@@ -735,21 +966,25 @@ def create_ppt_from_paddle_json(json_file,
                                 out_ppt_name=None,
                                 dpi=150,
                                 inpaint=True,
-                                inpaint_method='background_smooth'):
+                                inpaint_method='background_smooth',
+                                workers=1,
+                                cache=None):
     """
     从 PaddleOCR JSON 直接创建 PPT
     
     Args:
-        json_file: PaddleOCR JSON文件路径
+        json_file: PaddleOCR JSON文件路径；为 None 时直接从 PDF 文本层提取布局（离线）
         pdf_file: 原始PDF文件路径
         output_dir: 输出目录
         out_ppt_name: 输出PPT文件名
         dpi: 图片清晰度
         inpaint: 是否进行图像修复
         inpaint_method: 图像修复方法
+        workers: 渲染与提取布局的并行进程数，0 或 None 表示使用全部 CPU 核心
+        cache: 页面渲染缓存（RenderCache），为 None 时使用 get_default_cache()
     """
     # 验证输入文件
-    if not os.path.exists(json_file):
+    if json_file is not None and not os.path.exists(json_file):
         print(f"错误: JSON 文件 {json_file} 不存在")
         return
 
@@ -757,6 +992,10 @@ def create_ppt_from_paddle_json(json_file,
         print(f"错误: PDF 文件 {pdf_file} 不存在")
         return
 
+    if json_file is None and not has_text_layer(pdf_file):
+        print(f"错误: PDF 文件 {pdf_file} 没有可用的文本层，请提供 PaddleOCR JSON 文件")
+        return
+
     # 准备输出目录
     output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True, parents=True)
@@ -772,23 +1011,31 @@ def create_ppt_from_paddle_json(json_file,
                            dpi=dpi,
                            inpaint=inpaint,
                            inpaint_method=inpaint_method,
-                           force_regenerate=True, 
-                           make_wide_screen=True)
+                           make_wide_screen=True,
+                           workers=workers,
+                           cache=cache if cache is not None else get_default_cache())
     # 重新利用生成的 PNG 文件列表，生成PDF
     
     png_files = [png_dir / name for name in png_names]
 
     # 步骤 2: 读取 JSON 文件
     print("\n" + "=" * 60)
-    print("步骤 2: 读取 PaddleOCR JSON 文件")
-    print("=" * 60)
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    if json_file is None:
+        print("步骤 2: 从 PDF 文本层提取布局")
+        print("=" * 60)
+        data = extract_layout_json(pdf_file, output_dir / "native_layout.json", workers=workers)
+    else:
+        print("步骤 2: 读取 PaddleOCR JSON 文件")
+        print("=" * 60)
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
 
     # 步骤 2.5: 调整为宽屏比例
     print("\n" + "=" * 60)
     print("步骤 2.5: 调整数据为16:9宽屏比例")
     print("=" * 60)
+    layout_size = get_pdf_size_from_data(data)
+    wide_offset_x = get_wide_screen_offset(*layout_size)
     data = make_data_wide_screen(data)
 
     # 步骤 3: 创建 PPT
@@ -802,6 +1049,7 @@ def create_ppt_from_paddle_json(json_file,
 
     # 设置PPT并调整数据坐标
     presentation, ppt_width, ppt_height = setup_presentation(pdf_size)
+    resize_scale = ppt_width / pdf_size[0]
     data = resize_data(data, pdf_size, (ppt_width, ppt_height))
     pdf_size = get_pdf_size_from_data(data)
     scale = ppt_width / pdf_size[0]
@@ -814,6 +1062,9 @@ def create_ppt_from_paddle_json(json_file,
 
     font_name = "Calibri"
 
+    # 用于直接复用 PDF 中的原始嵌入图片
+    pdf_doc = fitz.open(pdf_file)
+
     # 处理每一页
     for page_idx in range(len(layout_results)):
         print(f"处理第 {page_idx+1}/{len(layout_results)} 页...")
@@ -831,9 +1082,16 @@ def create_ppt_from_paddle_json(json_file,
 
         # 处理背景图片（包括前景元素提取和区域擦除）
         if page_idx < len(png_files):
+            embedded_images = collect_embedded_images(pdf_doc, page_idx,
+                                                      layout_size,
+                                                      wide_offset_x,
+                                                      resize_scale)
             process_slide_background(slide, presentation, parsing_res_list,
                                      png_files[page_idx], pdf_size, scale,
-                                     png_dir, page_idx)
+                                     png_dir, page_idx, pdf_doc,
+                                     embedded_images)
+
+    pdf_doc.close()
 
     # 保存并清理PPT
     if out_ppt_name is None:
@@ -862,26 +1120,40 @@ def main():
 python create_with_paddle_reorg.py result.json input.pdf -o output --dpi 150
         """)
 
-    parser.add_argument("json_file", help="PaddleOCR JSON文件路径 (result.json)")
+    parser.add_argument("json_file",
+                        nargs="?",
+                        default=None,
+                        help="PaddleOCR JSON文件路径 (result.json)；省略或写 - 时，若 PDF 带文本层则自动使用 --native")
     parser.add_argument("pdf_file", help="原始PDF文件路径")
+    parser.add_argument("--native",
+                        action="store_true",
+                        help="忽略 JSON，直接从 PDF 自带文本层提取布局（离线）")
     parser.add_argument("--workspace",
                         default="output",
                         type=str,
                         help="工作目录 (默认: output)")
     parser.add_argument('--name', type=str, default=None)
     parser.add_argument("--dpi", type=int, default=150, help="图片清晰度 (默认: 150)")
+    parser.add_argument("--workers", type=int, default=1, help="并行进程数，0 表示使用全部 CPU 核心 (默认: 1)")
 
     args = parser.parse_args()
 
+    native = args.native or args.json_file in (None, "-")
+    if native and not args.native:
+        if not has_text_layer(args.pdf_file):
+            parser.error("PDF 没有可用的文本层，请提供 PaddleOCR JSON 文件")
+        print("未提供 JSON，PDF 带有文本层，直接从文本层提取布局")
+
     workspace = Path(args.workspace)
     out_dir = workspace / os.path.basename(args.pdf_file).replace('.pdf', '')
     out_dir.mkdir(exist_ok=True, parents=True)
 
-    create_ppt_from_paddle_json(args.json_file,
+    create_ppt_from_paddle_json(None if native else args.json_file,
                                 args.pdf_file,
                                 str(out_dir),
                                 out_ppt_name=args.name,
-                                dpi=args.dpi)
+                                dpi=args.dpi,
+                                workers=args.workers)
 
 
 if __name__ == "__main__":
@@ -6,7 +6,7 @@ import requests
 from spire.presentation.common import *
 from spire.presentation import *
 from .ppt_combiner import clean_ppt
-from .edge_diversity import compute_edge_diversity_numpy
+from .region_eraser import erase_regions
 from ..config_defaults import DEFAULT_TASK_SETTINGS
 
 def recursive_blocks(blocks):
@@ -196,17 +196,13 @@ def refine_ppt(tmp_image_dir, json_file, ppt_file, png_dir, png_files, final_out
             return round(x * ppt_to_bg_factor)
         
         def fill_blocks(blocks_to_fill, is_image):
-            for block_to_fill in blocks_to_fill:
-                bbox = block_to_fill['bbox']
-                l, t, r, b = map(round, bbox)
-                diversity, fill_color = compute_edge_diversity_numpy(image_cv, l, t, r, b, tolerance=20)
-                # 如果是图片块，或者原背景图为空，或者边缘多样性低，认为是纯色区域，则可以直接填充
-                if is_image or old_bg_cv is None or diversity < 0.5:
-                    image_cv[t-1:b-1, l+1:r+1] = fill_color
-                    action = 'fill'
-                else: # 边缘多样性高，保留原背景
-                    image_cv[t-1:b-1, l+1:r+1] = old_bg_cv[t-1:b-1, l+1:r+1] # 保留原背景的前提是要有原背景图
-                    action = 'keep'
+            boxes = [list(map(round, block_to_fill['bbox'])) for block_to_fill in blocks_to_fill]
+            fill_boxes = [(l+1, t-1, r+1, b-1) for l, t, r, b in boxes]
+            # 如果是图片块，或者原背景图为空，或者边缘多样性低，认为是纯色区域，则可以直接填充（渐变边缘填拟合的渐变）；
+            # 否则边缘多样性高，保留原背景（保留原背景的前提是要有原背景图）
+            keep_diversity = None if is_image or old_bg_cv is None else 0.5
+            results = erase_regions(image_cv, boxes, fill_boxes, background=old_bg_cv, keep_diversity=keep_diversity)
+            for block_to_fill, (action, diversity, fill_color) in zip(blocks_to_fill, results):
                 print("div=", diversity, action, fill_color, " block_to_fill=", block_to_fill)
 
         # 对于所有文本块进行填充
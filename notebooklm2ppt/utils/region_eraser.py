@@ -0,0 +1,82 @@
+"""一页图片上多个矩形区域（文本块、图片块）的批量擦除"""
+
+import numpy as np
+from .edge_diversity import BorderSums, compute_edge_diversity_batch, GRADIENT_MAX_RESIDUAL
+
+# 边缘多样性低于该值视为纯色，直接填主色
+FLAT_DIVERSITY = 0.1
+
+# 每个矩形的处理方式，下标即 actions 数组中使用的编码
+ACTIONS = ('fill', 'gradient', 'keep')
+FILL, GRADIENT, KEEP = range(len(ACTIONS))
+
+
+def erase_regions(image_cv, boxes, fill_boxes=None, background=None, keep_diversity=None, tolerance=20):
+    """
+    一次擦除一页图片上的多个矩形区域，结果原地写回 image_cv
+
+    所有统计量（边缘主色、多样性、渐变拟合）都先在未修改的原图上一次算好，之后再统一写回，
+    写回顺序只由矩形的面积和坐标决定，因此结果与传入顺序无关。矩形重叠时面积小的优先。
+    每个矩形的处理方式：
+    - 'fill'：填边缘主色（边缘为纯色，或不是渐变）
+    - 'gradient'：边缘不是纯色、但能用平面拟合，按拟合结果填充渐变
+    - 'keep'：边缘多样性不低于 keep_diversity，还原 background 中的对应区域
+
+    参数:
+        image_cv: (H, W, C) uint8 图片
+        boxes: (K, 4) 统计边缘用的矩形 (left, top, right, bottom)
+        fill_boxes: (K, 4) 实际擦除的区域，默认与 boxes 相同
+        background: 与 image_cv 同尺寸的原背景图，用于 'keep'
+        keep_diversity: 'keep' 的多样性阈值；None 表示全部填充
+        tolerance: 边缘颜色量化的容差
+
+    返回:
+        list: 每个矩形的 (action, diversity, fill_color)
+    """
+    if len(boxes) == 0:
+        return []
+    h, w = image_cv.shape[:2]
+    boxes = np.asarray(np.round(boxes), dtype=int)
+    fill_boxes = boxes if fill_boxes is None else np.asarray(np.round(fill_boxes), dtype=int)
+    # 与 compute_edge_diversity_batch 相同的越界裁剪
+    boxes = np.clip(boxes, 0, [w, h, w, h])
+    fill_boxes = np.clip(fill_boxes, 0, [w, h, w, h])
+
+    # 1. 在原图上一次算好全部统计量；边框的均值、方差与平面拟合都由行列前缀和按 O(1) 查出
+    sums = BorderSums(image_cv, boxes)
+    coef, residual, center_y, center_x, scale = sums.plane_fit(boxes)
+    # 边框颜色完全一致（方差为 0）的矩形，多样性为 0、主色即均值，不必统计颜色直方图
+    uniform = sums.variance(boxes)[:, :3].max(axis=1) < 1e-6
+    diversity = np.zeros(len(boxes))
+    colors = np.zeros((len(boxes), 3), dtype=np.uint8)
+    colors[uniform] = sums.mean(boxes[uniform])[:, :3]
+    others = np.flatnonzero(~uniform)
+    if len(others):
+        stats = compute_edge_diversity_batch(image_cv, boxes[others], tolerance=tolerance)
+        diversity[others] = [d for d, _ in stats]
+        colors[others] = [c for _, c in stats]
+
+    actions = np.where(residual < GRADIENT_MAX_RESIDUAL, GRADIENT, FILL)
+    actions[diversity < FLAT_DIVERSITY] = FILL
+    if keep_diversity is not None and background is not None:
+        actions[diversity >= keep_diversity] = KEEP
+
+    # 2. 按面积从大到小写回，小矩形覆盖在大矩形上；面积相同时按坐标排序，
+    #    写回顺序只由矩形本身决定，与传入顺序无关
+    area = (fill_boxes[:, 2] - fill_boxes[:, 0]) * (fill_boxes[:, 3] - fill_boxes[:, 1])
+    order = np.lexsort((*fill_boxes.T[::-1], -area))
+    for i in order:
+        l, t, r, b = fill_boxes[i]
+        if r <= l or b <= t:
+            continue
+        if actions[i] == GRADIENT:
+            xn = (np.arange(l, r) - center_x[i]) / scale[i]
+            yn = (np.arange(t, b) - center_y[i]) / scale[i]
+            plane = coef[i, 0] + xn[None, :, None] * coef[i, 1] + yn[:, None, None] * coef[i, 2]
+            image_cv[t:b, l:r] = np.clip(plane, 0, 255)
+        elif actions[i] == KEEP:
+            image_cv[t:b, l:r] = background[t:b, l:r]
+        else:
+            image_cv[t:b, l:r] = colors[i]
+
+    return [(ACTIONS[actions[i]], diversity[i], colors[i].tolist()) for i in range(len(boxes))]
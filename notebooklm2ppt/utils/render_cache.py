@@ -0,0 +1,152 @@
+"""按内容寻址的页面渲染缓存"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+from pathlib import Path
+from ..config_defaults import DEFAULT_RENDER_CACHE_SETTINGS
+
+
+# 渲染流程发生不兼容变化时递增，使旧缓存自动失效
+CACHE_VERSION = 4
+
+
+class RenderCache:
+    """
+    页面渲染结果缓存
+
+    缓存键由 (PDF 内容摘要, 页码, DPI, 修复方法, 是否宽屏, 是否提取整页位图, 分块渲染预算) 决定，
+    因此不同参数、或内容已变化的同名 PDF 不会误用旧图片。
+    manifest.json 记录每个条目的大小与最近使用时间，
+    总大小超过上限时按 LRU 淘汰。get/put 只修改内存中的清单，由调用方在一批页面处理完后调用 save 写盘一次。
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        """
+        参数：
+            cache_dir: 缓存目录，默认见 DEFAULT_RENDER_CACHE_SETTINGS
+            max_bytes: 缓存总大小上限（字节）
+        """
+        if cache_dir is None:
+            cache_dir = DEFAULT_RENDER_CACHE_SETTINGS["cache_dir"]
+        if max_bytes is None:
+            max_bytes = DEFAULT_RENDER_CACHE_SETTINGS["max_bytes"]
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.manifest_path = self.cache_dir / "manifest.json"
+        self._digests = {}
+        self._dirty = False
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            print(f"⚠ 缓存清单损坏，已重置: {self.manifest_path}")
+            return {}
+        if manifest.get("version") != CACHE_VERSION:
+            return {}
+        return manifest.get("entries", {})
+
+    def save(self):
+        """清单有改动时写回 manifest.json"""
+        if not self._dirty:
+            return
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_VERSION, "entries": self.manifest}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        self._dirty = False
+
+    def pdf_digest(self, pdf_path):
+        """计算 PDF 文件内容的 SHA-256，按 (路径, 大小, 修改时间) 记忆结果"""
+        stat = os.stat(pdf_path)
+        memo_key = (os.path.abspath(pdf_path), stat.st_size, stat.st_mtime_ns)
+        digest = self._digests.get(memo_key)
+        if digest is None:
+            h = hashlib.sha256()
+            with open(pdf_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    h.update(block)
+            digest = h.hexdigest()
+            self._digests[memo_key] = digest
+        return digest
+
+    @staticmethod
+    def make_key(pdf_digest, page_num, dpi, inpaint_method=None, make_wide_screen=False, extract_images=False,
+                 max_render_bytes=None):
+        """
+        生成缓存键
+
+        参数：
+            pdf_digest: PDF 内容摘要
+            page_num: 页码（从 1 开始）
+            dpi: 分辨率
+            inpaint_method: 修复方法 ID，不修复时为 None
+            make_wide_screen: 是否宽屏
+            extract_images: 是否直接提取整页位图
+            max_render_bytes: 分块渲染的内存预算，None 或 0 表示不限制。
+                              分块与整页渲染的抗锯齿和图片采样相位略有差异，结果并非逐字节相同，因此计入键中
+        """
+        raw = json.dumps([CACHE_VERSION, pdf_digest, page_num, dpi, inpaint_method, bool(make_wide_screen), bool(extract_images),
+                          max_render_bytes or None])
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key, dest_path):
+        """命中时将缓存图片复制到 dest_path 并返回 True"""
+        entry = self.manifest.get(key)
+        if entry is None:
+            return False
+        cached_path = self.cache_dir / entry["file"]
+        if not cached_path.exists():
+            del self.manifest[key]
+            self._dirty = True
+            return False
+        # 使用复制而非硬链接，避免下游原地覆盖输出文件时污染缓存
+        shutil.copyfile(cached_path, dest_path)
+        entry["last_used"] = time.time()
+        self._dirty = True
+        return True
+
+    def put(self, key, src_path):
+        """将 src_path 存入缓存，必要时按 LRU 淘汰旧条目"""
+        file_name = f"{key}{Path(src_path).suffix}"
+        shutil.copyfile(src_path, self.cache_dir / file_name)
+        self.manifest[key] = {
+            "file": file_name,
+            "size": os.path.getsize(src_path),
+            "last_used": time.time(),
+        }
+        self._evict()
+        self._dirty = True
+
+    def _evict(self):
+        total = sum(entry["size"] for entry in self.manifest.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self.manifest.items(), key=lambda kv: kv[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self.cache_dir / entry["file"])
+            except FileNotFoundError:
+                pass
+            total -= entry["size"]
+            del self.manifest[key]
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """获取进程内共享的默认缓存实例"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = RenderCache()
+    return _default_cache
@@ -0,0 +1,116 @@
+"""超大页面的分块渲染与分条带 PNG 写出，峰值内存受限于给定预算"""
+
+import math
+import os
+import struct
+import tempfile
+import zlib
+import fitz  # PyMuPDF
+import numpy as np
+
+# 分块之间的重叠像素数：每块四周多渲染这么多再裁掉
+TILE_OVERLAP = 16
+# 整行条带至少要有的有效行数，预算连这都放不下时才改用方块
+MIN_STRIP_ROWS = 16
+
+
+def get_render_size(page, mat):
+    """按渲染矩阵计算整页像素尺寸 (width, height)，与 get_pixmap 一致"""
+    irect = (page.rect * mat).irect
+    return irect.width, irect.height
+
+
+def render_page_tiled(page, mat, max_bytes, tmp_dir=None):
+    """
+    按 clip 分块渲染整页，写入磁盘上的 np.memmap
+
+    参数：
+        page: fitz.Page
+        mat: 渲染矩阵
+        max_bytes: 单个分块 pixmap 允许占用的最大字节数
+        tmp_dir: 临时文件目录
+
+    返回：
+        np.memmap: (H, W, 3) uint8，对应的临时文件路径为 .filename，用完需自行删除
+    """
+    full = (page.rect * mat).irect
+    width, height = full.width, full.height
+
+    fd, tmp_path = tempfile.mkstemp(suffix='.raw', dir=tmp_dir)
+    os.close(fd)
+    image = np.memmap(tmp_path, dtype=np.uint8, mode='w+', shape=(height, width, 3))
+
+    # 优先整行条带：MuPDF 的图片采样起点随 clip 变化，方块在行列两个方向上都会错开相位，
+    # 条带与整页渲染之间只有源像素边界一两个设备像素的移动
+    if width * 3 * (MIN_STRIP_ROWS + 2 * TILE_OVERLAP) <= max_bytes:
+        tile_w = width
+    else:
+        tile_w = max(64, int(math.sqrt(max_bytes / 3)) - 2 * TILE_OVERLAP)
+    tile_h = max(1, max_bytes // ((tile_w + 2 * TILE_OVERLAP) * 3) - 2 * TILE_OVERLAP)
+
+    inv = ~mat
+    for ty in range(0, height, tile_h):
+        for tx in range(0, width, tile_w):
+            x0, y0 = tx, ty
+            x1, y1 = min(tx + tile_w, width), min(ty + tile_h, height)
+            # clip 取整数设备坐标，并向四周多渲染 TILE_OVERLAP 像素再裁掉，
+            # 分块边缘的抗锯齿与图片采样边界不会落进结果
+            clip = fitz.Rect(full.x0 + max(0, x0 - TILE_OVERLAP), full.y0 + max(0, y0 - TILE_OVERLAP),
+                             full.x0 + min(width, x1 + TILE_OVERLAP), full.y0 + min(height, y1 + TILE_OVERLAP))
+            pix = page.get_pixmap(matrix=mat, clip=clip * inv, alpha=False)
+            tile = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)
+            tile = tile[:, :pix.width * 3].reshape(pix.height, pix.width, 3)
+            # 反算 clip 的浮点误差可能让 pixmap 多出或少一行/列，以其实际位置为准
+            px0, py0 = pix.x - full.x0, pix.y - full.y0
+            dx0, dy0 = max(x0, px0), max(y0, py0)
+            dx1, dy1 = min(x1, px0 + pix.width), min(y1, py0 + pix.height)
+            if dx1 > dx0 and dy1 > dy0:
+                image[dy0:dy1, dx0:dx1] = tile[dy0 - py0:dy1 - py0, dx0 - px0:dx1 - px0]
+            del tile, pix
+    return image
+
+
+def _png_chunk(chunk_type, data):
+    return (struct.pack('>I', len(data)) + chunk_type + data +
+            struct.pack('>I', zlib.crc32(chunk_type + data) & 0xffffffff))
+
+
+def write_png_strips(image, output_path, target_width=None, max_bytes=64 * 1024 * 1024):
+    """
+    分条带把 (H, W, 3) uint8 数组写成 PNG，不需要一次性持有整张图
+
+    参数：
+        image: 图片数组，可为 np.memmap
+        output_path: 输出 PNG 路径
+        target_width: 输出宽度；大于原宽度时左右补白，小于时居中裁剪（宽屏调整）
+        max_bytes: 每个条带的最大字节数
+    """
+    height, width = image.shape[:2]
+    if target_width is None:
+        target_width = width
+    if target_width >= width:
+        src_x0, dst_x0, copy_w = 0, (target_width - width) // 2, width
+    else:
+        src_x0, dst_x0, copy_w = (width - target_width) // 2, 0, target_width
+
+    row_bytes = target_width * 3
+    rows_per_strip = max(1, max_bytes // (row_bytes + 1))
+    compressor = zlib.compressobj(6)
+    with open(output_path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(_png_chunk(b'IHDR', struct.pack('>IIBBBBB', target_width, height, 8, 2, 0, 0, 0)))
+        for y in range(0, height, rows_per_strip):
+            rows = min(rows_per_strip, height - y)
+            strip = np.full((rows, target_width, 3), 255, dtype=np.uint8)
+            strip[:, dst_x0:dst_x0 + copy_w] = image[y:y + rows, src_x0:src_x0 + copy_w]
+            # 每行使用 Sub 过滤器：与左侧像素做差，压缩率接近 PIL 的默认输出
+            filtered = np.empty((rows, row_bytes + 1), dtype=np.uint8)
+            filtered[:, 0] = 1
+            flat = strip.reshape(rows, row_bytes)
+            filtered[:, 1:4] = flat[:, :3]
+            filtered[:, 4:] = flat[:, 3:] - flat[:, :-3]
+            data = compressor.compress(filtered.tobytes())
+            if data:
+                f.write(_png_chunk(b'IDAT', data))
+        f.write(_png_chunk(b'IDAT', compressor.flush()))
+        f.write(_png_chunk(b'IEND', b''))
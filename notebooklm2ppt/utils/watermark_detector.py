@@ -0,0 +1,202 @@
+"""NotebookLM 水印定位：在右下角的降采样搜索窗口内做模板匹配，并按文档缓存命中位置"""
+
+from pathlib import Path
+import numpy as np
+from PIL import Image
+from scipy import ndimage as ndi
+from scipy.signal import fftconvolve
+
+
+TEMPLATE_PATH = Path(__file__).resolve().parent.parent / "assets" / "watermark_template.png"
+
+# 模板取自 2867x1600 页面上的水印矩形 [1536:1598, 2627:2863]
+REFERENCE_WIDTH, REFERENCE_HEIGHT = 2867, 1600
+
+# 搜索窗口：从右下角起、按参考尺寸换算的范围，足以覆盖水印的正常偏移
+SEARCH_HEIGHT, SEARCH_WIDTH = 200, 520
+# 粗匹配时把模板缩小到约这个宽度
+COARSE_TEMPLATE_WIDTH = 60
+# 模板中与背景灰度相差超过该值的像素视为水印笔画
+GLYPH_THRESHOLD = 8
+
+
+def _to_gray(image):
+    """(H, W, 3) uint8 -> (H, W) float32 灰度"""
+    if image.ndim == 2:
+        return image.astype(np.float32)
+    return image[..., :3].astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def _resize(gray, width, height):
+    return np.asarray(Image.fromarray(gray).resize((width, height), Image.BOX), dtype=np.float32)
+
+
+def match_template(window, template):
+    """
+    归一化互相关（NCC）模板匹配
+
+    分子用 FFT 卷积一次算出所有位置的互相关，分母所需的局部均值与方差用积分图
+    按 O(1) 求出，整体代价与窗口大小成正比，与模板大小无关。
+
+    参数:
+        window: 搜索窗口 (H, W) 灰度
+        template: 模板 (h, w) 灰度，需不大于窗口
+
+    返回:
+        np.ndarray: (H-h+1, W-w+1) 的 NCC 值，取值 [-1, 1]
+    """
+    window = window.astype(np.float64)
+    template = template.astype(np.float64)
+    th, tw = template.shape
+    n = th * tw
+
+    t = template - template.mean()
+    t_norm = np.sqrt((t * t).sum())
+    numerator = fftconvolve(window, t[::-1, ::-1], mode='valid')
+
+    def box_sum(a):
+        s = np.pad(a.cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+        return s[th:, tw:] - s[:-th, tw:] - s[th:, :-tw] + s[:-th, :-tw]
+
+    local_sum = box_sum(window)
+    local_var = box_sum(window * window) - local_sum * local_sum / n
+    denominator = np.sqrt(np.maximum(local_var, 0)) * t_norm
+    # 纯色区域方差为 0，不可能含有水印
+    return np.where(denominator > 1e-6 * n, numerator / np.maximum(denominator, 1e-12), 0)
+
+
+class WatermarkDetector:
+    """
+    NotebookLM 水印检测器
+
+    同一文档的水印位置固定：第一次在整个搜索窗口中找到水印后记住位置，
+    之后的页面只在该位置附近做一次小范围校验；校验失败再重新全窗口搜索。
+    找不到水印的页面返回 None，调用方应跳过修复。
+    页面比例不是 16:9 时，会分别按宽度、高度换算的缩放比例搜索。
+    """
+
+    def __init__(self, threshold=0.6, template_path=TEMPLATE_PATH):
+        """
+        参数：
+            threshold: NCC 绝对值超过该阈值才认为存在水印
+            template_path: 模板图片路径
+        """
+        self.threshold = threshold
+        self.template = _to_gray(np.asarray(Image.open(template_path).convert('L')))
+        # (页面宽, 页面高) -> 最近一次命中的 (r1, r2, c1, c2)
+        self._hits = {}
+        self._templates = {}
+        # (高, 宽, 膨胀像素数) -> 笔画遮罩
+        self._glyph_masks = {}
+
+    def _scaled_template(self, scale):
+        """按缩放比例返回模板（结果缓存）"""
+        th, tw = self.template.shape
+        size = (max(1, round(tw * scale)), max(1, round(th * scale)))
+        if size not in self._templates:
+            self._templates[size] = _resize(self.template, *size)
+        return self._templates[size]
+
+    def _verify(self, gray_window, template):
+        """在给定位置附近做小范围匹配，返回 (得分, dy, dx)"""
+        if gray_window.shape[0] < template.shape[0] or gray_window.shape[1] < template.shape[1]:
+            return 0.0, 0, 0
+        score = np.abs(match_template(gray_window, template))
+        dy, dx = np.unravel_index(np.argmax(score), score.shape)
+        return float(score[dy, dx]), dy, dx
+
+    def _search(self, image, scale):
+        """在右下角窗口中按给定缩放比例搜索，返回 (得分, 矩形)"""
+        height, width = image.shape[:2]
+        template = self._scaled_template(scale)
+        th, tw = template.shape
+        y0 = max(0, height - round(SEARCH_HEIGHT * scale))
+        x0 = max(0, width - round(SEARCH_WIDTH * scale))
+        if height - y0 < th or width - x0 < tw:
+            return 0.0, None
+
+        # 粗匹配：窗口与模板同比例缩小
+        factor = max(1, tw // COARSE_TEMPLATE_WIDTH)
+        window = _to_gray(image[y0:height, x0:width])
+        if factor > 1:
+            small_window = _resize(window, window.shape[1] // factor, window.shape[0] // factor)
+            small_template = _resize(template, tw // factor, th // factor)
+        else:
+            small_window, small_template = window, template
+        coarse = np.abs(match_template(small_window, small_template))
+        cy, cx = np.unravel_index(np.argmax(coarse), coarse.shape)
+
+        # 精匹配：在粗结果附近一个降采样步长内逐像素对齐
+        ry0, rx0 = max(0, cy * factor - factor), max(0, cx * factor - factor)
+        refine = window[ry0:ry0 + th + 2 * factor, rx0:rx0 + tw + 2 * factor]
+        score, dy, dx = self._verify(refine, template)
+        r1, c1 = int(y0 + ry0 + dy), int(x0 + rx0 + dx)
+        return score, (r1, r1 + th, c1, c1 + tw)
+
+    def locate(self, image):
+        """
+        定位一页中的水印
+
+        参数：
+            image: (H, W, 3) uint8 数组（可为 np.memmap，只会读取右下角窗口）
+
+        返回：
+            tuple 或 None: 水印矩形 (r1, r2, c1, c2)，行列范围左闭右开；未检测到时为 None
+        """
+        height, width = image.shape[:2]
+        key = (width, height)
+
+        hit = self._hits.get(key)
+        if hit is not None:
+            r1, r2, c1, c2 = hit
+            margin = 2
+            y0, x0 = max(0, r1 - margin), max(0, c1 - margin)
+            window = _to_gray(image[y0:r2 + margin, x0:c2 + margin])
+            score, dy, dx = self._verify(window, self._scaled_template((c2 - c1) / self.template.shape[1]))
+            if score >= self.threshold:
+                r1, c1 = int(y0 + dy), int(x0 + dx)
+                rect = (r1, r1 + (r2 - hit[0]), c1, c1 + (c2 - hit[2]))
+                self._hits[key] = rect
+                return rect
+
+        # 16:9 页面两个比例相同；其他比例分别尝试，取得分最高者
+        scales = {round(width / REFERENCE_WIDTH, 3), round(height / REFERENCE_HEIGHT, 3)}
+        best_score, best_rect = 0.0, None
+        for scale in scales:
+            score, rect = self._search(image, scale)
+            if score > best_score:
+                best_score, best_rect = score, rect
+        if best_score < self.threshold:
+            return None
+        self._hits[key] = best_rect
+        return best_rect
+
+    def glyph_mask(self, rect, dilation=2):
+        """
+        水印笔画的精确遮罩（而非整个矩形）
+
+        把模板缩放到命中矩形的尺寸，与模板背景灰度相差较大的像素即为笔画，
+        再向外膨胀 dilation 像素以覆盖抗锯齿的边缘。结果按尺寸缓存，同一文档只计算一次。
+
+        参数：
+            rect: locate 返回的水印矩形 (r1, r2, c1, c2)
+            dilation: 膨胀的像素数
+
+        返回：
+            np.ndarray: (r2-r1, c2-c1) 布尔数组
+        """
+        r1, r2, c1, c2 = rect
+        height, width = r2 - r1, c2 - c1
+        cache_key = (height, width, dilation)
+        mask = self._glyph_masks.get(cache_key)
+        if mask is None:
+            if (height, width) == self.template.shape:
+                template = self.template
+            else:
+                template = _resize(self.template, width, height)
+            border = np.concatenate([template[0], template[-1], template[:, 0], template[:, -1]])
+            mask = np.abs(template - np.median(border)) > GLYPH_THRESHOLD
+            if dilation:
+                mask = ndi.binary_dilation(mask, iterations=dilation)
+            self._glyph_masks[cache_key] = mask
+        return mask
@@ -0,0 +1,137 @@
+"""
+水印修复的单页内存基准
+
+在宽 2867 像素的纹理合成页面（floyd.pdf 第 1 页的水印笔画贴在条纹背景上，不会走直接填充）上，
+用 tracemalloc 测量每种修复方式处理一页时的：
+
+- 峰值内存，以及峰值相当于几张整页 uint8 图片；
+- 整页级分配次数：逐行跟踪执行，统计临时分配达到一张整页 uint8 图片大小的语句执行次数
+  （嵌套调用中的分配计入最内层正在执行的 Python 语句），即每页产生了多少个整页大小的临时数组。
+
+每种方式先在副本上预热一次（构建并缓存修复计划），再测量，即文档中后续各页的稳态开销。
+
+用法:
+    python tests/benchmark_inpaint_memory.py [pdf文件]
+
+对比改动前后时，分别在两个提交上运行本脚本即可。
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import fitz  # PyMuPDF
+import numpy as np
+
+# 确保可以导入项目中的模块
+sys.path.append(str(Path(__file__).parent.parent))
+from notebooklm2ppt.utils.image_inpainter import INPAINT_METHODS, inpaint_array
+from notebooklm2ppt.utils.inpaint_methods import inpaint_manual, inpaint_numpy_onion, inpaint_scipy_griddata
+from notebooklm2ppt.utils.watermark_detector import WatermarkDetector
+
+PAGE_WIDTH = 2867
+
+
+def make_page(pdf_path):
+    """
+    生成带水印的纹理页面
+
+    返回:
+        (page, mask): (H, W, 3) uint8 页面与 (H, W) uint8 水印遮罩（笔画为 255）
+    """
+    doc = fitz.open(pdf_path)
+    zoom = PAGE_WIDTH / doc[0].rect.width
+    pix = doc[0].get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    source = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3)
+
+    detector = WatermarkDetector()
+    rect = detector.locate(source)
+    if rect is None:
+        raise ValueError(f"{pdf_path} 第 1 页没有检测到水印")
+    r1, r2, c1, c2 = rect
+    glyph = detector.glyph_mask(rect)
+
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[0:pix.height, 0:pix.width]
+    base = 150 + 50 * np.sin(xx / 7.0) * np.cos(yy / 9.0) + rng.normal(0, 10, xx.shape)
+    page = np.repeat(np.clip(base, 0, 255).astype(np.uint8)[..., None], 3, axis=2)
+    page[r1:r2, c1:c2][glyph] = source[r1:r2, c1:c2][glyph]
+
+    mask = np.zeros(page.shape[:2], dtype=np.uint8)
+    mask[r1:r2, c1:c2][glyph] = 255
+    return page, mask
+
+
+def count_large_allocations(func, image, threshold):
+    """逐行跟踪执行 func(image)，返回临时分配不少于 threshold 字节的语句执行次数"""
+    count = 0
+    line_start = 0
+
+    def tracer(frame, event, arg):
+        nonlocal count, line_start
+        if event in ('line', 'return'):
+            current, peak = tracemalloc.get_traced_memory()
+            if peak - line_start >= threshold:
+                count += 1
+            tracemalloc.reset_peak()
+            line_start = current
+        return tracer
+
+    tracemalloc.start()
+    sys.settrace(tracer)
+    try:
+        func(image)
+    finally:
+        sys.settrace(None)
+        tracemalloc.stop()
+    return count
+
+
+def measure(func, page):
+    """
+    预热一次后测量 func(page 副本)
+
+    返回:
+        (peak, elapsed, large_allocations): 峰值内存（字节）、耗时（秒）、整页级分配次数
+    """
+    func(page.copy())
+    image = page.copy()
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(image)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # 逐行跟踪会拖慢执行，单独再跑一次计数，不影响上面的耗时
+    large_allocations = count_large_allocations(func, page.copy(), page.nbytes)
+    return peak, elapsed, large_allocations
+
+
+def main():
+    pdf_path = sys.argv[1] if len(sys.argv) > 1 else Path(__file__).parent.parent / "examples" / "floyd.pdf"
+    page, mask = make_page(pdf_path)
+    page_bytes = page.nbytes
+    print(f"页面 {page.shape[1]}x{page.shape[0]}，整页 {page_bytes / 2 ** 20:.1f} MB")
+
+    cases = [
+        ('inpaint_manual', lambda image: inpaint_manual(image, mask)),
+        ('inpaint_numpy_onion', lambda image: inpaint_numpy_onion(image, mask)),
+        ('inpaint_scipy_griddata', lambda image: inpaint_scipy_griddata(image, mask)),
+    ]
+    for method in INPAINT_METHODS:
+        if method['id'] == 'auto':
+            continue
+        detector = WatermarkDetector()
+        cases.append((f"inpaint_array[{method['id']}]",
+                      lambda image, method_id=method['id'], detector=detector:
+                      inpaint_array(image, method_id, detector=detector)))
+
+    print(f"{'方式':<34}{'峰值 MB':>10}{'整页倍数':>10}{'整页级分配':>10}{'耗时 s':>10}")
+    for name, func in cases:
+        peak, elapsed, large_allocations = measure(func, page)
+        print(f"{name:<34}{peak / 2 ** 20:>10.1f}{peak / page_bytes:>10.2f}{large_allocations:>10d}{elapsed:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
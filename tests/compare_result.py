@@ -8,6 +8,7 @@ from PIL import Image
 # 确保可以导入项目中的模块
 sys.path.append(str(Path(__file__).parent.parent))
 from notebooklm2ppt.pdf2png import pdf_to_png
+from notebooklm2ppt.utils.render_cache import get_default_cache
 
 def pptx_to_pdf(pptx_path, pdf_output_path):
     """
@@ -69,16 +70,17 @@ def compare_pdf_and_pptx(pdf_path, pptx1_path, pptx2_path, output_dir=None, dpi=
     
     print("\n正在将源PDF转换为JPG...")
     # 为了区分不同来源的图片，我们先转换到临时目录，然后重命名到统一目录
+    cache = get_default_cache()
     temp_pdf_dir = output_dir / "temp_pdf"
-    pdf_jpgs = pdf_to_png(pdf_path, temp_pdf_dir, dpi=dpi, force_regenerate=True)
+    pdf_jpgs = pdf_to_png(pdf_path, temp_pdf_dir, dpi=dpi, cache=cache)
     
     print("\n正在将第一个PPTX转换的PDF转换为JPG...")
     temp_pptx1_dir = output_dir / "temp_pptx1"
-    pptx1_jpgs = pdf_to_png(str(pptx1_pdf), temp_pptx1_dir, dpi=dpi, force_regenerate=True)
+    pptx1_jpgs = pdf_to_png(str(pptx1_pdf), temp_pptx1_dir, dpi=dpi, cache=cache)
     
     print("\n正在将第二个PPTX转换的PDF转换为JPG...")
     temp_pptx2_dir = output_dir / "temp_pptx2"
-    pptx2_jpgs = pdf_to_png(str(pptx2_pdf), temp_pptx2_dir, dpi=dpi, force_regenerate=True)
+    pptx2_jpgs = pdf_to_png(str(pptx2_pdf), temp_pptx2_dir, dpi=dpi, cache=cache)
     
     # 创建统一的JPG目录
     jpg_dir.mkdir(exist_ok=True)
@@ -0,0 +1,106 @@
+"""边缘颜色统计的测试"""
+
+import numpy as np
+import pytest
+
+from notebooklm2ppt.utils.edge_diversity import (
+    BorderSums, border_pixels, polynomial_terms,
+    compute_edge_diversity_batch, compute_edge_diversity_numpy, compute_edge_average_color)
+
+WHITE = [255, 255, 255]
+
+
+def _reference_edges(image_cv, left, top, right, bottom):
+    """逐个矩形切片取四条边的参考实现（非退化矩形）"""
+    h, w = image_cv.shape[:2]
+    left, top = max(0, round(left)), max(0, round(top))
+    right, bottom = min(w, round(right)), min(h, round(bottom))
+    edges = [image_cv[top:top + 1, left:right], image_cv[bottom - 1:bottom, left:right],
+             image_cv[top:bottom, left:left + 1], image_cv[top:bottom, right - 1:right]]
+    return np.concatenate([e.reshape(-1, 3) for e in edges], axis=0)
+
+
+def _reference_diversity(image_cv, box, tolerance):
+    points = _reference_edges(image_cv, *box)
+    unique, counts = np.unique(points // tolerance, axis=0, return_counts=True)
+    best = np.argmax(counts)
+    mask = np.all(points // tolerance == unique[best], axis=1)
+    return 1 - counts[best] / counts.sum(), np.mean(points[mask], axis=0).astype(np.uint8).tolist()
+
+
+def _image():
+    rng = np.random.default_rng(0)
+    image = np.full((60, 80, 3), 240, dtype=np.uint8)
+    image[20:40] = rng.integers(0, 256, size=(20, 80, 3), dtype=np.uint8)
+    return image
+
+
+def _random_boxes(rng, count):
+    x = np.sort(rng.uniform(-10, 90, size=(count, 2)), axis=1)
+    y = np.sort(rng.uniform(-10, 70, size=(count, 2)), axis=1)
+    boxes = np.stack([x[:, 0], y[:, 0], x[:, 1], y[:, 1]], axis=1)
+    rounded = np.clip(np.round(boxes), 0, [80, 60, 80, 60])
+    keep = (rounded[:, 2] > rounded[:, 0]) & (rounded[:, 3] > rounded[:, 1])
+    return boxes[keep]
+
+
+@pytest.mark.parametrize("tolerance", [3, 15, 40])
+def test_batch_matches_reference(tolerance):
+    image = _image()
+    boxes = _random_boxes(np.random.default_rng(1), 200)
+    results = compute_edge_diversity_batch(image, boxes, tolerance)
+    for box, (diversity, color) in zip(boxes, results):
+        ref_diversity, ref_color = _reference_diversity(image, box, tolerance)
+        assert diversity == pytest.approx(ref_diversity)
+        assert color == ref_color
+
+
+def test_average_color_matches_reference():
+    image = _image()
+    for box in _random_boxes(np.random.default_rng(2), 50):
+        expected = np.mean(_reference_edges(image, *box), axis=0).astype(np.uint8).tolist()
+        assert compute_edge_average_color(image, *box) == expected
+
+
+# 宽或高为 0、上下颠倒、完全在图外的矩形都没有边框像素
+DEGENERATE_BOXES = [
+    (10, 10, 10, 30),
+    (10, 10, 30, 10),
+    (0, 25, 0, 35),
+    (30, 20, 20, 40),
+    (85, 10, 95, 20),
+    (10, -20, 30, -5),
+]
+
+
+@pytest.mark.parametrize("box", DEGENERATE_BOXES)
+def test_degenerate_box_has_no_border(box):
+    image = _image()
+    assert compute_edge_diversity_numpy(image, *box) == (1.0, WHITE)
+    assert list(compute_edge_average_color(image, *box)) == WHITE
+
+
+def test_degenerate_boxes_do_not_affect_others():
+    image = _image()
+    normal = [(5, 5, 40, 50), (30, 15, 70, 45)]
+    mixed = compute_edge_diversity_batch(image, list(DEGENERATE_BOXES) + normal)
+    assert mixed[:len(DEGENERATE_BOXES)] == [(1.0, WHITE)] * len(DEGENERATE_BOXES)
+    assert mixed[len(DEGENERATE_BOXES):] == compute_edge_diversity_batch(image, normal)
+
+
+def test_plane_fit_matches_lstsq():
+    rng = np.random.default_rng(3)
+    yy, xx = np.mgrid[0:60, 0:80]
+    image = np.clip(np.stack([yy * 2 + xx, 200 - xx, 100 + yy], axis=2)
+                    + rng.normal(0, 3, size=(60, 80, 3)), 0, 255).astype(np.uint8)
+    boxes = np.array([(5, 5, 40, 50), (30, 15, 72, 45), (0, 0, 80, 60), (10, 10, 12, 13)])
+    coef, residual, center_y, center_x, scale = BorderSums(image, boxes).plane_fit(boxes)
+    box_id, ys, xs = border_pixels(boxes)
+    for i in range(len(boxes)):
+        sel = box_id == i
+        terms = polynomial_terms((ys[sel] - center_y[i]) / scale[i], (xs[sel] - center_x[i]) / scale[i])
+        values = image[ys[sel], xs[sel]].astype(np.float64)
+        expected, *_ = np.linalg.lstsq(terms, values, rcond=None)
+        rms = np.sqrt(np.mean((terms @ expected - values) ** 2))
+        assert np.allclose(coef[i], expected)
+        assert residual[i] == pytest.approx(rms)
@@ -0,0 +1,126 @@
+"""批量修复与 auto 修复方法的测试"""
+
+import numpy as np
+import pytest
+
+from notebooklm2ppt.utils import image_inpainter
+from notebooklm2ppt.utils.image_inpainter import inpaint_arrays, ROI_PAD, PATCHMATCH_ROI_PAD
+
+RECT = (100, 120, 150, 210)
+
+
+class FixedDetector:
+    """水印位置与笔画遮罩固定的检测器"""
+
+    def __init__(self, rect, glyph):
+        self.rect, self.glyph = rect, glyph
+
+    def locate(self, image):
+        return self.rect
+
+    def glyph_mask(self, rect):
+        return self.glyph
+
+
+def _glyph():
+    glyph = np.zeros((RECT[1] - RECT[0], RECT[3] - RECT[2]), dtype=bool)
+    glyph[4:16, 5:55:6] = True
+    glyph[9:11, 5:55] = True
+    return glyph
+
+
+def _page(kind):
+    # smooth 为大尺度的平滑起伏，auto 应选双调和；textured 为条纹，应选纹理合成
+    yy, xx = np.mgrid[0:160, 0:260].astype(np.float64)
+    if kind == 'smooth':
+        base = 128 + 60 * np.sin(xx / 9) * np.cos(yy / 11)
+    else:
+        rng = np.random.default_rng(0)
+        base = 128 + 70 * np.sign(np.sin(xx / 2.5)) + rng.normal(0, 4, xx.shape)
+    image = np.repeat(np.clip(base, 0, 255)[..., None], 3, axis=2).astype(np.uint8)
+    r1, r2, c1, c2 = RECT
+    image[r1:r2, c1:c2][_glyph()] = 250
+    return image
+
+
+@pytest.fixture
+def detector():
+    return FixedDetector(RECT, _glyph())
+
+
+@pytest.fixture
+def roi_sizes(monkeypatch):
+    """记录每个方法实际拿到的 ROI 尺寸"""
+    sizes = {}
+    apply_method = image_inpainter._apply_method
+
+    def recording(batch_rois, mask, r1, r2, c1, c2, method, fill_colors):
+        sizes[method] = batch_rois.shape[1:3]
+        return apply_method(batch_rois, mask, r1, r2, c1, c2, method, fill_colors)
+
+    monkeypatch.setattr(image_inpainter, '_apply_method', recording)
+    return sizes
+
+
+def test_auto_pads_roi_per_resolved_method(detector, roi_sizes):
+    pages = [_page('smooth'), _page('textured'), _page('smooth')]
+    inpaint_arrays(pages, 'auto', detector=detector)
+    r1, r2, c1, c2 = RECT
+    assert roi_sizes['skimage'] == (r2 - r1 + 2 * ROI_PAD, c2 - c1 + 2 * ROI_PAD)
+    assert roi_sizes['patchmatch'] == (r2 - r1 + 2 * PATCHMATCH_ROI_PAD, c2 - c1 + 2 * PATCHMATCH_ROI_PAD)
+
+
+def test_auto_matches_resolved_methods(detector):
+    kinds = ['smooth', 'textured', 'smooth']
+    auto = [_page(kind) for kind in kinds]
+    inpaint_arrays(auto, 'auto', detector=detector)
+    for kind, result in zip(kinds, auto):
+        expected = _page(kind)
+        inpaint_arrays([expected], 'skimage' if kind == 'smooth' else 'patchmatch', detector=detector)
+        assert np.array_equal(result, expected)
+
+
+def test_auto_reports_only_changed_choices(detector, monkeypatch, capsys):
+    monkeypatch.setattr(image_inpainter, '_last_auto_kind', None)
+    # 同一批内、逐页调用之间，都只在选择变化时打印
+    inpaint_arrays([_page('smooth'), _page('smooth'), _page('textured')], 'auto', detector=detector)
+    for kind in ['textured', 'textured', 'smooth', 'smooth']:
+        inpaint_arrays([_page(kind)], 'auto', detector=detector)
+    lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith("自动选择")]
+    assert lines == ["自动选择 smooth skimage", "自动选择 textured patchmatch", "自动选择 smooth skimage"]
+
+
+def _textured_page(seed):
+    # 每页纹理不同且边缘颜色分散，不会走直接填充的捷径
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:160, 0:260].astype(np.float64)
+    base = (128 + 50 * np.sin(xx / rng.uniform(4, 9) + seed) * np.cos(yy / rng.uniform(5, 12))
+            + rng.normal(0, 12, xx.shape))
+    image = np.clip(base[..., None] + rng.normal(0, 6, (1, 1, 3)), 0, 255).astype(np.uint8)
+    r1, r2, c1, c2 = RECT
+    image[r1:r2, c1:c2][_glyph()] = 250
+    return image
+
+
+@pytest.mark.parametrize('method', ['background_smooth', 'onion', 'skimage'])
+def test_batched_matches_per_page(method, detector, monkeypatch):
+    calls = []
+    apply_method = image_inpainter._apply_method
+
+    def recording(batch_rois, *args):
+        calls.append(len(batch_rois))
+        return apply_method(batch_rois, *args)
+
+    monkeypatch.setattr(image_inpainter, '_apply_method', recording)
+
+    seeds = [1, 2, 3, 4]
+    batched = [_textured_page(seed) for seed in seeds]
+    inpaint_arrays(batched, method, detector=detector)
+    # 四页一起进入同一次批量修复，而不是被直接填充或拆开
+    assert calls == [len(seeds)]
+
+    for seed, result in zip(seeds, batched):
+        expected = _textured_page(seed)
+        inpaint_arrays([expected], method, detector=detector)
+        assert not np.array_equal(result, _textured_page(seed))
+        assert np.array_equal(result, expected)
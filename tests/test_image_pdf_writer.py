@@ -0,0 +1,129 @@
+"""ImagePdfWriter 逐页写出图片 PDF 的往返测试"""
+
+import fitz  # PyMuPDF
+import numpy as np
+import pytest
+from PIL import Image
+
+from notebooklm2ppt.utils.image_pdf_writer import ImagePdfWriter, read_png_passthrough
+
+
+def _pixels(width, height, seed):
+    # 平滑渐变加少量噪声：JPEG 压缩后仍接近原图
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width]
+    base = np.stack([xx * 255 // max(1, width - 1), yy * 255 // max(1, height - 1),
+                     (xx + yy) * 127 // max(1, width + height - 2)], axis=-1)
+    return np.clip(base + rng.integers(-3, 4, base.shape), 0, 255).astype(np.uint8)
+
+
+def _make_image(path, kind, width, height, seed):
+    rgb = Image.fromarray(_pixels(width, height, seed))
+    if kind == 'png_rgb':
+        rgb.save(path)
+    elif kind == 'png_l':
+        rgb.convert('L').save(path)
+    elif kind == 'png_rgba':
+        image = rgb.convert('RGBA')
+        image.putalpha(Image.fromarray(_pixels(width, height, seed + 1)[..., 0]))
+        image.save(path)
+    elif kind == 'png_p':
+        rgb.quantize(colors=64).save(path)
+    elif kind == 'jpeg_rgb':
+        rgb.save(path, quality=95)
+    elif kind == 'jpeg_cmyk':
+        rgb.convert('CMYK').save(path, quality=95)
+    return path
+
+
+def _expected(path):
+    """
+    写出器对各格式的约定：灰度保持灰度，其余按 PIL 转为 RGB（透明通道直接丢弃）；
+    RGB JPEG 原样写入，由 MuPDF 自己解码，参照也用 MuPDF 解码原文件
+    """
+    with Image.open(path) as image:
+        if image.format == 'JPEG' and image.mode == 'RGB':
+            pix = fitz.Pixmap(str(path))
+            return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+        if image.mode == 'L':
+            return np.asarray(image)
+        return np.asarray(image.convert('RGB'))
+
+
+def _render(page):
+    colorspace = fitz.csGRAY if page.get_images()[0][5] == 'DeviceGray' else fitz.csRGB
+    pix = page.get_pixmap(colorspace=colorspace, alpha=False)
+    pixels = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+    return pixels[..., 0] if pix.n == 1 else pixels
+
+
+KINDS = ['png_rgb', 'png_l', 'png_rgba', 'png_p', 'jpeg_rgb', 'jpeg_cmyk']
+# 各格式写入 PDF 的方式：PNG IDAT 原样写入带 /Predictor，RGB JPEG 原样写入，其余重新压缩
+FILTERS = {
+    'png_rgb': ('/FlateDecode', True),
+    'png_l': ('/FlateDecode', True),
+    'png_rgba': ('/FlateDecode', False),
+    'png_p': ('/FlateDecode', False),
+    'jpeg_rgb': ('/DCTDecode', False),
+    'jpeg_cmyk': ('/FlateDecode', False),
+}
+
+
+def test_png_passthrough_only_for_8bit_gray_and_rgb(tmp_path):
+    for kind in ['png_rgb', 'png_l', 'png_rgba', 'png_p']:
+        path = _make_image(tmp_path / f'{kind}.png', kind, 40, 30, 0)
+        result = read_png_passthrough(path)
+        if kind in ('png_rgb', 'png_l'):
+            assert result[:3] == (40, 30, 3 if kind == 'png_rgb' else 1)
+        else:
+            assert result is None
+    assert read_png_passthrough(_make_image(tmp_path / 'a.jpg', 'jpeg_rgb', 40, 30, 0)) is None
+
+
+@pytest.mark.parametrize('kind', KINDS)
+def test_round_trip_single_format(tmp_path, kind):
+    suffix = '.jpg' if kind.startswith('jpeg') else '.png'
+    path = _make_image(tmp_path / f'{kind}{suffix}', kind, 64, 48, 1)
+    output = tmp_path / 'out.pdf'
+    with ImagePdfWriter(output) as writer:
+        writer.add_image_page(path)
+
+    doc = fitz.open(output)
+    assert len(doc) == 1
+    assert (doc[0].rect.width, doc[0].rect.height) == (64, 48)
+    xref = doc[0].get_images()[0][0]
+    image_filter, predictor = FILTERS[kind]
+    assert doc.xref_get_key(xref, 'Filter') == ('name', image_filter)
+    assert (doc.xref_get_key(xref, 'DecodeParms/Predictor') == ('int', '15')) == predictor
+    rendered = _render(doc[0])
+    expected = _expected(path)
+    # 1:1 渲染应与参照逐像素一致
+    assert np.array_equal(rendered, expected)
+
+
+def test_multi_page_mixed_sizes(tmp_path):
+    sizes = [(64, 48), (33, 71), (120, 20), (1, 1), (50, 50), (17, 9)]
+    paths = []
+    for i, (kind, (width, height)) in enumerate(zip(KINDS, sizes)):
+        suffix = '.jpg' if kind.startswith('jpeg') else '.png'
+        paths.append(_make_image(tmp_path / f'{i}_{kind}{suffix}', kind, width, height, i))
+    output = tmp_path / 'out.pdf'
+    with ImagePdfWriter(output) as writer:
+        for path in paths:
+            writer.add_image_page(path)
+
+    doc = fitz.open(output)
+    # 手写的交叉引用表必须有效，MuPDF 打开时不应触发修复
+    assert not doc.is_repaired
+    assert len(doc) == len(paths)
+    for page, path, (width, height) in zip(doc, paths, sizes):
+        assert (page.rect.width, page.rect.height) == (width, height)
+        assert np.array_equal(_render(page), _expected(path))
+
+
+def test_exception_leaves_file_closed(tmp_path):
+    output = tmp_path / 'out.pdf'
+    with pytest.raises(FileNotFoundError):
+        with ImagePdfWriter(output) as writer:
+            writer.add_image_page(tmp_path / 'missing.png')
+    assert writer.file.closed
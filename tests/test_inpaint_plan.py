@@ -0,0 +1,247 @@
+"""修复计划与对应的逐页实现之间的一致性测试"""
+
+import numpy as np
+import pytest
+from skimage.restoration import inpaint_biharmonic
+
+from notebooklm2ppt.utils.inpaint_methods import inpaint_manual, inpaint_scipy_griddata
+from notebooklm2ppt.utils.image_inpainter import PATCHMATCH_ROI_PAD, inpaint_arrays
+from notebooklm2ppt.utils.inpaint_plan import (BiharmonicPlan, GriddataPlan, OnionPlan, PatchMatchPlan,
+                                               PlaneFitPlan, PyramidSmoothPlan, SmoothPlan)
+from notebooklm2ppt.utils.watermark_detector import WatermarkDetector
+
+SHAPE = (100, 300)
+
+
+def _background(seed=0):
+    """平滑起伏加噪声的背景"""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:SHAPE[0], 0:SHAPE[1]].astype(np.float64)
+    channels = [120 + 60 * np.sin(xx / 23 + k) * np.cos(yy / 17 - k) + rng.normal(0, 6, SHAPE) for k in range(3)]
+    return np.clip(np.stack(channels, axis=-1), 0, 255).astype(np.uint8)
+
+
+def _rect_mask():
+    mask = np.zeros(SHAPE, dtype=bool)
+    mask[30:70, 60:240] = True
+    return mask
+
+
+def _glyph_mask():
+    """真实水印的笔画遮罩（模板原尺寸），放在页面中部"""
+    detector = WatermarkDetector()
+    th, tw = detector.template.shape
+    mask = np.zeros(SHAPE, dtype=bool)
+    r1, c1 = (SHAPE[0] - th) // 2, (SHAPE[1] - tw) // 2
+    mask[r1:r1 + th, c1:c1 + tw] = detector.glyph_mask((r1, r1 + th, c1, c1 + tw))
+    return mask
+
+
+MASKS = {'rect': _rect_mask, 'glyph': _glyph_mask}
+FILL = (250, 240, 230)
+
+
+def _max_diff(a, b):
+    return np.abs(a.astype(np.int16) - b.astype(np.int16)).max()
+
+
+@pytest.mark.parametrize('mask_kind', MASKS)
+@pytest.mark.parametrize('max_iter', [20, 100])
+def test_smooth_plan_matches_inpaint_manual(mask_kind, max_iter):
+    mask = MASKS[mask_kind]()
+    image = _background()
+    expected = inpaint_manual(image.copy(), mask.astype(np.uint8) * 255, FILL, max_iter=max_iter)
+    plan = SmoothPlan(mask, max_iter)
+    # 矩形遮罩走 DST 闭式解，笔画遮罩走稀疏迭代；浮点取整只允许差 1 级
+    assert plan.spectral == (mask_kind == 'rect')
+    result = plan.apply(image, FILL)
+    assert _max_diff(result, expected) <= 1
+    assert np.array_equal(result[~mask], image[~mask])
+
+
+@pytest.mark.parametrize('mask_kind', MASKS)
+def test_pyramid_smooth_plan_matches_inpaint_manual(mask_kind):
+    # 遮罩高度不超过 base_size 时只有一层，等同于 SmoothPlan
+    mask = MASKS[mask_kind]()
+    image = _background(1)
+    plan = PyramidSmoothPlan(mask, max_iter=100)
+    assert len(plan.plans) == 1
+    expected = inpaint_manual(image.copy(), mask.astype(np.uint8) * 255, FILL, max_iter=100)
+    assert _max_diff(plan.apply(image, FILL), expected) <= 1
+
+
+@pytest.mark.parametrize('mask_kind', MASKS)
+def test_griddata_plan_matches_inpaint_scipy_griddata(mask_kind, monkeypatch):
+    mask = MASKS[mask_kind]()
+    image = _background(2)
+    # 逐页实现用全局随机数采样已知像素；换成与计划相同的固定种子采样，两者使用同一组点
+    monkeypatch.setattr(np.random, 'choice',
+                        lambda n, size, replace: np.random.default_rng(0).choice(n, size, replace=replace))
+    expected = inpaint_scipy_griddata(image.copy(), mask)
+    result = GriddataPlan(mask).apply(image)
+    assert _max_diff(result, expected) <= 1
+    assert np.array_equal(result[~mask], image[~mask])
+
+
+def _skimage_biharmonic(image, mask):
+    return np.rint(inpaint_biharmonic(image, mask, channel_axis=-1) * 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize('mask_kind', MASKS)
+def test_biharmonic_plan_matches_skimage(mask_kind):
+    mask = MASKS[mask_kind]()
+    plan = BiharmonicPlan(mask)
+    assert not plan.fallback
+    pages = np.stack([_background(seed) for seed in range(3)])
+    # 逐页与批量都与 skimage 四舍五入后的结果逐像素一致
+    for page in pages:
+        assert np.array_equal(plan.apply(page), _skimage_biharmonic(page, mask))
+    batch = plan.apply(pages)
+    for page, result in zip(pages, batch):
+        assert np.array_equal(result, _skimage_biharmonic(page, mask))
+
+
+def test_biharmonic_plan_near_edge_falls_back_to_skimage():
+    # 遮罩离图片边界不足两个像素，skimage 会截断模板，计划直接交给 skimage
+    mask = np.zeros(SHAPE, dtype=bool)
+    mask[1:20, 100:180] = True
+    plan = BiharmonicPlan(mask)
+    assert plan.fallback
+    pages = np.stack([_background(seed) for seed in range(2)])
+    batch = plan.apply(pages.copy(), out=None)
+    for page, result in zip(pages, batch):
+        expected = _skimage_biharmonic(page, mask)
+        assert np.array_equal(result, expected)
+        assert np.array_equal(plan.apply(page), expected)
+
+
+def _stripes(shape=SHAPE):
+    """4 像素宽的竖条纹加少量噪声，平滑类方法无法还原"""
+    yy, xx = np.mgrid[0:shape[0], 0:shape[1]]
+    base = np.where((xx // 4) % 2 == 0, 60, 200)[..., None].repeat(3, axis=2)
+    noise = np.random.default_rng(0).integers(-5, 6, base.shape)
+    return np.clip(base + noise, 0, 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize('mask_kind', MASKS)
+def test_patchmatch_reconstructs_texture(mask_kind):
+    mask = MASKS[mask_kind]()
+    truth = _stripes()
+    image = truth.copy()
+    image[mask] = 250
+    result = PatchMatchPlan(mask).apply(image)
+    error = np.abs(result.astype(np.int16) - truth)[mask].mean()
+    onion_error = np.abs(OnionPlan(mask).apply(image).astype(np.int16) - truth)[mask].mean()
+    # 条纹基本复原（噪声幅度为 5），远好于由外向内的平滑填充
+    assert error < 8
+    assert error < 0.2 * onion_error
+    assert np.array_equal(result[~mask], image[~mask])
+
+
+def test_patchmatch_is_deterministic():
+    mask = _glyph_mask()
+    image = _stripes()
+    image[mask] = 250
+    first = PatchMatchPlan(mask).apply(image)
+    # 新建的计划、同一计划的重复调用、批量调用都得到相同结果
+    plan = PatchMatchPlan(mask)
+    assert np.array_equal(plan.apply(image), first)
+    assert np.array_equal(plan.apply(image), first)
+    batch = plan.apply(np.stack([image, image]))
+    assert np.array_equal(batch[0], first) and np.array_equal(batch[1], first)
+    # 种子不同，随机搜索的路径不同
+    assert not np.array_equal(PatchMatchPlan(mask, seed=1).apply(image), first)
+
+
+class FixedDetector:
+    """水印位置与笔画遮罩固定的检测器"""
+
+    def __init__(self, rect, glyph):
+        self.rect, self.glyph = rect, glyph
+
+    def locate(self, image):
+        return self.rect
+
+    def glyph_mask(self, rect):
+        return self.glyph
+
+
+def test_patchmatch_stays_inside_padded_roi():
+    glyph = _glyph_mask()
+    rows, cols = np.nonzero(glyph.any(axis=1))[0], np.nonzero(glyph.any(axis=0))[0]
+    glyph = glyph[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+    page_shape = (400, 700)
+    r1, c1 = 200, 300
+    rect = (r1, r1 + glyph.shape[0], c1, c1 + glyph.shape[1])
+    detector = FixedDetector(rect, glyph)
+
+    page = _stripes(page_shape)
+    page[r1:rect[1], c1:rect[3]][glyph] = 250
+    # ROI 之外换成随机噪声：结果只能取决于带 40 像素边距的 ROI
+    pad = PATCHMATCH_ROI_PAD
+    y1, y2, x1, x2 = r1 - pad, rect[1] + pad, c1 - pad, rect[3] + pad
+    scrambled = np.random.default_rng(1).integers(0, 256, page.shape, dtype=np.uint8)
+    scrambled[y1:y2, x1:x2] = page[y1:y2, x1:x2]
+
+    results = []
+    for original in (page, scrambled):
+        image = original.copy()
+        inpaint_arrays([image], 'patchmatch', detector=detector)
+        changed = np.any(image != original, axis=-1)
+        # 只有水印笔画像素被改写
+        assert not changed[:r1].any() and not changed[rect[1]:].any()
+        assert not changed[:, :c1].any() and not changed[:, rect[3]:].any()
+        assert not (changed[r1:rect[1], c1:rect[3]] & ~glyph).any()
+        results.append(image[y1:y2, x1:x2])
+    assert np.array_equal(results[0], results[1])
+
+
+def _quadratic_background(shape=SHAPE):
+    """各通道系数不同的二次曲面背景（浮点）"""
+    yy, xx = np.mgrid[0:shape[0], 0:shape[1]].astype(np.float64)
+    channels = [
+        40 + 0.8 * yy + 0.3 * xx + 0.002 * (xx - 150) ** 2,
+        200 - 0.5 * yy - 0.2 * xx + 0.001 * xx * yy,
+        120 + 0.01 * (yy - 50) ** 2 - 0.0015 * (xx - 100) ** 2 + 0.1 * xx,
+    ]
+    return np.stack(channels, axis=-1)
+
+
+@pytest.mark.parametrize('mask_kind', MASKS)
+def test_plane_fit_reproduces_quadratic_background(mask_kind):
+    mask = MASKS[mask_kind]()
+    truth = _quadratic_background()
+    assert truth.min() >= 0 and truth.max() <= 255
+    image = np.rint(truth).astype(np.uint8)
+    image[mask] = FILL
+    result = PlaneFitPlan(mask).apply(image)
+    # 环上的输入量化到整数（±0.5），输出四舍五入（±0.5）
+    assert np.abs(result[mask] - truth[mask]).max() <= 1
+    assert np.array_equal(result[~mask], image[~mask])
+    # 输入不量化时拟合精确，遮罩内就是真值四舍五入，环上残差为零
+    exact = PlaneFitPlan(mask).apply(truth)
+    assert np.abs(exact[mask] - truth[mask]).max() <= 0.5 + 1e-9
+    residual, _ = PlaneFitPlan(mask).ring_statistics(truth)
+    assert residual < 1e-8
+
+
+@pytest.mark.parametrize('mask_kind', MASKS)
+def test_plane_fit_ring_residual_matches_lstsq(mask_kind):
+    mask = MASKS[mask_kind]()
+    plan = PlaneFitPlan(mask)
+    pages = np.stack([_background(seed) for seed in range(3)])
+    pages[1] = _stripes()
+    residual, _ = plan.ring_statistics(pages)
+    assert residual.shape == (3,)
+
+    # 直接在原始像素坐标上用 lstsq 拟合二次多项式
+    y, x = np.divmod(plan.ring_idx, SHAPE[1])
+    y, x = y.astype(np.float64), x.astype(np.float64)
+    design = np.stack([np.ones_like(y), y, x, y * y, y * x, x * x], axis=1)
+    for page, expected in zip(pages, residual):
+        values = page.reshape(-1, 3)[plan.ring_idx].astype(np.float64)
+        coef = np.linalg.lstsq(design, values, rcond=None)[0]
+        direct = np.sqrt(np.mean((values - design @ coef) ** 2))
+        assert expected == pytest.approx(direct, rel=1e-6)
+        # 单页调用与批量调用一致
+        assert plan.ring_statistics(page)[0] == pytest.approx(expected, rel=1e-12)
@@ -0,0 +1,37 @@
+"""PDF 文本层布局提取的测试"""
+
+import os
+
+import fitz  # PyMuPDF
+
+from notebooklm2ppt.pdf2png import resolve_workers
+from notebooklm2ppt.utils.native_layout import extract_layout_json, has_text_layer
+
+
+def _text_pdf(path, page_count=5):
+    doc = fitz.open()
+    for i in range(page_count):
+        page = doc.new_page(width=800, height=450)
+        page.insert_text((60, 80), f"Slide {i + 1} title", fontsize=28)
+        page.insert_text((60, 160), f"Body text on page {i + 1}", fontsize=14)
+    doc.save(path)
+    return path
+
+
+def test_resolve_workers():
+    assert resolve_workers(4, 2) == 2
+    assert resolve_workers(1, 10) == 1
+    assert resolve_workers(0, 10_000) == (os.cpu_count() or 1)
+    assert resolve_workers(None, 1) == 1
+    assert resolve_workers(3, 0) == 0
+
+
+def test_workers_match_serial(tmp_path):
+    pdf_path = _text_pdf(tmp_path / "text.pdf")
+    assert has_text_layer(pdf_path)
+    serial = extract_layout_json(pdf_path, dpi=150)
+    parallel = extract_layout_json(pdf_path, dpi=150, workers=2)
+    assert parallel == serial
+    assert serial['dataInfo']['numPages'] == 5
+    texts = [result['prunedResult']['rec_texts'] for result in serial['ocrResults']]
+    assert texts[3] == ["Slide 4 title", "Body text on page 4"]
@@ -0,0 +1,181 @@
+"""逐页渲染迭代器与整页位图提取的测试"""
+
+from pathlib import Path
+
+import fitz  # PyMuPDF
+import numpy as np
+import pytest
+from PIL import Image
+
+from notebooklm2ppt.i18n import get_text
+from notebooklm2ppt.pdf2png import (get_full_page_image_xref, get_page_count, iter_pdf_pages, parse_page_range,
+                                    pdf_to_png, resolve_pages)
+
+EXAMPLE_PDF = Path(__file__).resolve().parent.parent / "examples" / "floyd.pdf"
+
+
+def _image_page(alpha):
+    rng = np.random.default_rng(0)
+    rgba = np.empty((50, 80, 4), dtype=np.uint8)
+    rgba[..., :3] = rng.integers(0, 256, size=(50, 80, 3))
+    rgba[..., 3] = alpha
+    pix = fitz.Pixmap(fitz.csRGB, 80, 50, rgba.tobytes(), True)
+    doc = fitz.open()
+    page = doc.new_page(width=400, height=250)
+    page.insert_image(page.rect, pixmap=pix)
+    return doc, page
+
+
+def test_notebooklm_page_with_opaque_smask_is_full_page_image():
+    doc = fitz.open(EXAMPLE_PDF)
+    for page in doc:
+        xref, smask = page.get_images(full=True)[0][:2]
+        assert smask != 0
+        assert get_full_page_image_xref(page) == xref
+
+
+def test_opaque_smask_is_accepted():
+    doc, page = _image_page(alpha=255)
+    assert page.get_images(full=True)[0][1] != 0
+    assert get_full_page_image_xref(page) == page.get_images(full=True)[0][0]
+
+
+def test_translucent_smask_is_rejected():
+    alpha = np.full((50, 80), 255, dtype=np.uint8)
+    alpha[10:20, 10:20] = 128
+    doc, page = _image_page(alpha=alpha)
+    assert get_full_page_image_xref(page) is None
+
+
+def test_extract_images_writes_original_pixels(tmp_path):
+    names = pdf_to_png(EXAMPLE_PDF, tmp_path, extract_images=True)
+    doc = fitz.open(EXAMPLE_PDF)
+    for name, page in zip(names, doc):
+        xref = page.get_images(full=True)[0][0]
+        original = fitz.Pixmap(doc, xref)
+        expected = np.frombuffer(original.samples, np.uint8).reshape(original.height, original.width, 3)
+        with Image.open(tmp_path / name) as im:
+            assert np.array_equal(np.asarray(im.convert("RGB")), expected)
+
+
+
+@pytest.mark.parametrize('inpaint, inpaint_method', [(False, 'background_smooth'), (True, 'background_smooth'), (True, 'auto')])
+def test_parallel_matches_serial(tmp_path, capsys, inpaint, inpaint_method):
+    outputs = {}
+    for workers in (1, 2):
+        output_dir = tmp_path / f"workers{workers}"
+        names = pdf_to_png(EXAMPLE_PDF, output_dir, inpaint=inpaint, inpaint_method=inpaint_method,
+                           make_wide_screen=True, workers=workers)
+        outputs[workers] = (names, sorted(path.name for path in output_dir.iterdir()),
+                            [(output_dir / name).read_bytes() for name in names])
+    out = capsys.readouterr().out
+    assert "使用 2 个进程并行渲染 2 页" in out
+    # 示例文档带水印，修复时串行流程确实改写了页面
+    assert ("✓ 已修复" in out) == inpaint
+    # 文件名、返回顺序与文件内容都与串行一致
+    assert outputs[1][0] == outputs[1][1] == ["page_0001.png", "page_0002.png"]
+    assert outputs[2] == outputs[1]
+
+
+PAGE_SIZES = [(200, 100), (160, 90), (120, 150), (96, 54)]
+
+
+def _sized_pages(path):
+    """四页尺寸各不相同、底色按页码变化的 PDF"""
+    doc = fitz.open()
+    for i, (width, height) in enumerate(PAGE_SIZES):
+        page = doc.new_page(width=width, height=height)
+        page.draw_rect(page.rect, color=None, fill=(i / 4, 0.5, 1 - i / 4))
+    doc.save(path)
+
+
+def test_iter_pdf_pages_order_dpi_and_shape(tmp_path):
+    pdf_path = tmp_path / "sized.pdf"
+    _sized_pages(pdf_path)
+    doc = fitz.open(pdf_path)
+    pages = list(iter_pdf_pages(pdf_path, dpi=144, pages="4,1-2"))
+    # 按页码升序产出，与 resolve_pages 一致
+    assert [page.page_num for page in pages] == [1, 2, 4]
+    for page in pages:
+        width, height = PAGE_SIZES[page.page_num - 1]
+        assert page.dpi == 144
+        assert page.image.dtype == np.uint8
+        assert page.image.shape == (height * 2, width * 2, 3)
+        expected = doc[page.page_num - 1].get_pixmap(dpi=144, alpha=False)
+        assert page.image.tobytes() == expected.samples
+
+
+def test_iter_pdf_pages_is_zero_copy(tmp_path):
+    pdf_path = tmp_path / "sized.pdf"
+    _sized_pages(pdf_path)
+    page = next(iter_pdf_pages(pdf_path, dpi=72))
+    # image 是 pixmap 像素内存的视图：改动数组即改动 pixmap
+    assert np.shares_memory(page.image, np.frombuffer(page.pixmap.samples_mv, dtype=np.uint8))
+    page.image[3, 5] = (1, 2, 3)
+    assert page.pixmap.pixel(5, 3) == (1, 2, 3)
+
+
+def _gui_parse_page_range(range_str):
+    """改动前 GUI 中的解析函数（开放区间向后展开 10000 页），作为对照"""
+    if not range_str:
+        return None
+    pages = set()
+    range_str = range_str.replace('，', ',')
+    range_str = range_str.replace('—', '-').replace('–', '-').replace('－', '-')
+    for part in [p.strip() for p in range_str.split(',') if p.strip()]:
+        if '-' in part:
+            start_end = part.split('-')
+            if start_end[0] == '':
+                continue
+            start = int(start_end[0])
+            if start_end[1] == '':
+                pages.update(range(start, start + 10000))
+            else:
+                end = int(start_end[1])
+                if end >= start:
+                    pages.update(range(start, end + 1))
+        else:
+            pages.add(int(part))
+    return sorted(pages)
+
+
+@pytest.mark.parametrize('range_str, page_count, expected', [
+    ("3-", 6, [3, 4, 5, 6]),                   # 开放区间按真实页数展开
+    ("5-", 3, []),                             # 开放区间起点超出页数
+    ("2-4,1", 6, [1, 2, 3, 4]),
+    ("4-2", 6, []),                            # 倒序区间忽略
+    ("4-2,5", 6, [5]),
+    ("1-4,3-5,2", 6, [1, 2, 3, 4, 5]),         # 重叠区间去重
+    ("6-,2-3,1-", 6, [1, 2, 3, 4, 5, 6]),
+    (" 1 - 2 ,  5 ,, ", 6, [1, 2, 5]),         # 空白与空段
+    ("1，3—4，6–", 8, [1, 3, 4, 6, 7, 8]),     # 中文逗号与各种破折号
+    ("2－3", 6, [2, 3]),
+    ("-3,2", 6, [2]),                          # 缺起点的区间忽略
+    ("0,1,7,100-200", 6, [1]),                 # 超出 [1, 页数] 的页码丢弃
+    ("3-100", 6, [3, 4, 5, 6]),
+])
+def test_resolve_page_range(range_str, page_count, expected):
+    assert resolve_pages(range_str, page_count) == expected
+    assert resolve_pages(parse_page_range(range_str), page_count) == expected
+    # 与旧 GUI 的解析结果一致（旧结果中超出页数的页码在渲染时被跳过）
+    assert [n for n in _gui_parse_page_range(range_str) if 1 <= n <= page_count] == expected
+
+
+def test_resolve_pages_against_document():
+    page_count = get_page_count(EXAMPLE_PDF)
+    assert page_count == 2
+    assert resolve_pages("2-", page_count) == [2]
+    assert resolve_pages("1,3-", page_count) == [1]
+    assert resolve_pages(None, page_count) == resolve_pages("", page_count) == [1, 2]
+    assert [page.page_num for page in iter_pdf_pages(EXAMPLE_PDF, dpi=10, pages="0-5")] == [1, 2]
+
+
+@pytest.mark.parametrize('range_str', ["a", "1-b", "x-5", "1,,x", "1.5", "1 2", "第1页"])
+def test_invalid_page_range_raises_gui_message(range_str):
+    # 旧 GUI 在这些输入上解析失败，并提示 page_range_error
+    with pytest.raises(ValueError):
+        _gui_parse_page_range(range_str)
+    for parse in (parse_page_range, lambda text: resolve_pages(text, 10)):
+        with pytest.raises(ValueError) as error:
+            parse(range_str)
+        assert str(error.value) == get_text("page_range_error")
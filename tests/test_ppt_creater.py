@@ -0,0 +1,258 @@
+"""ppt_creater 中嵌入图片的匹配、导出与原生布局入口的测试"""
+
+import io
+
+import fitz  # PyMuPDF
+import numpy as np
+import pytest
+from PIL import Image
+
+from notebooklm2ppt.utils import ppt_creater
+from notebooklm2ppt.utils.ppt_creater import (collect_embedded_images, get_line_count, get_line_counts,
+                                            match_embedded_image, save_embedded_image)
+from notebooklm2ppt.utils.render_cache import RenderCache
+
+
+def _png(width, height, seed):
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    return fitz.Pixmap(fitz.csRGB, width, height, pixels.tobytes(), False).tobytes("png")
+
+
+def _blocks(width=60, height=40):
+    """分块纯色图，JPEG 压缩后颜色基本不变"""
+    pixels = np.zeros((height, width, 3), dtype=np.uint8)
+    pixels[..., 0] = 200
+    pixels[:, width // 2:, 1] = 120
+    pixels[:height // 2, :, 2] = 50
+    return pixels
+
+
+def _page_with_image(stream, width=60, height=40):
+    """图片按 1:1 放在 (100, 80) 处，72 DPI 渲染即可逐像素对照"""
+    doc = fitz.open()
+    page = doc.new_page(width=400, height=300)
+    xref = page.insert_image(fitz.Rect(100, 80, 100 + width, 80 + height), stream=stream)
+    return doc, xref
+
+
+def _displayed(doc, width=60, height=40):
+    pix = doc[0].get_pixmap(clip=fitz.Rect(100, 80, 100 + width, 80 + height), alpha=False)
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3)
+
+
+def _saved(path):
+    with Image.open(path) as image:
+        return np.asarray(image.convert('RGBA'))
+
+
+def _page_with_background():
+    doc = fitz.open()
+    page = doc.new_page(width=400, height=300)
+    page.insert_image(page.rect, stream=_png(160, 120, 0))
+    page.insert_image(fitz.Rect(40, 50, 200, 170), stream=_png(64, 48, 1))
+    return doc
+
+
+def test_full_page_background_is_not_collected():
+    doc = _page_with_background()
+    images = collect_embedded_images(doc, 0, (400, 300), 0, 1.0)
+    assert len(images) == 1
+    assert np.allclose(images[0]['bbox'], [40, 50, 200, 170])
+
+
+def test_full_page_block_does_not_embed_background():
+    doc = _page_with_background()
+    images = collect_embedded_images(doc, 0, (400, 300), 0, 1.0)
+    # 覆盖大半页面的图表块与背景的 IoU 很高，但不能匹配到整页背景
+    assert match_embedded_image([10, 10, 390, 290], images) is None
+    assert match_embedded_image([38, 48, 202, 172], images) is images[0]
+
+
+def test_native_layout_requires_text_layer(tmp_path, monkeypatch):
+    # 纯图片页（NotebookLM 导出的典型情况）没有文本层，不能走原生布局
+    pdf_path = tmp_path / "image_only.pdf"
+    _page_with_background().save(pdf_path)
+    calls = []
+    monkeypatch.setattr(ppt_creater, "pdf_to_png", lambda *a, **k: calls.append(k))
+    assert ppt_creater.create_ppt_from_paddle_json(None, str(pdf_path), str(tmp_path / "out")) is None
+    assert calls == []
+
+
+def test_native_layout_passes_workers(tmp_path, monkeypatch):
+    pdf_path = tmp_path / "text.pdf"
+    doc = fitz.open()
+    page = doc.new_page(width=400, height=300)
+    page.insert_text((40, 60), "Native text layer for layout extraction", fontsize=14)
+    doc.save(pdf_path)
+
+    class Stop(Exception):
+        pass
+
+    seen = {}
+
+    def fake_pdf_to_png(*args, **kwargs):
+        seen['png'] = kwargs.get('workers')
+        return []
+
+    def fake_extract(*args, **kwargs):
+        seen['layout'] = kwargs.get('workers')
+        raise Stop
+
+    monkeypatch.setattr(ppt_creater, "pdf_to_png", fake_pdf_to_png)
+    monkeypatch.setattr(ppt_creater, "extract_layout_json", fake_extract)
+    try:
+        ppt_creater.create_ppt_from_paddle_json(None, str(pdf_path), str(tmp_path / "out"), workers=3,
+                                                cache=RenderCache(tmp_path / "cache"))
+    except Stop:
+        pass
+    assert seen == {'png': 3, 'layout': 3}
+
+
+def test_plain_png_is_written_raw(tmp_path):
+    stream = _png(60, 40, 2)
+    doc, xref = _page_with_image(stream)
+    out_path = save_embedded_image(doc, xref, tmp_path / "img")
+    assert out_path.suffix == '.png'
+    assert np.array_equal(_saved(out_path)[..., :3], _displayed(doc))
+
+
+def test_cmyk_jpeg_is_converted(tmp_path):
+    # PIL 写出的是 Adobe CMYK JPEG，PDF 中带反相的 /Decode，原始字节直接用会变成负片
+    buffer = io.BytesIO()
+    Image.fromarray(_blocks()).convert('CMYK').save(buffer, 'JPEG', quality=95)
+    doc, xref = _page_with_image(buffer.getvalue())
+    assert doc.xref_get_key(xref, 'Decode')[0] == 'array'
+    out_path = save_embedded_image(doc, xref, tmp_path / "img")
+    assert out_path.suffix == '.png'
+    saved = _saved(out_path)
+    assert saved.shape[:2] == (40, 60)
+    assert np.abs(saved[..., :3].astype(int) - _displayed(doc)).max() <= 2
+
+
+def test_decode_array_is_applied(tmp_path):
+    doc, xref = _page_with_image(_png(60, 40, 3))
+    doc.xref_set_key(xref, 'Decode', '[1 0 1 0 1 0]')
+    out_path = save_embedded_image(doc, xref, tmp_path / "img")
+    assert np.array_equal(_saved(out_path)[..., :3], _displayed(doc))
+
+
+def test_masks_become_alpha(tmp_path):
+    doc, xref = _page_with_image(_png(60, 40, 4))
+    # 颜色键遮罩：红色分量为 0..127 的像素不绘制
+    doc.xref_set_key(xref, 'Mask', '[0 127 0 255 0 255]')
+    out_path = save_embedded_image(doc, xref, tmp_path / "color_key")
+    pixels = np.asarray(Image.open(io.BytesIO(_png(60, 40, 4))))
+    assert np.array_equal(_saved(out_path)[..., 3] == 0, pixels[..., 0] <= 127)
+
+    # 模板遮罩：左侧 15 列不绘制
+    stencil = np.zeros((40, 60), dtype=np.uint8)
+    stencil[:, :15] = 1
+    mask_xref = doc.get_new_xref()
+    doc.update_object(mask_xref, "<< /Type /XObject /Subtype /Image /Width 60 /Height 40 "
+                                 "/ImageMask true /BitsPerComponent 1 >>")
+    doc.update_stream(mask_xref, np.packbits(stencil, axis=1).tobytes())
+    doc.xref_set_key(xref, 'Mask', f'{mask_xref} 0 R')
+    out_path = save_embedded_image(doc, xref, tmp_path / "stencil")
+    alpha = _saved(out_path)[..., 3]
+    assert (alpha[:, :15] == 0).all() and (alpha[:, 15:] == 255).all()
+
+
+def test_clipped_image_is_not_collected():
+    doc, _ = _page_with_image(_png(60, 40, 5))
+    content = doc[0].get_contents()[0]
+    stream = doc.xref_stream(content)
+    # 只显示图片左半部分
+    doc.update_stream(content, b'q 100 180 30 40 re W n ' + stream + b' Q')
+    assert collect_embedded_images(doc, 0, (400, 300), 0, 1.0) == []
+
+    # 完整包含图片的裁剪范围不影响复用
+    doc.update_stream(content, b'q 0 0 400 300 re W n ' + stream + b' Q')
+    assert len(collect_embedded_images(doc, 0, (400, 300), 0, 1.0)) == 1
+
+
+def _reference_line_count(block_bbox, ocr_boxes):
+    """改为批量计算之前的 get_line_count，逐框扫描，作为对照"""
+    bx1, by1, bx2, by2 = block_bbox
+    contained_boxes = []
+    for obox in ocr_boxes:
+        ox1, oy1, ox2, oy2 = obox
+        cx = (ox1 + ox2) / 2
+        cy = (oy1 + oy2) / 2
+        if bx1 <= cx <= bx2 and by1 <= cy <= by2:
+            contained_boxes.append(obox)
+    if not contained_boxes:
+        return 0
+    contained_boxes.sort(key=lambda b: (b[1] + b[3]) / 2)
+    line_count = 1
+    last_y_center = (contained_boxes[0][1] + contained_boxes[0][3]) / 2
+    last_h = contained_boxes[0][3] - contained_boxes[0][1]
+    for j in range(1, len(contained_boxes)):
+        curr_y_center = (contained_boxes[j][1] + contained_boxes[j][3]) / 2
+        curr_h = contained_boxes[j][3] - contained_boxes[j][1]
+        if abs(curr_y_center - last_y_center) > max(last_h, curr_h) * 0.6:
+            line_count += 1
+            last_y_center = curr_y_center
+            last_h = curr_h
+    return line_count
+
+
+def _random_page(rng, fractional):
+    """按行排布的 OCR 框（行内有抖动，部分行的 y 中心完全相同），以及随机文本块"""
+    boxes = []
+    y = rng.uniform(0, 20)
+    for _ in range(rng.integers(1, 25)):
+        height = rng.uniform(8, 30)
+        x = rng.uniform(0, 50)
+        jitter = 0 if rng.random() < 0.3 else height * 0.4
+        for _ in range(rng.integers(1, 6)):
+            width = rng.uniform(10, 120)
+            top = y + rng.uniform(-jitter, jitter)
+            boxes.append([x, top, x + width, top + height * rng.uniform(0.7, 1.3)])
+            x += width + rng.uniform(2, 20)
+        y += height * rng.uniform(0.5, 2.0)
+    boxes = np.array(boxes)
+    if not fractional:
+        boxes = np.round(boxes)
+    boxes = boxes[rng.permutation(len(boxes))].tolist()
+
+    centers = [((x1 + x2) / 2, (y1 + y2) / 2) for x1, y1, x2, y2 in boxes]
+    blocks = []
+    for _ in range(rng.integers(1, 12)):
+        x1, x2 = np.sort(rng.uniform(-10, 600, 2))
+        y1, y2 = np.sort(rng.uniform(-10, y + 20, 2))
+        blocks.append([x1, y1, x2, y2])
+    # 边界正好落在某些框中心上的文本块：框跨越块边界，中心在边上算作块内
+    for _ in range(4):
+        (cx1, cy1), (cx2, cy2) = (centers[i] for i in rng.integers(0, len(centers), 2))
+        blocks.append([min(cx1, cx2), min(cy1, cy2), max(cx1, cx2), max(cy1, cy2)])
+    return blocks, boxes
+
+
+@pytest.mark.parametrize('fractional', [False, True])
+def test_line_counts_match_reference(fractional):
+    rng = np.random.default_rng(int(fractional))
+    for _ in range(200):
+        blocks, boxes = _random_page(rng, fractional)
+        expected = [_reference_line_count(block, boxes) for block in blocks]
+        assert get_line_counts(blocks, boxes) == expected
+        assert [get_line_count(block, boxes) for block in blocks] == expected
+
+
+def test_line_counts_straddling_band_edges():
+    # 两行框跨越块的上下边界：只有中心落在 [y1, y2] 内（含边界）的框计入
+    boxes = [[0, 0, 40, 20], [50, 0, 90, 20],      # 中心 y=10
+             [0, 25, 40, 45], [50, 26, 90, 44],    # 中心 y=35
+             [0, 50, 40, 70]]                      # 中心 y=60
+    cases = [[0, 10, 100, 35], [0, 10.001, 100, 35], [0, 10, 100, 34.999], [0, 11, 100, 59],
+             [45, 0, 100, 70], [0, 60, 100, 60], [70, 0, 70, 100], [70.001, 0, 100, 100]]
+    expected = [_reference_line_count(block, boxes) for block in cases]
+    assert expected == [2, 1, 1, 1, 2, 1, 2, 0]
+    assert get_line_counts(cases, boxes) == expected
+
+
+def test_line_counts_empty():
+    assert get_line_counts([[0, 0, 100, 100]], []) == [0]
+    assert get_line_count([0, 0, 100, 100], []) == 0
+    assert get_line_counts([], [[0, 0, 10, 10]]) == []
+    assert get_line_counts([[200, 200, 300, 300]], [[0, 0, 10, 10]]) == [0]
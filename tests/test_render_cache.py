@@ -0,0 +1,128 @@
+"""RenderCache 缓存键、命中与淘汰的测试"""
+
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from notebooklm2ppt.pdf2png import pdf_to_png
+from notebooklm2ppt.utils import render_cache
+from notebooklm2ppt.utils.render_cache import RenderCache
+
+FLOYD = Path(__file__).parent.parent / "examples" / "floyd.pdf"
+BASE = dict(dpi=36, inpaint=False, inpaint_method='background_smooth', make_wide_screen=False,
+            extract_images=False, max_render_bytes=None)
+
+
+def _run(tmp_path, cache, capsys, **overrides):
+    """在新目录中转换 floyd.pdf，返回 (命中页数, 输出文件内容)"""
+    kwargs = {**BASE, **overrides}
+    output_dir = tmp_path / f"out_{len(list(tmp_path.glob('out_*')))}"
+    capsys.readouterr()
+    names = pdf_to_png(FLOYD, output_dir, cache=cache, **kwargs)
+    hits = capsys.readouterr().out.count("命中缓存")
+    return hits, [(output_dir / name).read_bytes() for name in names]
+
+
+def test_same_arguments_hit(tmp_path, capsys):
+    cache = RenderCache(tmp_path / "cache")
+    hits, first = _run(tmp_path, cache, capsys)
+    assert hits == 0
+    hits, second = _run(tmp_path, cache, capsys)
+    assert hits == 2
+    assert second == first
+
+
+@pytest.mark.parametrize("field, value", [
+    ("dpi", 48),
+    ("inpaint_method", "onion"),
+    ("make_wide_screen", True),
+    ("extract_images", True),
+    ("max_render_bytes", 256 * 1024),
+])
+def test_each_key_field_misses(tmp_path, capsys, field, value):
+    # 修复方法只在 inpaint=True 时计入键，因此两次都开启修复
+    inpaint = field == "inpaint_method"
+    cache = RenderCache(tmp_path / "cache")
+    _run(tmp_path, cache, capsys, inpaint=inpaint)
+    hits, _ = _run(tmp_path, cache, capsys, inpaint=inpaint, **{field: value})
+    assert hits == 0
+    assert len(cache.manifest) == 4
+    # 改回原参数仍能命中，新条目没有覆盖旧条目
+    hits, _ = _run(tmp_path, cache, capsys, inpaint=inpaint)
+    assert hits == 2
+
+
+def test_make_key_covers_every_field():
+    base = ("digest", 1, 150, None, False, False, None)
+    keys = {RenderCache.make_key(*base)}
+    for i, value in enumerate(["other", 2, 200, "onion", True, True, 1024]):
+        args = list(base)
+        args[i] = value
+        keys.add(RenderCache.make_key(*args))
+    assert len(keys) == 8
+    # 0 与 None 都表示不限制预算
+    assert RenderCache.make_key(*base[:-1], 0) == RenderCache.make_key(*base)
+
+
+def test_force_regenerate_bypasses_cache(tmp_path, capsys, monkeypatch):
+    cache = RenderCache(tmp_path / "cache")
+    _run(tmp_path, cache, capsys)
+
+    def fail(*args):
+        raise AssertionError("force_regenerate 不应读缓存")
+
+    monkeypatch.setattr(cache, "get", fail)
+    hits, _ = _run(tmp_path, cache, capsys, force_regenerate=True)
+    assert hits == 0
+
+
+def test_missing_file_is_a_miss(tmp_path, capsys):
+    cache = RenderCache(tmp_path / "cache")
+    _, first = _run(tmp_path, cache, capsys)
+    entry = next(iter(cache.manifest.values()))
+    (cache.cache_dir / entry["file"]).unlink()
+    hits, second = _run(tmp_path, cache, capsys)
+    assert hits == 1
+    assert second == first
+    assert len(cache.manifest) == 2
+    assert all((cache.cache_dir / e["file"]).exists() for e in cache.manifest.values())
+
+
+def test_manifest_saved_once_per_run(tmp_path, capsys):
+    cache = RenderCache(tmp_path / "cache")
+    _run(tmp_path, cache, capsys)
+    saved = json.loads(cache.manifest_path.read_text(encoding='utf-8'))["entries"]
+    assert saved.keys() == cache.manifest.keys()
+
+    # 命中只更新内存中的清单，save 后才写盘
+    key = next(iter(cache.manifest))
+    assert cache.get(key, tmp_path / "copy.png")
+    on_disk = json.loads(cache.manifest_path.read_text(encoding='utf-8'))["entries"]
+    assert on_disk[key]["last_used"] == saved[key]["last_used"]
+    cache.save()
+    on_disk = json.loads(cache.manifest_path.read_text(encoding='utf-8'))["entries"]
+    assert on_disk[key]["last_used"] == cache.manifest[key]["last_used"]
+
+    # 新实例读到的清单与保存时一致
+    assert RenderCache(tmp_path / "cache").manifest == cache.manifest
+
+
+def test_lru_eviction_keeps_store_under_limit(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(render_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    cache = RenderCache(tmp_path / "cache", max_bytes=250)
+    for name in "abc":
+        src = tmp_path / f"{name}.png"
+        src.write_bytes(name.encode() * 100)
+        cache.put(name, src)
+        now[0] += 1
+        if name == "b":
+            # 访问 a 使其比 b 更新
+            assert cache.get("a", tmp_path / "a_copy.png")
+            now[0] += 1
+
+    assert set(cache.manifest) == {"a", "c"}
+    assert sum(entry["size"] for entry in cache.manifest.values()) <= cache.max_bytes
+    assert sorted(p.name for p in cache.cache_dir.glob("*.png")) == ["a.png", "c.png"]
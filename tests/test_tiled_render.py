@@ -0,0 +1,85 @@
+"""分块渲染与整页渲染的一致性测试"""
+
+import os
+
+import fitz  # PyMuPDF
+import numpy as np
+import pytest
+
+from notebooklm2ppt.utils.tiled_render import render_page_tiled, TILE_OVERLAP, MIN_STRIP_ROWS
+
+
+def _vector_page():
+    doc = fitz.open()
+    page = doc.new_page(width=400, height=300)
+    for i in range(12):
+        page.draw_circle((30 + i * 30, 40 + i * 20), 12 + i, color=(i / 12, 0.2, 0.6), fill=(0.9, i / 12, 0.3))
+        page.draw_line((0, i * 25.3), (400, 300 - i * 17.7), color=(0, 0, 0), width=0.7)
+    page.insert_text((20, 280), "NotebookLM2PPT tiled render", fontsize=18)
+    return doc, page
+
+
+def _image_page():
+    # 非整数缩放的噪声图片铺满整页，和 NotebookLM 导出的页面结构一致
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, size=(97, 131, 3), dtype=np.uint8)
+    pix = fitz.Pixmap(fitz.csRGB, 131, 97, pixels.tobytes(), False)
+    doc = fitz.open()
+    page = doc.new_page(width=400, height=300)
+    page.insert_image(page.rect, stream=pix.tobytes("png"))
+    return doc, page
+
+
+def _render(page, mat, max_bytes, tmp_path):
+    pix = page.get_pixmap(matrix=mat, alpha=False)
+    ref = np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.width, 3).astype(np.int16)
+    image = render_page_tiled(page, mat, max_bytes, tmp_dir=tmp_path)
+    tiled = np.array(image, dtype=np.int16)
+    filename = image.filename
+    del image
+    os.remove(filename)
+    return ref, tiled
+
+
+def _assert_antialias_close(ref, tiled):
+    # clip 会改变 MuPDF 光栅化时对边的切分，抗锯齿边缘允许有少量差异，但不能出现接缝
+    diff = np.abs(ref - tiled)
+    assert diff.max() <= 32
+    assert diff.mean() < 0.25
+
+
+@pytest.mark.parametrize("rows", [20, 57, 200])
+@pytest.mark.parametrize("dpi", [96, 150, 200])
+def test_vector_page_matches_single_pass(tmp_path, dpi, rows):
+    doc, page = _vector_page()
+    mat = fitz.Matrix(dpi / 72, dpi / 72)
+    width = (page.rect * mat).irect.width
+    ref, tiled = _render(page, mat, width * 3 * (rows + 2 * TILE_OVERLAP), tmp_path)
+    _assert_antialias_close(ref, tiled)
+
+
+def test_vector_page_square_tiles_match_single_pass(tmp_path):
+    doc, page = _vector_page()
+    mat = fitz.Matrix(200 / 72, 200 / 72)
+    ref, tiled = _render(page, mat, 120 * 120 * 3, tmp_path)
+    _assert_antialias_close(ref, tiled)
+
+
+@pytest.mark.parametrize("rows", [MIN_STRIP_ROWS, 40])
+@pytest.mark.parametrize("dpi", [150, 220, 600])
+def test_image_page_has_no_seams(tmp_path, dpi, rows):
+    # MuPDF 的图片采样起点随 clip 变化，分块与整页之间存在亚像素的采样相位差，
+    # 放大后表现为源像素边界上下移动一两个设备像素；这里要求分块结果的每个像素
+    # 都能在整页结果的 5x5 邻域内找到完全相同的值，拼接处不能出现错位或空行
+    doc, page = _image_page()
+    mat = fitz.Matrix(dpi / 72, dpi / 72)
+    width = (page.rect * mat).irect.width
+    ref, tiled = _render(page, mat, width * 3 * (rows + 2 * TILE_OVERLAP), tmp_path)
+    height = ref.shape[0]
+    padded = np.pad(ref, ((2, 2), (2, 2), (0, 0)), mode="edge")
+    best = np.full(ref.shape[:2], 255, dtype=np.int16)
+    for dy in range(5):
+        for dx in range(5):
+            diff = np.abs(padded[dy:dy + height, dx:dx + width] - tiled).max(axis=2)
+            best = np.minimum(best, diff)
+    assert best.max() == 0
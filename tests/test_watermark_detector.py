@@ -0,0 +1,152 @@
+"""WatermarkDetector 在 examples/floyd.pdf 上的定位与笔画遮罩测试"""
+
+from pathlib import Path
+
+import fitz  # PyMuPDF
+import numpy as np
+import pytest
+
+from notebooklm2ppt.utils.image_inpainter import inpaint_arrays
+from notebooklm2ppt.utils.watermark_detector import REFERENCE_WIDTH, WatermarkDetector, _to_gray
+
+FLOYD = Path(__file__).parent.parent / "examples" / "floyd.pdf"
+# 参考页面 (2867x1600) 上的水印矩形
+REFERENCE_RECT = (1536, 1598, 2627, 2863)
+
+
+def _render(dpi, page_num=0):
+    pix = fitz.open(FLOYD)[page_num].get_pixmap(dpi=dpi, alpha=False)
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3).copy()
+
+
+def _count_searches(detector, monkeypatch):
+    calls = []
+    search = detector._search
+
+    def counting(image, scale):
+        calls.append(scale)
+        return search(image, scale)
+
+    monkeypatch.setattr(detector, "_search", counting)
+    return calls
+
+
+@pytest.mark.parametrize("dpi", [72, 150, 300])
+def test_detects_at_dpi(dpi):
+    image = _render(dpi)
+    rect = WatermarkDetector().locate(image)
+    scale = image.shape[1] / REFERENCE_WIDTH
+    assert rect is not None
+    # 与按页面宽度换算的参考矩形相差不超过一个像素
+    assert np.abs(np.array(rect) - np.array(REFERENCE_RECT) * scale).max() <= 1
+    assert rect[1] <= image.shape[0] and rect[3] <= image.shape[1]
+
+
+def test_clean_page_returns_none():
+    assert WatermarkDetector().locate(np.full((1600, 2867, 3), 255, dtype=np.uint8)) is None
+    rng = np.random.default_rng(0)
+    noise = rng.integers(0, 256, size=(800, 1434, 3), dtype=np.uint8)
+    assert WatermarkDetector().locate(noise) is None
+
+
+def test_inpainted_page_returns_none():
+    image = _render(150)
+    detector = WatermarkDetector()
+    assert inpaint_arrays([image], 'background_smooth', detector=detector)[0] is not None
+    # 同一检测器先走缓存校验再回退全窗口搜索，新检测器直接全窗口搜索，都不应再找到水印
+    assert detector.locate(image) is None
+    assert WatermarkDetector().locate(image) is None
+
+
+@pytest.mark.parametrize("layout", ["pad_top", "crop_left"])
+def test_non_widescreen_page(layout):
+    image = _render(150)
+    expected = np.array(WatermarkDetector().locate(image))
+    if layout == "pad_top":
+        # 4:3 页面，水印尺寸按宽度换算
+        extra = round(image.shape[1] * 3 / 4) - image.shape[0]
+        page = np.concatenate([np.full((extra, image.shape[1], 3), 255, np.uint8), image])
+        expected += [extra, extra, 0, 0]
+    else:
+        # 4:3 页面，水印尺寸按高度换算
+        cut = image.shape[1] - round(image.shape[0] * 4 / 3)
+        page = image[:, cut:]
+        expected -= [0, 0, cut, cut]
+    assert abs(page.shape[1] / page.shape[0] - 4 / 3) < 0.01
+    assert np.array_equal(WatermarkDetector().locate(page), expected)
+
+
+def test_cached_hit_verifies_without_search(monkeypatch):
+    detector = WatermarkDetector()
+    calls = _count_searches(detector, monkeypatch)
+    first = detector.locate(_render(150, 0))
+    searches = len(calls)
+    assert searches >= 1
+    assert detector.locate(_render(150, 1)) == first
+    assert len(calls) == searches
+
+
+def test_cached_hit_falls_back_to_full_search(monkeypatch):
+    detector = WatermarkDetector()
+    calls = _count_searches(detector, monkeypatch)
+    image = _render(150)
+    r1, r2, c1, c2 = detector.locate(image)
+    searches = len(calls)
+
+    # 整页内容向左上移动 12 像素，超出缓存位置附近的校验范围
+    shift = 12
+    moved = np.full_like(image, 255)
+    moved[:-shift, :-shift] = image[shift:, shift:]
+    assert detector.locate(moved) == (r1 - shift, r2 - shift, c1 - shift, c2 - shift)
+    assert len(calls) > searches
+    # 之后的页面以新位置为准
+    assert detector.locate(moved) == (r1 - shift, r2 - shift, c1 - shift, c2 - shift)
+
+
+@pytest.mark.parametrize("dpi", [72, 150, 300])
+def test_glyph_mask_covers_strokes_only(dpi):
+    # 第 2 页水印背后没有幻灯片内容，矩形内偏离背景的像素都是水印笔画
+    image = _render(dpi, page_num=1)
+    detector = WatermarkDetector()
+    rect = detector.locate(image)
+    r1, r2, c1, c2 = rect
+    mask = detector.glyph_mask(rect)
+    assert mask.shape == (r2 - r1, c2 - c1)
+
+    gray = _to_gray(image[r1:r2, c1:c2])
+    background = np.median(gray)
+    strokes = np.abs(gray - background) > 30
+    assert strokes.sum() > 0.1 * strokes.size
+    assert not (strokes & ~mask).any()
+    # 遮罩之外都是背景：字母之间与字母内部的空白不被修复
+    assert np.abs(gray[~mask] - background).max() <= 8
+    assert mask.mean() < 0.4
+    columns = mask.any(axis=0)
+    first, last = np.flatnonzero(columns)[[0, -1]]
+    assert not columns[first:last].all()
+
+
+def test_glyph_mask_cached_per_size():
+    detector = WatermarkDetector()
+    rect = detector.locate(_render(150))
+    r1, r2, c1, c2 = rect
+    mask = detector.glyph_mask(rect)
+    # 同尺寸的矩形（位置不同）复用同一个遮罩
+    assert detector.glyph_mask((r1 - 5, r2 - 5, c1 + 3, c2 + 3)) is mask
+    # 尺寸或膨胀像素数不同时分别计算
+    other = detector.glyph_mask((r1, r2, c1, c2 - 10))
+    assert other is not mask and other.shape == (r2 - r1, c2 - c1 - 10)
+    thin = detector.glyph_mask(rect, dilation=0)
+    assert thin is not mask and thin.sum() < mask.sum()
+    assert not (thin & ~mask).any()
+    assert set(detector._glyph_masks) == {(r2 - r1, c2 - c1, 2), (r2 - r1, c2 - c1 - 10, 2), (r2 - r1, c2 - c1, 0)}
+
+
+def test_glyph_mask_non_square_resize():
+    # 高宽不同的缩放必须按 (宽, 高) 传给 _resize，结果形状与矩形一致
+    detector = WatermarkDetector()
+    th, tw = detector.template.shape
+    mask = detector.glyph_mask((0, th * 2, 0, tw))
+    assert mask.shape == (th * 2, tw)
+    mask = detector.glyph_mask((0, th, 0, th))
+    assert mask.shape == (th, th)